@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import sqlite3
+import hashlib
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+from utils import TextProcessor, ModelManager
+from cv_document import CVDocument
+from result_cache import ResultCache
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Sonuç formatı değiştiğinde artırılır; eski önbellek kayıtları kullanılmaz
+RESULT_SCHEMA_VERSION = 5
+# Sonucun hangi aşamada üretildiği; kayıtlı adaylarda sürümü değişen aşamalar
+# yeniden hesaplanır (bkz. candidate_store)
+SCORING_FIELDS = ('scores', 'total_score', 'skills_found', 'experience_years', 'education_info', 'document')
+SALARY_FIELDS = ('salary_prediction',)
+# Yakın kopyadan yeniden kullanılan aşamaların sürüm eki; hiçbir güncel sürümle eşleşmez
+REUSED_VERSION_SUFFIX = '+reused'
+
+
+class AnalysisContext:
+    """Bir CV için bir kez hesaplanıp puanlama motoru ve maaş tahmincisi
+    tarafından paylaşılan analiz verisi (yapılandırılmış belge, küçük harfli
+    metin, anahtar kelime eşleşmeleri, süre ifadeleri ve tarih aralıkları)"""
+
+    def __init__(self, source: Union[str, CVDocument], ruleset):
+        # Eşleşmeler ve puanlama tabloları aynı (derlenmiş) kural setinden gelir
+        self.ruleset = ruleset
+        self.matcher = ruleset.matcher
+        self.document = source if isinstance(source, CVDocument) else CVDocument.parse(source, ruleset.location_index)
+        self.text = self.document.text
+        self.text_lower = self.text.lower()
+        self.keyword_hits: Dict[str, FrozenSet[str]] = self.matcher.match(self.text)
+
+        # Eğitim ve yetenek bölümlerindeki süreler ('4 yıllık lisans', 'Python (2 years)')
+        # iş deneyimi sayılmaz
+        duration_text = self.text_lower
+        if self.document.sections:
+            duration_text = self.document.text_without(('education', 'skills')).lower()
+        self.duration_mentions: List[Tuple[int, str]] = TextProcessor.extract_duration_mentions(duration_text)
+
+        self._work_text: Optional[str] = None
+        self._date_periods: Optional[List[Tuple[int, Optional[int]]]] = None
+        self._experience_years: Optional[float] = None
+        self._education_hits: Optional[Dict[str, FrozenSet[str]]] = None
+
+    @property
+    def has_job_entries(self) -> bool:
+        """Deneyim bölümünde tarihli iş kayıtları bulunduysa deneyim bunlardan hesaplanır"""
+        return bool(self.document.jobs)
+
+    @property
+    def work_text(self) -> str:
+        """İş deneyimi bölümü (ihtiyaç olduğunda bir kez çıkarılır)"""
+        if self._work_text is None:
+            if self.document.has_section('experience'):
+                self._work_text = self.document.section_text('experience').lower()
+            else:
+                # Satır başlıkları olmayan (tek satırlık) metinler için eski arama
+                self._work_text = TextProcessor.extract_work_section(self.text_lower)
+        return self._work_text
+
+    @property
+    def date_periods(self) -> List[Tuple[int, Optional[int]]]:
+        """İş kayıtlarının (başlangıç, bitiş) yıl aralıkları; kayıt yoksa
+        iş deneyimi bölümündeki tüm aralıklar"""
+        if self._date_periods is None:
+            if self.has_job_entries:
+                self._date_periods = [job.period for job in self.document.jobs]
+            else:
+                self._date_periods = TextProcessor.extract_date_periods(self.work_text)
+        return self._date_periods
+
+    @property
+    def experience_years(self) -> float:
+        """Deneyim yılı: tarihli iş kayıtları varsa bunların toplamı, yoksa
+        TextProcessor.extract_experience_years ile aynı kurallar"""
+        if self._experience_years is None:
+            total_months = 0 if self.has_job_entries else TextProcessor.duration_months(self.duration_mentions)
+            if total_months > 0:
+                self._experience_years = total_months / 12
+            else:
+                self._experience_years = TextProcessor.years_from_periods(self.date_periods)
+        return self._experience_years
+
+    @property
+    def education_hits(self) -> Dict[str, FrozenSet[str]]:
+        """Eğitim bölümündeki anahtar kelimeler ('Scrum Master' deneyimde geçse de
+        eğitim sayılmaz); bölüm yoksa tüm metnin eşleşmeleri"""
+        if self._education_hits is None:
+            if self.document.has_section('education'):
+                self._education_hits = self.matcher.match(self.document.section_text('education'))
+            else:
+                self._education_hits = self.keyword_hits
+        return self._education_hits
+
+
+def stage_versions(model_manager: ModelManager = None, ruleset=None) -> Dict[str, str]:
+    """Aşama başına sonucu belirleyen sürüm: puanlama kural setine, maaş
+    tahmini kural seti (özellik çıkarma) ve modele, aday indeksi özellikleri
+    yalnızca metne bağlıdır"""
+    from candidate_index import FEATURES_VERSION
+    model_manager = model_manager or ModelManager()
+    ruleset = ruleset or model_manager.rulesets.get()
+    bundle = model_manager.salary_predictor.registry.get()
+    scoring = '{}:{}:{}'.format(RESULT_SCHEMA_VERSION, ruleset.name, ruleset.version)
+    return {'features': FEATURES_VERSION, 'scoring': scoring,
+            'salary': '{}:{}'.format(scoring, bundle.version if bundle else 'no-model')}
+
+
+def analysis_version(model_manager: ModelManager = None, ruleset=None) -> str:
+    """Sonucu belirleyen kural seti ve model sürümü (önbellek anahtarlarına girer)"""
+    return stage_versions(model_manager, ruleset)['salary']
+
+
+def feature_stage(text: str) -> Dict:
+    """Aday indeksinin saklanan metin özellikleri"""
+    from candidate_index import FEATURES_VERSION, term_features
+    features, weights = term_features(text)
+    return {'features': {'version': FEATURES_VERSION, 'terms': features.tolist(),
+                         'weights': [round(float(weight), 6) for weight in weights]}}
+
+
+def persist_analysis(text: str, result: Dict, model_manager: ModelManager = None,
+                     customer: str = None, candidate_id: str = None, filename: str = None,
+                     extraction: Dict = None, indexed: bool = False) -> Optional[str]:
+    """Aday deposu etkinse (CV_STORE_DB=memory değilse) metni ve sonucun aşamalarını sürümleriyle
+    yazar; adayın kimliğini döndürür. Yalnızca indexed ile yazılan adaylar (POST /api/candidates)
+    aday sıralamasına girer. Aday aynı metin ve sürümlerle zaten kayıtlıysa
+    (ör. önbellek isabeti) yazılmaz. Depo hatası analizi başarısız yapmaz."""
+    model_manager = model_manager or ModelManager()
+    store = model_manager.candidate_store
+    if store is None:
+        return None
+
+    from candidate_store import content_id
+    candidate_id = candidate_id or content_id(text)
+    current = stage_versions(model_manager, model_manager.rulesets.get(customer))
+    versions = dict(current)
+    if (result.get('near_duplicate') or {}).get('reused'):
+        # Yakın kopyadan alınan puanlama ve tahmin bu metinden hesaplanmadı;
+        # sürüm eşleşmediği için yeniden puanlamada adayın kendi metninden hesaplanır
+        versions.update({stage: versions[stage] + REUSED_VERSION_SUFFIX for stage in ('scoring', 'salary')})
+    try:
+        # Değişmeyen aday yeniden yazılırsa seq artar ve her worker'ın indeksi adayı
+        # yeni bir satır olarak tekrar ekler; kendi metninden hesaplanmış kayıt
+        # yakın kopyadan alınmış sonuçla da ezilmez
+        if any(store.is_current(candidate_id, customer, text, candidate_versions, filename, indexed)
+               for candidate_versions in ([current, versions] if versions != current else [current])):
+            return candidate_id
+        stages = {
+            'features': feature_stage(text),
+            'scoring': {field: result[field] for field in SCORING_FIELDS},
+            'salary': {field: result[field] for field in SALARY_FIELDS}
+        }
+        store.put(candidate_id, text, stages, versions,
+                  filename=filename, customer=customer, extraction=extraction, indexed=indexed)
+    except sqlite3.Error as e:
+        logger.error(f"Aday deposuna yazılamadı: {str(e)}")
+        return None
+    return candidate_id
+
+
+def text_cache_key(text: str, version: str) -> str:
+    # Satır sonları normalize edilir; büyük/küçük harf ve boşluklar korunur
+    normalized = text.strip().replace('\r\n', '\n')
+    return ResultCache.make_key('text', normalized, version)
+
+
+def document_cache_key(data: bytes, filename: str, version: str) -> str:
+    extension = filename.rsplit('.', 1)[-1].lower()
+    return ResultCache.make_key('document', extension, hashlib.sha256(data).digest(), version)
+
+
+def analyze_text(text: str, model_manager: ModelManager = None, customer: str = None) -> Dict:
+    """Metni bir kez ayrıştırıp puanlama ve maaş tahmini sonucunu üretir.
+    customer verilirse müşteriye özel kural seti kullanılır."""
+    model_manager = model_manager or ModelManager()
+    return _analyze_uncached([text], model_manager, model_manager.rulesets.get(customer))[0]
+
+
+def cached_analyze_text(text: str, model_manager: ModelManager = None,
+                        cache: ResultCache = None, customer: str = None) -> Tuple[Dict, bool]:
+    """analyze_text'in önbellekli hali; (sonuç, önbellekten_mi) döndürür"""
+    model_manager = model_manager or ModelManager()
+    ruleset = model_manager.rulesets.get(customer)
+    if cache is None and model_manager.near_duplicates is None:
+        return _analyze_uncached([text], model_manager, ruleset)[0], False
+
+    version = analysis_version(model_manager, ruleset)
+    key = text_cache_key(text, version)
+    result = cache.get(key) if cache is not None else None
+    if result is not None:
+        return result, True
+
+    scope = _near_duplicate_scope(customer, version)
+    text_signature, match = _find_near_duplicate(text, model_manager, key, scope)
+    result = _reuse_near_duplicate(match, model_manager, cache)
+    if result is None:
+        result = _analyze_uncached([text], model_manager, ruleset)[0]
+        _flag_near_duplicate(result, match)
+    _remember_signature(text_signature, key, model_manager, scope)
+    if cache is not None:
+        cache.set(key, result)
+    return result, False
+
+
+def analyze_document(data: bytes, filename: str, model_manager: ModelManager = None,
+                     cache: ResultCache = None, customer: str = None) -> Tuple[Dict, bool]:
+    """Yüklenen dosyanın byte'larından metin çıkarıp analiz eder.
+    Önbellek isabetinde metin çıkarma, puanlama ve tahmin tamamen atlanır."""
+    model_manager = model_manager or ModelManager()
+    ruleset = model_manager.rulesets.get(customer)
+
+    key = version = None
+    if cache is not None or model_manager.near_duplicates is not None:
+        version = analysis_version(model_manager, ruleset)
+        key = document_cache_key(data, filename, version)
+    if cache is not None:
+        result = cache.get(key)
+        if result is not None:
+            return result, True
+
+    document, extraction = model_manager.cv_processor.extract_document(data, filename, ruleset.location_index)
+    if not document.text.strip():
+        raise ValueError("Dosyadan metin çıkarılamadı")
+
+    # Yakın kopyada metin çıkarma yine yapılır (imza metinden hesaplanır);
+    # reuse modunda puanlama ve maaş tahmini atlanır
+    scope = _near_duplicate_scope(customer, version)
+    text_signature, match = _find_near_duplicate(document.text, model_manager, key, scope)
+    reused = _reuse_near_duplicate(match, model_manager, cache)
+    result = {'extracted_text': document.text}
+    if reused is not None:
+        result.update(reused)
+    else:
+        result.update(_analyze_uncached([document], model_manager, ruleset)[0])
+        _flag_near_duplicate(result, match)
+    # Sayfa sayısı, sayfa bazlı süreler ve bütçe nedeniyle kesilme bilgisi
+    result['extraction'] = extraction
+    _remember_signature(text_signature, key, model_manager, scope)
+
+    if cache is not None:
+        cache.set(key, result)
+    return result, False
+
+
+def analyze_batch(texts: List[str], model_manager: ModelManager = None,
+                  cache: ResultCache = None, customer: str = None,
+                  near_duplicates: bool = True) -> List[Dict]:
+    """Birden çok CV'yi analiz eder; maaş tahmini tüm parti için tek
+    model çağrısıyla yapılır. Sonuçlar analyze_text ile birebir aynıdır.
+    near_duplicates=False ise yakın kopya tespitini çağıran yapar (bkz. cli.run_bulk)."""
+    model_manager = model_manager or ModelManager()
+    ruleset = model_manager.rulesets.get(customer)
+    near_duplicates = near_duplicates and model_manager.near_duplicates is not None
+    if cache is None and not near_duplicates:
+        return _analyze_uncached(texts, model_manager, ruleset)
+
+    version = analysis_version(model_manager, ruleset)
+    keys = [text_cache_key(text, version) for text in texts]
+    results = [cache.get(key) if cache is not None else None for key in keys]
+
+    # Partideki CV'ler sırayla indekse eklenir; aynı partideki yakın kopyalar
+    # da bulunur. reuse modunda partide daha önce gelen kopyanın sonucu beklenir.
+    missing, reused_indices, matches, aliases = [], [], {}, {}
+    batch_positions = {}
+    scope = _near_duplicate_scope(customer, version)
+    for index, result in enumerate(results):
+        if result is not None:
+            continue
+        text_signature, match = (_find_near_duplicate(texts[index], model_manager, keys[index], scope)
+                                 if near_duplicates else (None, None))
+        reused = _reuse_near_duplicate(match, model_manager, cache)
+        if reused is not None:
+            results[index] = reused
+            reused_indices.append(index)
+        elif (match is not None and model_manager.near_duplicates.mode == 'reuse'
+              and match[2]['cache_key'] in batch_positions):
+            aliases[index] = batch_positions[match[2]['cache_key']]
+            matches[index] = match
+        else:
+            matches[index] = match
+            missing.append(index)
+        batch_positions.setdefault(keys[index], index)
+        _remember_signature(text_signature, keys[index], model_manager, scope)
+
+    if missing:
+        computed = _analyze_uncached([texts[index] for index in missing], model_manager, ruleset)
+        for index, result in zip(missing, computed):
+            _flag_near_duplicate(result, matches[index])
+            results[index] = result
+    for index, source in aliases.items():
+        results[index] = _near_duplicate_copy(results[source], matches[index])
+    if cache is not None:
+        for index in missing + reused_indices + list(aliases):
+            cache.set(keys[index], results[index])
+    return results
+
+
+def run_job(job: Dict) -> Dict:
+    """İş kuyruğundaki bir işi (yüklenen dosya veya metin) analiz eder"""
+    model_manager = ModelManager()
+    customer = job.get('customer')
+
+    if job['kind'] == 'document':
+        analysis, _ = analyze_document(job['payload'], job['filename'], model_manager,
+                                       model_manager.result_cache, customer=customer)
+        persist_analysis(analysis['extracted_text'], analysis, model_manager, customer=customer,
+                         filename=job['filename'], extraction=analysis.get('extraction'))
+        result = {'filename': job['filename']}
+        result.update(analysis)
+        return result
+
+    text = job['payload'].decode('utf-8')
+    result = cached_analyze_text(text, model_manager, model_manager.result_cache, customer=customer)[0]
+    persist_analysis(text, result, model_manager, customer=customer)
+    return result
+
+
+def _near_duplicate_scope(customer: Optional[str], version: str) -> Tuple[str, str]:
+    """Yakın kopyalar yalnızca aynı müşteri ve aynı kural seti/model sürümündeki
+    analizler arasında aranır; bir müşteri diğerinin yüklemelerini görmez"""
+    return customer or '', version
+
+
+def _index_key(key: str, scope: Tuple[str, str]) -> str:
+    # Müşteriler aynı kural setini (aynı önbellek anahtarını) paylaşabilir; indeks kaydı müşteriye aittir
+    return f'{scope[0]}:{key}'
+
+
+def _find_near_duplicate(text: str, model_manager: ModelManager, key: str, scope: Tuple[str, str]):
+    """(imza, en benzer kayıt) döndürür; yakın kopya tespiti kapalıysa (None, None).
+    key ile kaydedilmiş önceki analiz (aynı metin, önbellekten düşmüş) kopya sayılmaz."""
+    index = model_manager.near_duplicates
+    if index is None or not text.strip():
+        return None, None
+    from near_duplicates import signature
+    with get_metrics().timer('cv_stage_seconds', stage='near_duplicate'):
+        text_signature = signature(text)
+        return text_signature, index.query(text_signature, exclude=_index_key(key, scope), scope=scope)
+
+
+def _reuse_near_duplicate(match, model_manager: ModelManager, cache: Optional[ResultCache]) -> Optional[Dict]:
+    """reuse modunda yakın kopyanın önbellekteki sonucunun kopyası (eşleşme aynı
+    müşteri ve sürümle sınırlıdır, bkz. _near_duplicate_scope)"""
+    if match is None or cache is None or model_manager.near_duplicates.mode != 'reuse':
+        return None
+    result = cache.get(match[2]['cache_key'])
+    if result is None:
+        return None
+    return _near_duplicate_copy(result, match)
+
+
+def _near_duplicate_copy(result: Dict, match) -> Dict:
+    reused = {field: value for field, value in result.items()
+              if field not in ('extracted_text', 'extraction', 'near_duplicate')}
+    _flag_near_duplicate(reused, match, action='reuse')
+    return reused
+
+
+def _flag_near_duplicate(result: Dict, match, action: str = 'flag'):
+    if match is None:
+        return
+    # Eşleşen kaydın dosya adı veya kimliği döndürülmez
+    result['near_duplicate'] = {'similarity': round(match[1], 3), 'reused': action == 'reuse'}
+    get_metrics().inc('cv_near_duplicates_total', action=action)
+
+
+def _remember_signature(text_signature, key: str, model_manager: ModelManager, scope: Tuple[str, str]):
+    if text_signature is not None:
+        model_manager.near_duplicates.add(_index_key(key, scope), text_signature,
+                                          {'scope': scope, 'cache_key': key})
+
+
+def _analyze_uncached(sources: List[Union[str, CVDocument]], model_manager: ModelManager,
+                      ruleset) -> List[Dict]:
+    with get_metrics().timer('cv_stage_seconds', stage='parse'):
+        contexts = [AnalysisContext(source, ruleset) for source in sources]
+    salary_predictions = model_manager.salary_predictor.predict_salary_batch(contexts)
+
+    results = []
+    for context, salary_prediction in zip(contexts, salary_predictions):
+        result = score_context(context, model_manager)
+        result['salary_prediction'] = salary_prediction
+        results.append(result)
+    return results
+
+
+def score_context(context: AnalysisContext, model_manager: ModelManager) -> Dict:
+    """Puanlama aşaması (SCORING_FIELDS)"""
+    scoring_engine = model_manager.scoring_engine
+    scores = scoring_engine.calculate_scores(context)
+    return {
+        'scores': scores,
+        'total_score': sum(scores.values()),
+        'skills_found': scoring_engine.get_skills_found(context),
+        'experience_years': scoring_engine.get_experience_years(context),
+        'education_info': scoring_engine.get_education_info(context),
+        # Bölümler, iş kayıtları ve lokasyon (satır numaraları metne göredir)
+        'document': context.document.to_dict()
+    }
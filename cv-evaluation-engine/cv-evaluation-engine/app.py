@@ -1,8 +1,14 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, url_for, g
 import os
+import time
 import logging
-from werkzeug.utils import secure_filename
-from utils import ModelManager, SecurityValidator
+from utils import ModelManager
+from analysis import analyze_batch, persist_analysis
+import endpoints
+from endpoints import MAX_BATCH_SIZE, MAX_TEXT_LENGTH
+from job_queue import QueueFullError, validate_callback_url
+from ruleset import UnknownRulesetError
+from metrics import get_metrics, start_request, end_request, format_timing_header
 
 # Logging yapılandırması
 logging.basicConfig(level=logging.INFO)
@@ -11,141 +17,374 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+# Yüklenen dosyaların kopyasını uploads/ altında saklamak için CV_SAVE_UPLOADS=1
+app.config['SAVE_UPLOADS'] = os.environ.get('CV_SAVE_UPLOADS', '0') == '1'
 
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-ALLOWED_EXTENSIONS = {'pdf', 'txt', 'docx'}
-MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+# Debug modunda veya CV_TIMING_HEADER=1 ile yanıtlara X-Timing aşama dökümü eklenir
+app.config['TIMING_HEADER'] = os.environ.get('CV_TIMING_HEADER', '0') == '1'
 
-def allowed_file(filename):
-    return SecurityValidator.validate_file_extension(filename, ALLOWED_EXTENSIONS)
+# Modelleri uygulama yüklenirken hazırla; gunicorn --preload ile master
+# süreçte bir kez yüklenir ve worker'lar copy-on-write ile paylaşır
+if os.environ.get('CV_PRELOAD_MODELS', '1') == '1':
+    ModelManager().preload()
+
+def _endpoint_label():
+    # Kural kullanılır (/api/jobs/<job_id>); kimlikler etiket sayısını şişirmez
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def _count_error(error):
+    endpoints.count_error(error, _endpoint_label())
+
+def _json_body():
+    """JSON gövdesi; geçersiz JSON veya JSON olmayan içerik None (400) olur"""
+    return endpoints.parse_json(request.get_data(), request.content_type)
+
+def _response(status, body, headers):
+    response = jsonify(body)
+    response.status_code = status
+    response.headers.update(headers)
+    return response
+
+@app.before_request
+def _start_timing():
+    g.request_start = time.perf_counter()
+    g.timing_token = start_request()
+
+@app.after_request
+def _record_timing(response):
+    start = g.pop('request_start', None)
+    token = g.pop('timing_token', None)
+    if start is None:
+        return response
+    
+    elapsed = time.perf_counter() - start
+    timings = end_request(token)
+    metrics = get_metrics()
+    endpoint = _endpoint_label()
+    metrics.observe('cv_request_seconds', elapsed, endpoint=endpoint)
+    metrics.inc('cv_requests_total', endpoint=endpoint, status=response.status_code)
+    metrics.flush()
+    
+    if app.debug or app.config['TIMING_HEADER']:
+        timings['total'] = elapsed
+        response.headers['X-Timing'] = format_timing_header(timings)
+    return response
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
-    try:
-        # Dosya varlığını kontrol et
-        if 'file' not in request.files:
-            logger.warning("Dosya seçilmedi")
-            return jsonify({'error': 'Dosya seçilmedi'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            logger.warning("Boş dosya adı")
-            return jsonify({'error': 'Dosya seçilmedi'}), 400
-        
-        # Güvenlik kontrolleri
-        if not allowed_file(file.filename):
-            logger.warning(f"Geçersiz dosya formatı: {file.filename}")
-            return jsonify({'error': 'Geçersiz dosya formatı. Sadece PDF, TXT ve DOCX dosyaları desteklenir.'}), 400
-        
+def _validate_upload():
+    """İstekteki dosyayı doğrular; (dosya, güvenli_ad, hata_yanıtı) döndürür"""
+    file = request.files.get('file')
+    if file is None:
+        filename, error_response = endpoints.validate_upload(None, 0)
+    else:
         # Dosya boyutunu kontrol et
         file.seek(0, 2)  # Dosyanın sonuna git
         file_size = file.tell()
         file.seek(0)  # Başa dön
+        filename, error_response = endpoints.validate_upload(file.filename, file_size)
+    if error_response:
+        return None, None, _response(*error_response)
+    return file, filename, None
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    try:
+        file, filename, error_response = _validate_upload()
+        if error_response:
+            return error_response
         
-        if not SecurityValidator.validate_file_size(file_size, MAX_FILE_SIZE):
-            logger.warning(f"Dosya çok büyük: {file_size} bytes")
-            return jsonify({'error': f'Dosya çok büyük. Maksimum {MAX_FILE_SIZE // (1024*1024)}MB olmalıdır.'}), 400
-        
-        # Güvenli dosya adı oluştur
-        filename = SecurityValidator.sanitize_filename(secure_filename(file.filename))
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        
-        # Dosyayı kaydet
-        file.save(filepath)
-        logger.info(f"Dosya kaydedildi: {filename}")
+        # İstenirse yüklenen dosyanın bir kopyası benzersiz adla saklanır;
+        # analiz her durumda diske yazmadan istek akışı üzerinden yapılır
+        data = file.stream.read()
+        if app.config['SAVE_UPLOADS']:
+            endpoints.save_upload(data, filename, app.config['UPLOAD_FOLDER'])
         
         try:
-            # Model manager kullanarak singleton instance'ları al
-            model_manager = ModelManager()
-            
-            # Metin çıkarma
-            extracted_text = model_manager.cv_processor.extract_text(filepath)
-            if not extracted_text.strip():
-                raise ValueError("Dosyadan metin çıkarılamadı")
-            
-            # Puanlama
-            scores = model_manager.scoring_engine.calculate_scores(extracted_text)
-            
-            # Maaş tahmini
-            salary_prediction = model_manager.salary_predictor.predict_salary(extracted_text)
-            
-            result = {
-                'filename': filename,
-                'extracted_text': extracted_text,
-                'scores': scores,
-                'total_score': sum(scores.values()),
-                'skills_found': model_manager.scoring_engine.get_skills_found(extracted_text),
-                'experience_years': model_manager.scoring_engine.get_experience_years(extracted_text),
-                'education_info': model_manager.scoring_engine.get_education_info(extracted_text),
-                'salary_prediction': salary_prediction
-            }
-            
-            logger.info(f"CV analizi tamamlandı: {filename}")
-            return jsonify(result)
-            
-        except ValueError as ve:
-            logger.error(f"Değer hatası: {str(ve)}")
-            return jsonify({'error': f'Dosya işleme hatası: {str(ve)}'}), 400
+            # Aynı dosya daha önce analiz edildiyse sonuç önbellekten gelir
+            result, cache_hit = endpoints.analyze_upload(data, filename, request.form.get('customer'),
+                                                         request.form.get('candidate_id'))
+            return _response(*endpoints.analysis_response(result, cache_hit))
         except Exception as e:
-            logger.error(f"Beklenmeyen hata: {str(e)}")
-            return jsonify({'error': f'Dosya işlenirken hata oluştu: {str(e)}'}), 500
-        finally:
-            # Geçici dosyayı temizle
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                logger.info(f"Geçici dosya silindi: {filename}")
+            return _response(*endpoints.upload_error(e, _endpoint_label()))
     
     except Exception as e:
-        logger.error(f"Upload endpoint hatası: {str(e)}")
-        return jsonify({'error': 'Sunucu hatası'}), 500
+        return _response(*endpoints.server_error(e, _endpoint_label(), 'Upload endpoint'))
 
 @app.route('/api/analyze', methods=['POST'])
 def api_analyze():
     try:
-        data = request.get_json()
+        data = _json_body()
+        text, error_response = endpoints.validate_text(data)
+        if error_response:
+            return _response(*error_response)
         
-        if not data or 'text' not in data:
-            logger.warning("API analyze: Metin verisi bulunamadı")
-            return jsonify({'error': 'Metin verisi bulunamadı'}), 400
+        # Puanlama ve maaş tahmini (metin bir kez ayrıştırılır, sonuç önbelleklenir)
+        result, cache_hit = endpoints.analyze_text(text, data.get('customer'), data.get('candidate_id'))
+        return _response(*endpoints.analysis_response(result, cache_hit))
         
-        text = data['text'].strip()
-        if not text:
-            logger.warning("API analyze: Boş metin")
-            return jsonify({'error': 'Metin boş olamaz'}), 400
+    except Exception as e:
+        return _response(*endpoints.analysis_error(e, _endpoint_label(), 'API analyze'))
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def api_analyze_batch():
+    try:
+        data = _json_body()
+        texts, error_response = endpoints.validate_batch(data)
+        if error_response:
+            return _response(*error_response)
         
-        if len(text) > 50000:  # 50KB metin sınırı
-            logger.warning("API analyze: Metin çok uzun")
-            return jsonify({'error': 'Metin çok uzun. Maksimum 50,000 karakter olmalıdır.'}), 400
+        results, valid_indices, valid_texts = endpoints.split_batch(texts)
+        batch_results = endpoints.analyze_texts(valid_texts, data.get('customer'))
+        return _response(*endpoints.batch_response(results, valid_indices, batch_results))
         
-        # Model manager kullanarak singleton instance'ları al
-        model_manager = ModelManager()
+    except Exception as e:
+        return _response(*endpoints.analysis_error(e, _endpoint_label(), 'API batch'))
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Analizi kuyruğa alır ve hemen bir iş kimliği döndürür"""
+    try:
+        job_queue = ModelManager().job_queue
         
-        # Puanlama
-        scores = model_manager.scoring_engine.calculate_scores(text)
+        if 'file' in request.files:
+            file, filename, error_response = _validate_upload()
+            if error_response:
+                return error_response
+            kind, payload = 'document', file.stream.read()
+            form = request.form
+        else:
+            form = _json_body()
+            text, error_response = endpoints.validate_text(form)
+            if error_response:
+                return _response(*error_response)
+            kind, payload, filename = 'text', text.encode('utf-8'), None
+        callback_url, customer = form.get('callback_url'), form.get('customer')
         
-        # Maaş tahmini
-        salary_prediction = model_manager.salary_predictor.predict_salary(text)
+        # Özel/loopback/link-local adreslere (ör. bulut metadata servisi) gönderilmez
+        if callback_url not in (None, '') and not validate_callback_url(callback_url):
+            logger.warning(f"API jobs: Geçersiz callback_url: {callback_url!r}")
+            return jsonify({'error': 'Geçersiz callback_url'}), 400
+        # Bilinmeyen müşteri iş çalışırken değil, kabul edilirken reddedilir
+        ModelManager().rulesets.get(customer)
         
-        result = {
-            'scores': scores,
-            'total_score': sum(scores.values()),
-            'skills_found': model_manager.scoring_engine.get_skills_found(text),
-            'experience_years': model_manager.scoring_engine.get_experience_years(text),
-            'education_info': model_manager.scoring_engine.get_education_info(text),
-            'salary_prediction': salary_prediction
-        }
+        try:
+            job_id = job_queue.submit(kind, payload, filename=filename, callback_url=callback_url,
+                                      customer=customer)
+        except QueueFullError:
+            logger.warning("API jobs: Kuyruk dolu")
+            response = jsonify({'error': 'İş kuyruğu dolu, lütfen daha sonra tekrar deneyin.'})
+            response.headers['Retry-After'] = '5'
+            return response, 429
         
-        logger.info("API analyze tamamlandı")
-        return jsonify(result)
+        logger.info(f"İş kuyruğa alındı: {job_id}")
+        return jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': url_for('get_job', job_id=job_id)
+        }), 202
         
+    except UnknownRulesetError as e:
+        logger.warning(f"API jobs: {str(e)}")
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        logger.error(f"API analyze hatası: {str(e)}")
-        return jsonify({'error': f'Analiz sırasında hata oluştu: {str(e)}'}), 500
+        _count_error(e)
+        logger.error(f"API jobs hatası: {str(e)}")
+        return jsonify({'error': 'Sunucu hatası'}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = ModelManager().job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'İş bulunamadı'}), 404
+    
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'started_at': job.get('started_at'),
+        'finished_at': job.get('finished_at')
+    }
+    if job.get('result') is not None:
+        response['result'] = job['result']
+    if job.get('error'):
+        response['error'] = job['error']
+    return jsonify(response)
+
+@app.route('/api/candidates', methods=['POST'])
+def add_candidates():
+    """CV'leri analiz edip müşterinin aday sıralama indeksine ekler (aynı kimlik güncellenir).
+    Yalnızca bu uçla eklenen adaylar sıralanır; diğer analizler yalnızca depoya yazılır."""
+    try:
+        data = request.get_json(silent=True)
+        candidates = data.get('candidates', [data]) if isinstance(data, dict) else None
+        if not candidates or not isinstance(candidates, list):
+            return jsonify({'error': 'Aday listesi (candidates) bulunamadı'}), 400
+        if len(candidates) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Tek istekte en fazla {MAX_BATCH_SIZE} aday gönderilebilir.'}), 400
+
+        ids, texts = [], []
+        for candidate in candidates:
+            if not isinstance(candidate, dict) or not str(candidate.get('id') or '').strip():
+                return jsonify({'error': 'Her aday için id gerekli'}), 400
+            text = candidate.get('text').strip() if isinstance(candidate.get('text'), str) else ''
+            if not text or len(text) > MAX_TEXT_LENGTH:
+                return jsonify({'error': f"Geçersiz CV metni: {candidate['id']}"}), 400
+            ids.append(str(candidate['id']).strip())
+            texts.append(text)
+
+        model_manager = ModelManager()
+        ruleset = model_manager.rulesets.get(data.get('customer'))
+        results = analyze_batch(texts, model_manager, model_manager.result_cache, customer=data.get('customer'))
+        store = model_manager.candidate_store
+        with get_metrics().timer('cv_stage_seconds', stage='index'):
+            if store is not None:
+                # Depoya yazılır; bu ve diğer worker'ların indeksleri depodan eşitlenir
+                for candidate_id, text, result in zip(ids, texts, results):
+                    persist_analysis(text, result, model_manager, customer=data.get('customer'),
+                                     candidate_id=candidate_id, indexed=True)
+                index = _candidate_index()
+            else:
+                index = model_manager.candidate_index
+                for candidate_id, text, result in zip(ids, texts, results):
+                    index.add_analysis(candidate_id, text, result, ruleset, data.get('customer'))
+
+        logger.info(f"Aday indeksine eklendi: {len(ids)}")
+        return jsonify({'indexed': ids, 'count': len(index)})
+
+    except UnknownRulesetError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        _count_error(e)
+        logger.error(f"API candidates hatası: {str(e)}")
+        return jsonify({'error': f'Aday eklenirken hata oluştu: {str(e)}'}), 500
+
+def _candidate_index():
+    """Aday indeksi; aday deposu etkinse son değişiklikler önce uygulanır"""
+    model_manager = ModelManager()
+    index = model_manager.candidate_index
+    if model_manager.candidate_store is not None:
+        index.sync(model_manager.candidate_store, model_manager.rulesets)
+    return index
+
+@app.route('/api/candidates/<candidate_id>', methods=['GET'])
+def get_candidate(candidate_id):
+    """Depodaki aday sonucu ve aşama sürümleri (?customer= müşterinin adayı)"""
+    store = ModelManager().candidate_store
+    candidate = store.get(candidate_id, request.args.get('customer')) if store is not None else None
+    if candidate is None:
+        return jsonify({'error': 'Aday bulunamadı'}), 404
+    return jsonify(candidate)
+
+@app.route('/api/candidates/<candidate_id>', methods=['DELETE'])
+def remove_candidate(candidate_id):
+    model_manager = ModelManager()
+    store = model_manager.candidate_store
+    if store is not None:
+        removed = store.delete(candidate_id, request.args.get('customer'))
+        _candidate_index()
+    else:
+        removed = model_manager.candidate_index.remove(candidate_id, request.args.get('customer'))
+    if not removed:
+        return jsonify({'error': 'Aday bulunamadı'}), 404
+    return jsonify({'removed': candidate_id})
+
+@app.route('/api/candidates/stats', methods=['GET'])
+def candidate_stats():
+    stats = _candidate_index().stats()
+    store = ModelManager().candidate_store
+    if store is not None:
+        stats['store'] = store.stats()
+    return jsonify(stats)
+
+@app.route('/api/jobs/<posting>/rank', methods=['POST'])
+def rank_candidates(posting):
+    """İlanın müşterisine (customer) ait adaylardan ilana en uygunlarını döndürür.
+    description verilirse ilan kaydedilir; verilmezse aynı ilan kimliğiyle önceden
+    gönderilen açıklama kullanılır."""
+    from candidate_index import JobPosting, MAX_TOP_K
+    try:
+        data = request.get_json(silent=True) or {}
+        model_manager = ModelManager()
+        index = _candidate_index()
+
+        description = data.get('description')
+        if isinstance(description, str) and description.strip():
+            if len(description) > MAX_TEXT_LENGTH:
+                return jsonify({'error': 'İlan metni çok uzun. Maksimum 50,000 karakter olmalıdır.'}), 400
+            job_posting = JobPosting(description.strip(), model_manager.rulesets.get(data.get('customer')),
+                                     min_experience=data.get('min_experience'),
+                                     education=data.get('education'), location=data.get('location'),
+                                     customer=data.get('customer'))
+            if model_manager.candidate_store is not None:
+                # Diğer worker'lar ilanı depodaki sorgudan kurar
+                query = {key: data.get(key) for key in ('customer', 'min_experience', 'education', 'location')}
+                query['description'] = description.strip()
+                job_posting.saved_at = model_manager.candidate_store.put_posting(posting, query)
+            index.set_posting(posting, job_posting)
+        else:
+            job_posting = index.posting(posting, model_manager.candidate_store, model_manager.rulesets)
+            if job_posting is None:
+                return jsonify({'error': 'İlan bulunamadı; description gönderin'}), 404
+
+        try:
+            top_k = int(data.get('top_k', 10))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Geçersiz top_k'}), 400
+        if not 1 <= top_k <= MAX_TOP_K:
+            return jsonify({'error': f'top_k 1 ile {MAX_TOP_K} arasında olmalıdır'}), 400
+        weights = data.get('weights')
+        if weights is not None and not (isinstance(weights, dict) and
+                                        all(isinstance(value, (int, float)) for value in weights.values())):
+            return jsonify({'error': 'Geçersiz weights'}), 400
+
+        with get_metrics().timer('cv_stage_seconds', stage='rank'):
+            candidates = index.rank(job_posting, top_k, weights)
+        return jsonify({
+            'posting': posting,
+            'query': job_posting.to_dict(),
+            'indexed': len(index),
+            'candidates': candidates
+        })
+
+    except UnknownRulesetError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        _count_error(e)
+        logger.error(f"API rank hatası: {str(e)}")
+        return jsonify({'error': f'Sıralama sırasında hata oluştu: {str(e)}'}), 500
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    model_manager = ModelManager()
+    stats = model_manager.result_cache.stats()
+    if model_manager.near_duplicates is not None:
+        stats['near_duplicates'] = model_manager.near_duplicates.stats()
+    return jsonify(stats)
+
+@app.route('/api/ruleset', methods=['GET'])
+def ruleset_info():
+    """Yüklü kural seti sürümleri ve tanımlı müşteri kural setleri"""
+    return jsonify(ModelManager().rulesets.info())
+
+@app.route('/api/memory', methods=['GET'])
+def memory_info():
+    """Ana süreç ve worker'lar için benzersiz (USS) ve paylaşılan bellek"""
+    from memory_report import memory_report
+    # Gunicorn altında worker'ın üst süreci ana süreçtir; rapor tüm worker'ları kapsar
+    under_gunicorn = request.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn')
+    report = memory_report(os.getppid() if under_gunicorn else os.getpid())
+    report['model'] = ModelManager().salary_predictor.registry.info()
+    return jsonify(report)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metin formatında histogramlar ve sayaçlar (tüm worker'lar)"""
+    return get_metrics().render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
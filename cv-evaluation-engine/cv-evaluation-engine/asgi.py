@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""ASGI sunum modu (uvicorn).
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+/upload, /api/analyze ve /api/analyze/batch olay döngüsünde karşılanır:
+istek gövdesi parça parça okunur (yükleme boyut sınırı okurken uygulanır).
+Doğrulama, hata eşlemesi ve yanıtlar Flask sunumuyla ortaktır (endpoints);
+analiz (sonuç önbelleği, yakın kopya indeksi ve aday deposu dahil) aynı
+fonksiyonlarla sınırlı bir süreç havuzunda çalışır. Havuzdaki her süreç bir
+gunicorn worker'ı gibi kendi bellek önbelleğini ve yakın kopya indeksini tutar.
+Eşzamanlı istek sayısı worker sayısıyla değil, havuzdaki süreç sayısı
+(CV_ASGI_PROCESSES, varsayılan çekirdek sayısı) ve bekleyen iş sınırıyla
+(CV_ASGI_MAX_PENDING) belirlenir; sınır doluysa 503 döner. Diğer tüm uçlar
+Flask uygulamasına (thread'de WSGI olarak) devredilir.
+"""
+
+import os
+import io
+import sys
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+import endpoints
+from utils import ModelManager
+from metrics import get_metrics, start_request, end_request, format_timing_header
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROCESSES = int(os.environ.get('CV_ASGI_PROCESSES', str(os.cpu_count() or 1)))
+# Havuzda bekleyen + çalışan iş sınırı; aşılırsa istek 503 ile reddedilir
+DEFAULT_MAX_PENDING = int(os.environ.get('CV_ASGI_MAX_PENDING', str(32 * DEFAULT_PROCESSES)))
+NATIVE_ROUTES = ('/upload', '/api/analyze', '/api/analyze/batch')
+
+
+class PoolBusyError(Exception):
+    """Süreç havuzundaki bekleyen iş sınırı dolu"""
+
+
+class RequestTooLargeError(Exception):
+    """İstek gövdesi izin verilen boyutu aşıyor"""
+
+
+# --- Süreç havuzunda çalışan işler ---------------------------------------------
+
+def _init_worker():
+    # Paralellik bu havuzdan gelir; büyük PDF'ler için iç içe havuz açılmaz
+    os.environ['CV_PDF_WORKERS'] = '1'
+    ModelManager().preload()
+
+
+def _run_job(job: Callable, args: Tuple) -> Tuple[object, Dict[str, float]]:
+    """İşi çalıştırır; sonucu ve X-Timing için aşama sürelerini döndürür"""
+    token = start_request()
+    try:
+        result = job(*args)
+    finally:
+        timings = end_request(token)
+        get_metrics().flush()
+    return result, timings
+
+
+# --- ASGI uygulaması --------------------------------------------------------------
+
+class CVEvaluationASGI:
+    def __init__(self, processes: int = DEFAULT_PROCESSES, max_pending: int = DEFAULT_MAX_PENDING):
+        self.processes = max(1, processes)
+        self.max_pending = max(1, max_pending)
+        self._pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._flask = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            self.startup()
+            if scope['method'] == 'POST' and scope['path'] in NATIVE_ROUTES:
+                await self._native(scope, receive, send)
+            else:
+                await self._wsgi(scope, receive, send)
+
+    def startup(self):
+        """Flask uygulamasını (modellerin ön yüklenmesiyle) ve süreç havuzunu hazırlar"""
+        if self._flask is None:
+            import app as flask_module
+            self._flask = flask_module
+        if self._pool is None:
+            # spawn: olay döngüsü ve arka plan thread'leri fork ile kopyalanmaz
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                             mp_context=multiprocessing.get_context('spawn'))
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, self.startup)
+                except Exception as e:
+                    logger.error(f"ASGI başlatma hatası: {str(e)}")
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _submit(self, calls: List[Tuple[Callable, Tuple]]) -> List[Tuple[object, Dict[str, float]]]:
+        """İşleri havuza verir; bekleyen iş sınırı aşılacaksa hiçbirini başlatmaz"""
+        if self._pending + len(calls) > self.max_pending:
+            raise PoolBusyError()
+        loop = asyncio.get_running_loop()
+        self._pending += len(calls)
+        try:
+            pool = self._pool
+            return await asyncio.gather(*[loop.run_in_executor(pool, _run_job, job, args) for job, args in calls])
+        except BrokenProcessPool:
+            # Çöken havuz sonraki istekler için yeniden kurulur
+            if self._pool is pool:
+                self._pool = None
+                self.startup()
+            raise
+        finally:
+            self._pending -= len(calls)
+
+    async def _native(self, scope, receive, send):
+        start = time.perf_counter()
+        token = start_request()
+        path = scope['path']
+        handler = {'/upload': self._upload, '/api/analyze': self._analyze,
+                   '/api/analyze/batch': self._analyze_batch}[path]
+        try:
+            status, body, headers, timings = await handler(scope, receive)
+        except PoolBusyError:
+            logger.warning(f"{path}: Süreç havuzu dolu")
+            status, body, headers, timings = 503, {'error': 'Sunucu meşgul, lütfen daha sonra tekrar deneyin.'}, \
+                {'Retry-After': '5'}, {}
+        except RequestTooLargeError:
+            status, body, headers, timings = 413, {'error': 'İstek çok büyük.'}, {}, {}
+        finally:
+            main_timings = end_request(token)
+
+        elapsed = time.perf_counter() - start
+        metrics = get_metrics()
+        metrics.observe('cv_request_seconds', elapsed, endpoint=path)
+        metrics.inc('cv_requests_total', endpoint=path, status=status)
+        metrics.flush()
+        if self._flask.app.debug or self._flask.app.config['TIMING_HEADER']:
+            timings = dict(main_timings, **timings)
+            timings['total'] = elapsed
+            headers['X-Timing'] = format_timing_header(timings)
+        await self._respond(send, status, body, headers)
+
+    async def _run(self, job: Callable, *args) -> Tuple[object, Dict[str, float]]:
+        (result, timings), = await self._submit([(job, args)])
+        return result, timings
+
+    async def _analyze(self, scope, receive):
+        try:
+            data = endpoints.parse_json(await self._read_body(scope, receive),
+                                        self._headers(scope).get('content-type'))
+            text, error_response = endpoints.validate_text(data)
+            if error_response:
+                return error_response + ({},)
+
+            (result, cache_hit), timings = await self._run(endpoints.analyze_text, text, data.get('customer'),
+                                                           data.get('candidate_id'))
+            return endpoints.analysis_response(result, cache_hit) + (timings,)
+
+        except (PoolBusyError, RequestTooLargeError):
+            raise
+        except Exception as e:
+            return endpoints.analysis_error(e, scope['path'], 'API analyze') + ({},)
+
+    async def _analyze_batch(self, scope, receive):
+        try:
+            data = endpoints.parse_json(await self._read_body(scope, receive),
+                                        self._headers(scope).get('content-type'))
+            texts, error_response = endpoints.validate_batch(data)
+            if error_response:
+                return error_response + ({},)
+
+            # Geçerli metinler havuzdaki süreçlere eşit parçalar halinde dağıtılır
+            results, valid_indices, valid_texts = endpoints.split_batch(texts)
+            batch_results, timings = [], {}
+            if valid_texts:
+                size = -(-len(valid_texts) // self.processes)
+                computed = await self._submit([(endpoints.analyze_texts, (valid_texts[offset:offset + size],
+                                                                          data.get('customer')))
+                                               for offset in range(0, len(valid_texts), size)])
+                for chunk_results, chunk_timings in computed:
+                    batch_results.extend(chunk_results)
+                    for name, elapsed in chunk_timings.items():
+                        timings[name] = timings.get(name, 0.0) + elapsed
+            return endpoints.batch_response(results, valid_indices, batch_results) + (timings,)
+
+        except (PoolBusyError, RequestTooLargeError):
+            raise
+        except Exception as e:
+            return endpoints.analysis_error(e, scope['path'], 'API batch') + ({},)
+
+    async def _upload(self, scope, receive):
+        try:
+            form, (name, data, size) = await self._read_multipart(scope, receive)
+            filename, error_response = endpoints.validate_upload(name, size)
+            if error_response:
+                return error_response + ({},)
+
+            flask_app = self._flask.app
+            if flask_app.config['SAVE_UPLOADS']:
+                await asyncio.to_thread(endpoints.save_upload, data, filename, flask_app.config['UPLOAD_FOLDER'])
+
+            try:
+                (result, cache_hit), timings = await self._run(endpoints.analyze_upload, data, filename,
+                                                               form.get('customer'), form.get('candidate_id'))
+                return endpoints.analysis_response(result, cache_hit) + (timings,)
+            except (PoolBusyError, RequestTooLargeError):
+                raise
+            except Exception as e:
+                return endpoints.upload_error(e, scope['path']) + ({},)
+
+        except (PoolBusyError, RequestTooLargeError):
+            raise
+        except Exception as e:
+            return endpoints.server_error(e, scope['path'], 'Upload endpoint') + ({},)
+
+    async def _read_body(self, scope, receive) -> bytes:
+        limit = self._flask.app.config['MAX_CONTENT_LENGTH']
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            body += message.get('body', b'')
+            if limit is not None and len(body) > limit:
+                raise RequestTooLargeError()
+            if not message.get('more_body', False):
+                break
+        return bytes(body)
+
+    async def _read_multipart(self, scope, receive) -> Tuple[Dict[str, str], Tuple[Optional[str], Optional[bytes], int]]:
+        """Gövdeyi geldikçe çözer; ({alan: değer}, (dosya_adı, içerik, boyut)) döndürür.
+        Dosya MAX_FILE_SIZE'ı aşarsa okumaya devam edilir ama içerik tutulmaz (None)."""
+        headers = self._headers(scope)
+        content_type, options = parse_options_header(headers.get('content-type', ''))
+        boundary = options.get('boundary')
+        if content_type != 'multipart/form-data' or not boundary:
+            return {}, (None, None, 0)
+
+        max_size = endpoints.MAX_FILE_SIZE
+        limit = self._flask.app.config['MAX_CONTENT_LENGTH']
+        received = 0
+        decoder = MultipartDecoder(boundary.encode('latin-1'), max_form_memory_size=1024 * 1024)
+        form, upload, current = {}, None, None
+        finished = False
+        while not finished:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            finished = not message.get('more_body', False)
+            received += len(message.get('body', b''))
+            if limit is not None and received > limit:
+                raise RequestTooLargeError()
+            decoder.receive_data(message.get('body', b''))
+            if finished:
+                decoder.receive_data(None)
+
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, File):
+                    current = None
+                    if event.name == 'file' and upload is None:
+                        upload = [event.filename or '', bytearray(), 0]
+                        current = upload
+                elif isinstance(event, Field):
+                    current = [event.name, bytearray()]
+                elif isinstance(event, Data) and current is not None:
+                    if current is upload:
+                        upload[2] += len(event.data)
+                    if current[1] is not None:
+                        current[1] += event.data
+                        if current is upload and upload[2] > max_size:
+                            current[1] = None
+                    if not event.more_data and current is not upload:
+                        form[current[0]] = bytes(current[1]).decode('utf-8', 'replace')
+                        current = None
+                event = decoder.next_event()
+            if isinstance(event, Epilogue):
+                break
+
+        if upload is None:
+            return form, (None, None, 0)
+        return form, (upload[0], bytes(upload[1]) if upload[1] is not None else None, upload[2])
+
+    @staticmethod
+    def _headers(scope) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        for name, value in scope.get('headers', []):
+            name, value = name.decode('latin-1').lower(), value.decode('latin-1')
+            headers[name] = f"{headers[name]},{value}" if name in headers else value
+        return headers
+
+    async def _respond(self, send, status: int, body, headers: Dict[str, str]):
+        payload = (self._flask.app.json.dumps(body, separators=(',', ':')) + '\n').encode('utf-8')
+        raw_headers = [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+        raw_headers += [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]
+        await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def _wsgi(self, scope, receive, send):
+        """Flask uygulamasını thread'de çalıştırır (gövde önceden okunur)"""
+        try:
+            body = await self._read_body(scope, receive)
+        except RequestTooLargeError:
+            await self._respond(send, 413, {'error': 'İstek çok büyük.'}, {})
+            return
+        environ = self._environ(scope, body)
+        status, headers, payload = await asyncio.to_thread(self._call_wsgi, environ)
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    def _call_wsgi(self, environ) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'], response['headers'] = status, headers
+
+        iterable = self._flask.app(environ, start_response)
+        try:
+            payload = b''.join(iterable)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        return int(response['status'].split(' ', 1)[0]), response['headers'], payload
+
+    def _environ(self, scope, body: bytes) -> Dict:
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in self._headers(scope).items():
+            if name == 'content-type':
+                environ['CONTENT_TYPE'] = value
+            elif name == 'content-length':
+                environ['CONTENT_LENGTH'] = value
+            else:
+                environ['HTTP_' + name.upper().replace('-', '_')] = value
+        return environ
+
+
+app = CVEvaluationASGI()
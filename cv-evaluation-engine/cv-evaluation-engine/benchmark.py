@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Değerlendirme hattı için performans ölçümü.
+
+    python benchmark.py -o sonuc.json
+    python benchmark.py --compare onceki.json
+    python benchmark.py --adversarial --budget-ms 250
+    python benchmark.py --startup --import-budget-ms 600
+
+Tohum derlem test_files/*.txt, uploads/ altındaki örnek PDF ve bunlardan
+üretilen 1 KB - 50.000 karakterlik sentetik CV'lerdir. Her aşama ayrı ayrı
+ölçülür; sonuç p50/p95/p99 ve tracemalloc bellek tepe değerleriyle JSON olarak
+yazılır. Önbelleklerin ölçümü bozmaması için her tekrar metnin farklı bir
+varyantıyla çalışır ve sonuç önbelleği kapatılır.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import platform
+import tempfile
+import argparse
+import logging
+import subprocess
+import tracemalloc
+from io import BytesIO
+from typing import Callable, Dict, List, Tuple
+
+# Sonuç önbelleği kapalı; uç uca ölçüm her istekte tüm hattı çalıştırır
+os.environ['CV_CACHE_SIZE'] = '0'
+os.environ.pop('CV_CACHE_DB', None)
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# /api/analyze sınırı 50.000 karakter; varyant eki için pay bırakılır
+SYNTHETIC_SIZES = (1000, 5000, 20000, 49900)
+STAGES = ('extract_text', 'clean_text', 'parse_document', 'calculate_scores', 'extract_experience_years',
+          'predict_salary', 'e2e_analyze', 'e2e_upload')
+
+# Düzenli ifadelerde geri izlemeyi zorlayan en kötü durum girdileri (--adversarial)
+ADVERSARIAL_INPUTS = {
+    'long_word': lambda size: 'a' * size,
+    'long_digits': lambda size: '1' * size,
+    'word_space_year': lambda size: 'ab 1234 ' * (size // 8),
+    'heading_spam': lambda size: 'career education work skills ' * (size // 29),
+    'heading_whitespace': lambda size: 'work' + ' ' * (size - 4),
+    'date_dashes': lambda size: '2020 - ' * (size // 7),
+    'manager_word': lambda size: 'x' * (size - 8) + ' manage',
+    'letter_spaced': lambda size: 'a ' * (size // 2),
+    'dated_lines': lambda size: 'Experience\n' + 'Engineer\n2019 - 2021\n' * ((size - 11) // 21),
+}
+ADVERSARIAL_SIZES = (5000, 20000, 49900)
+ADVERSARIAL_STAGES = ('parse_document', 'extract_experience_years', 'calculate_scores', 'predict_salary', 'e2e_analyze')
+
+# Soğuk başlangıç senaryoları (--startup): (ortam değişkenleri, app içe aktarıldıktan sonra çalışan kod)
+STARTUP_SCENARIOS = {
+    'import_app': ({'CV_PRELOAD_MODELS': '0'}, ''),
+    'preload_app': ({}, ''),
+    'first_text_request': ({}, "app.app.test_client().post('/api/analyze', json={'text': TEXT})"),
+}
+# Metin analizi yolunda yüklenmemesi gereken modüller (PDF, joblib Pipeline ve aday indeksi için)
+LAZY_MODULES = ('pandas', 'sklearn', 'joblib', 'PyPDF2', 'docx', 'scipy')
+_STARTUP_CODE = """
+import sys, json, time
+TEXT = open({text_path!r}, encoding='utf-8').read()
+start = time.perf_counter()
+sys.path.insert(0, {base_dir!r})
+import app
+{action}
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                  'modules': [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+
+def load_corpus(tmp_dir: str) -> List[Dict]:
+    """Ölçüm vakalarını hazırlar: {'name', 'path', 'text'}"""
+    from cv_processor import CVProcessor
+    processor = CVProcessor()
+
+    cases = []
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, 'test_files', '*.txt'))):
+        cases.append({'name': os.path.splitext(os.path.basename(path))[0], 'path': path})
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, 'uploads', '*.pdf')))[:1]:
+        cases.append({'name': 'sample_pdf', 'path': path})
+    for case in cases:
+        case['text'] = processor.extract_text(case['path'])
+
+    # Sentetik CV'ler tohum metinlerin art arda eklenmesiyle istenen boyuta getirilir
+    seed = '\n\n'.join(case['text'] for case in cases)
+    for size in SYNTHETIC_SIZES:
+        text = (seed * (size // len(seed) + 1))[:size]
+        path = os.path.join(tmp_dir, f'synthetic_{size}.txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        cases.append({'name': f'synthetic_{size}', 'path': path, 'text': text})
+    return cases
+
+
+def load_adversarial(tmp_dir: str) -> List[Dict]:
+    """Her en kötü durum girdisini farklı boyutlarda üretir"""
+    cases = []
+    for name, generate in ADVERSARIAL_INPUTS.items():
+        for size in ADVERSARIAL_SIZES:
+            text = generate(size)
+            path = os.path.join(tmp_dir, f'{name}_{size}.txt')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            cases.append({'name': f'{name}_{size}', 'path': path, 'text': text})
+    return cases
+
+
+def scaling(results: Dict) -> Dict:
+    """En büyük ve en küçük boyuttaki p50 oranının boyut oranına bölümü.
+    ~1 doğrusal büyümeyi, belirgin şekilde büyük değerler süper-doğrusal büyümeyi gösterir."""
+    smallest, largest = ADVERSARIAL_SIZES[0], ADVERSARIAL_SIZES[-1]
+    report = {}
+    for stage, cases in results.items():
+        for name in ADVERSARIAL_INPUTS:
+            small, large = cases.get(f'{name}_{smallest}'), cases.get(f'{name}_{largest}')
+            if small and large and small['p50_ms'] > 0:
+                ratio = (large['p50_ms'] / small['p50_ms']) / (largest / smallest)
+                report.setdefault(stage, {})[name] = round(ratio, 2)
+    return report
+
+
+def _variant(text: str, iteration: int) -> str:
+    # Eşleştirici ve sonuç önbelleklerinin isabet etmemesi için metni tekilleştirir
+    return f'{text}\n#{iteration}'
+
+
+def _percentiles(samples: List[float]) -> Dict:
+    values = np.array(samples) * 1000
+    return {
+        'n': len(samples),
+        'mean_ms': round(float(values.mean()), 3),
+        'min_ms': round(float(values.min()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'max_ms': round(float(values.max()), 3)
+    }
+
+
+def measure(func: Callable[[int], object], iterations: int, warmup: int) -> Dict:
+    """func(i) çağrılarını ölçer; bellek tepe değeri ayrı bir tracemalloc geçişinde alınır
+    (tracemalloc açıkken süreler yanıltıcı olur)"""
+    for i in range(warmup):
+        func(-1 - i)
+
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = _percentiles(samples)
+    result['peak_kb'] = round(peak / 1024, 1)
+    return result
+
+
+def stage_functions(case: Dict, client) -> Dict[str, Callable[[int], object]]:
+    from utils import ModelManager, TextProcessor
+    from cv_document import CVDocument
+    model_manager = ModelManager()
+    cv_processor = model_manager.cv_processor
+    scoring_engine = model_manager.scoring_engine
+    salary_predictor = model_manager.salary_predictor
+    text, path = case['text'], case['path']
+
+    with open(path, 'rb') as file:
+        data = file.read()
+    filename = os.path.basename(path)
+
+    def upload(i):
+        payload = data if filename.endswith('.pdf') else _variant(text, i).encode('utf-8')
+        response = client.post('/upload', data={'file': (BytesIO(payload), filename)},
+                               content_type='multipart/form-data')
+        assert response.status_code == 200, response.data[:200]
+
+    def analyze(i):
+        response = client.post('/api/analyze', json={'text': _variant(text, i)})
+        assert response.status_code == 200, response.data[:200]
+
+    return {
+        'extract_text': lambda i: cv_processor.extract_text(path),
+        'clean_text': lambda i: TextProcessor.clean_text(_variant(text, i)),
+        'parse_document': lambda i: CVDocument.parse(_variant(text, i), model_manager.rulesets.get().location_index),
+        'calculate_scores': lambda i: scoring_engine.calculate_scores(_variant(text, i)),
+        'extract_experience_years': lambda i: TextProcessor.extract_experience_years(_variant(text, i)),
+        'predict_salary': lambda i: salary_predictor.predict_salary(_variant(text, i)),
+        'e2e_analyze': analyze,
+        'e2e_upload': upload
+    }
+
+
+def run(iterations: int = 50, warmup: int = 3, stages: Tuple[str, ...] = STAGES,
+        case_filter: str = None, adversarial: bool = False) -> Dict:
+    from app import app
+    # İstek başına INFO logları ölçümü etkilemesin
+    logging.disable(logging.INFO)
+    client = app.test_client()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cases = load_adversarial(tmp_dir) if adversarial else load_corpus(tmp_dir)
+        if case_filter:
+            cases = [case for case in cases if case_filter in case['name']]
+
+        results = {stage: {} for stage in stages}
+        for case in cases:
+            functions = stage_functions(case, client)
+            for stage in stages:
+                result = measure(functions[stage], iterations, warmup)
+                result['chars'] = len(case['text'])
+                results[stage][case['name']] = result
+
+    report = {'meta': _meta(iterations, warmup), 'results': results}
+    if adversarial:
+        report['scaling'] = scaling(results)
+    return report
+
+
+def startup(runs: int = 5) -> Dict:
+    """Her senaryoyu yeni süreçlerde ölçer: süreç başlatma dahil toplam süre,
+    içe aktarma ve ilk istek süresi, yüklenen ağır modüller ve -X importtime
+    ile en pahalı modüller (kendi süresine göre)"""
+    text_path = sorted(glob.glob(os.path.join(BASE_DIR, 'test_files', '*.txt')))[0]
+    report = {}
+    for name, (env, action) in STARTUP_SCENARIOS.items():
+        code = _STARTUP_CODE.format(text_path=text_path, base_dir=BASE_DIR, action=action, lazy=LAZY_MODULES)
+        environment = dict(os.environ, **env)
+        walls, seconds = [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, env=environment,
+                                    capture_output=True, text=True, check=True).stdout
+            walls.append(time.perf_counter() - start)
+            result = json.loads(output.strip().splitlines()[-1])
+            seconds.append(result['seconds'])
+
+        # importtime ölçümü yavaşlattığından ayrı bir çalıştırmada alınır
+        stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=BASE_DIR,
+                                env=environment, capture_output=True, text=True, check=True).stderr
+        imports = []
+        for line in stderr.splitlines():
+            if line.startswith('import time:') and 'self [us]' not in line:
+                self_us, _, module = line[len('import time:'):].split('|')
+                imports.append((int(self_us), module.strip()))
+        imports.sort(reverse=True)
+
+        report[name] = {
+            'process': _percentiles(walls),
+            'in_process': _percentiles(seconds),
+            'lazy_modules_loaded': result['modules'],
+            'top_imports': [{'module': module, 'self_ms': round(self_us / 1000, 2)}
+                            for self_us, module in imports[:10]]
+        }
+    return report
+
+
+def _meta(iterations: int, warmup: int) -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'iterations': iterations,
+        'warmup': warmup
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """İki ölçümü p50/p95 oranlarıyla karşılaştırır; eşiği aşan gerilemeleri döndürür"""
+    regressions = []
+    print(f"{'aşama':<26}{'vaka':<30}{'p50 (ms)':>20}{'p95 (ms)':>20}")
+    for stage, cases in current['results'].items():
+        for name, result in cases.items():
+            old = baseline.get('results', {}).get(stage, {}).get(name)
+            if not old:
+                continue
+            ratios = [result[key] / old[key] if old[key] else 1.0 for key in ('p50_ms', 'p95_ms')]
+            print(f"{stage:<26}{name:<30}"
+                  f"{old['p50_ms']:>8.2f} → {result['p50_ms']:<8.2f}{ratios[0]:>4.2f}x"
+                  f"{old['p95_ms']:>8.2f} → {result['p95_ms']:<8.2f}{ratios[1]:>4.2f}x")
+            if ratios[0] > threshold:
+                regressions.append(f"{stage}/{name}: p50 {ratios[0]:.2f}x")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='CV değerlendirme hattı performans ölçümü')
+    parser.add_argument('-o', '--output', help='JSON çıktı dosyası (varsayılan: stdout)')
+    parser.add_argument('-n', '--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--stages', nargs='+', choices=STAGES)
+    parser.add_argument('--cases', help='Yalnızca adında bu metin geçen vakalar')
+    parser.add_argument('--compare', help='Karşılaştırılacak önceki JSON sonucu')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='--compare ile p50 bu orandan fazla artarsa çıkış kodu 1')
+    parser.add_argument('--adversarial', action='store_true',
+                        help='Tohum derlem yerine en kötü durum girdileriyle ölç')
+    parser.add_argument('--budget-ms', type=float,
+                        help='Herhangi bir vakanın p99 süresi bunu aşarsa çıkış kodu 1')
+    parser.add_argument('--startup', action='store_true',
+                        help='Aşamalar yerine soğuk başlangıcı (yeni süreçlerde içe aktarma ve ilk istek) ölç')
+    parser.add_argument('--import-budget-ms', type=float,
+                        help='--startup ile ilk metin isteğine kadar geçen p50 süre (süreç başlatma dahil) '
+                             'bunu aşarsa veya metin yolunda ağır bir modül yüklenirse çıkış kodu 1')
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        report = {'meta': _meta(args.iterations, 0), 'startup': startup(args.iterations)}
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            print(output)
+        if args.import_budget_ms is None:
+            return 0
+        first_request = report['startup']['first_text_request']
+        problems = [f"{module} yüklendi" for module in first_request['lazy_modules_loaded']]
+        if first_request['process']['p50_ms'] > args.import_budget_ms:
+            problems.append(f"p50 {first_request['process']['p50_ms']:.0f} ms")
+        if problems:
+            print(f'Başlangıç bütçesi ({args.import_budget_ms} ms) aşıldı: ' + ', '.join(problems))
+            return 1
+        return 0
+
+    stages = args.stages or (ADVERSARIAL_STAGES if args.adversarial else STAGES)
+    report = run(args.iterations, args.warmup, tuple(stages), args.cases, args.adversarial)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    elif not args.compare:
+        print(output)
+
+    failed = False
+    if args.budget_ms is not None:
+        over_budget = [f"{stage}/{name}: p99 {result['p99_ms']:.1f} ms"
+                       for stage, cases in report['results'].items()
+                       for name, result in cases.items() if result['p99_ms'] > args.budget_ms]
+        if over_budget:
+            print(f'Süre bütçesi ({args.budget_ms} ms) aşıldı: ' + ', '.join(over_budget))
+            failed = True
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(json.load(file), report, args.threshold)
+        if regressions:
+            print('Gerileme: ' + ', '.join(regressions))
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
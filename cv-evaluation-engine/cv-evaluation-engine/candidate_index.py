@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""İş ilanına göre aday sıralama indeksi.
+
+Analiz edilmiş her CV bir kez seyrek bir satıra dönüştürülür: metnin en sık
+kelimeleri (hash'lenmiş, L2 normalize) ve bulunan yetenekler aynı özellik
+uzayında tutulur; deneyim yılı, eğitim puanı ve lokasyon ayrı numpy
+dizilerindedir. Satırlar özellik -> aday yönünde (ters indeks) CSR
+segmentlerinde saklanır; ilan sorgusu tek bir seyrek vektör-matris çarpımıyla
+yalnızca ilandaki kelimelerin aday listelerini dolaşır, diğer bileşenler
+vektörel hesaplanır ve ilk K aday argpartition ile seçilir. CV'ler sorguda
+yeniden puanlanmaz.
+
+Yeni adaylar küçük segmentlere eklenir; benzer boyutlu segmentler birleştirilir
+(segment sayısı aday sayısının logaritmasıyla sınırlı kalır). Silinen veya
+güncellenen adayların eski satırları maskelenir."""
+
+import os
+import re
+import math
+import zlib
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+# scipy.sparse yalnızca indeks segmentleri kurulurken yüklenir; analiz yolu bu
+# modülü FEATURES_VERSION için içe aktarır ve scipy'nin açılış maliyetini ödemez
+
+from gazetteer import tokenize
+
+TEXT_FEATURES = 1 << 18
+SKILL_FEATURES = 1 << 14
+# Aday başına saklanan en sık kelime sayısı (bellek: ~8 byte/kelime)
+DEFAULT_MAX_TERMS = int(os.environ.get('CV_INDEX_MAX_TERMS', '64'))
+# Sorguda kullanılan en ayırt edici ilan kelimesi sayısı
+QUERY_TERMS = 48
+# Bekleyen satırlar bu sayıya ulaşınca segment oluşturulur
+SEGMENT_ROWS = 1024
+MAX_TOP_K = 1000
+# Bellekte tutulan ilan sorgusu sayısı (en eskisi atılır)
+MAX_POSTINGS = 1000
+
+# Bileşen ağırlıkları; ilanda karşılığı olmayan bileşen (ör. lokasyon) devre
+# dışı kalır ve kalan ağırlıklar toplamı 1 olacak şekilde ölçeklenir
+DEFAULT_WEIGHTS = {'text': 0.4, 'skills': 0.35, 'experience': 0.15, 'education': 0.05, 'location': 0.05}
+
+_STOP_WORDS = frozenset(
+    'a an and are as at be by for from has have in is it of on or that the to was were will with '
+    'we you your our i my me he she they this these those not but if then so such can may '
+    've ile bir bu da de için olarak olan gibi daha en çok ise ya veya ama şu her kadar sonra '
+    'yil yili yillik years year yrs'.split())
+
+# Saklanan aday özellikleri (bkz. candidate_store) bu sürümle etiketlenir
+FEATURES_VERSION = f'terms-1:{TEXT_FEATURES}:{DEFAULT_MAX_TERMS}'
+
+_EXPERIENCE_PATTERN = re.compile(r'(\d{1,2})\s*\+?\s*(?:years?|yrs?|yıl)', re.IGNORECASE)
+
+
+def _text_feature(token: str) -> int:
+    return zlib.crc32(token.encode('utf-8')) % TEXT_FEATURES
+
+
+def _skill_feature(skill: str) -> int:
+    return TEXT_FEATURES + zlib.crc32(skill.encode('utf-8')) % SKILL_FEATURES
+
+
+def term_counts(text: str) -> Counter:
+    """Özellik numarası -> kelime sayısı (aksan/büyük harf katlanmış, durak kelimeler hariç)"""
+    return Counter(_text_feature(token) for token in tokenize(text)
+                   if len(token) > 1 and not token.isdigit() and token not in _STOP_WORDS)
+
+
+def term_features(text: str, max_terms: int = DEFAULT_MAX_TERMS) -> Tuple[np.ndarray, np.ndarray]:
+    """Adayın en sık max_terms kelimesi ve L2 normalize 1 + log(tf) ağırlıkları"""
+    counts = term_counts(text)
+    # Eşitlikte özellik numarası (kararlı)
+    terms = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:max_terms]
+    features = np.array([feature for feature, _ in terms], dtype=np.int32)
+    weights = np.array([1 + math.log(count) for _, count in terms], dtype=np.float32)
+    norm = float(np.sqrt(np.dot(weights, weights)))
+    if norm:
+        weights /= norm
+    return features, weights
+
+
+class JobPosting:
+    """Sıralama sorgusu: ilan metninden çıkarılan kelimeler, yetenekler,
+    asgari deneyim, eğitim puanı ve lokasyon"""
+
+    def __init__(self, description: str, ruleset, min_experience: Optional[float] = None,
+                 education: Optional[str] = None, location: Optional[str] = None,
+                 customer: Optional[str] = None):
+        self.description = description
+        # Yalnızca bu müşterinin adayları sıralanır
+        self.customer = customer or ''
+        self.terms = term_counts(description)
+        hits = ruleset.matcher.match(description)
+        self.skills = frozenset(hits['skills'])
+
+        if min_experience is None:
+            years = [int(value) for value in _EXPERIENCE_PATTERN.findall(description)]
+            min_experience = max((year for year in years if year <= 40), default=0)
+        self.min_experience = float(min_experience)
+
+        levels = [education.lower()] if education else hits['education_levels']
+        self.education = max((ruleset.education_levels.get(level, 0) for level in levels), default=0)
+
+        self.location = ruleset.location_index.longest(ruleset.location_index.find(location or description))
+        # Aday deposundaki kayıt zamanı; başka worker ilanı güncellediyse yeniden kurulur
+        self.saved_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'skills': sorted(self.skills),
+            'min_experience': self.min_experience,
+            'education': self.education,
+            'location': self.location
+        }
+
+
+class CandidateIndex:
+    """Bellek içi aday indeksi; ekleme ve silme thread-safe'tir, sorgular
+    kilidi yalnızca bekleyen satırları segmente dönüştürürken tutar"""
+
+    def __init__(self, max_terms: int = DEFAULT_MAX_TERMS):
+        self.max_terms = max_terms
+        self._lock = threading.Lock()
+        # (müşteri, aday kimliği); farklı müşterilerin aynı kimlikli adayları ayrı satırlardır
+        self._keys: List[Tuple[str, str]] = []
+        self._positions: Dict[Tuple[str, str], int] = {}
+        self._skills: List[Tuple[str, ...]] = []
+        self._active = np.zeros(0, dtype=bool)
+        self._experience = np.zeros(0, dtype=np.float32)
+        self._education = np.zeros(0, dtype=np.float32)
+        self._location = np.zeros(0, dtype=np.int32)
+        self._location_codes: Dict[str, int] = {}
+        self._customer = np.zeros(0, dtype=np.int32)
+        self._customer_codes: Dict[str, int] = {}
+        # Metin kelimelerinin etkin adaylardaki belge frekansı (idf için)
+        self._document_frequency = np.zeros(TEXT_FEATURES, dtype=np.int32)
+        self._text_features: List[np.ndarray] = []
+        # (ilk satır, özellik x aday CSR) listesi ve henüz segmente girmemiş satırlar
+        self._segments: List[Tuple[int, 'sp.csr_matrix']] = []
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._active_count = 0
+        self.postings: Dict[str, JobPosting] = {}
+        self._sync_lock = threading.Lock()
+        self._synced_seq = 0
+
+    def __len__(self) -> int:
+        return self._active_count
+
+    def __contains__(self, candidate_id: str) -> bool:
+        return ('', candidate_id) in self._positions
+
+    def add(self, candidate_id: str, text: str, skills: Iterable[str], experience_years: float,
+            education: float = 0, location: Optional[str] = None,
+            terms: Optional[Tuple[np.ndarray, np.ndarray]] = None, customer: Optional[str] = None):
+        """Müşterinin adayını ekler; müşterinin aynı kimlikle eklenen adayı öncekinin yerini alır.
+        terms (term_features çıktısı) verilirse metin yeniden işlenmez."""
+        key = (customer or '', candidate_id)
+        skills = tuple(dict.fromkeys(skills))
+        text_features, weights = terms if terms is not None else term_features(text, self.max_terms)
+
+        skill_features = np.unique(np.array([_skill_feature(skill) for skill in skills], dtype=np.int32))
+        features = np.concatenate([text_features, skill_features])
+        order = np.argsort(features)
+        values = np.concatenate([weights, np.ones(len(skill_features), dtype=np.float32)])
+
+        with self._lock:
+            self._remove_locked(key)
+            position = len(self._keys)
+            self._ensure_capacity(position + 1)
+            self._keys.append(key)
+            self._positions[key] = position
+            self._skills.append(skills)
+            self._text_features.append(text_features)
+            self._active[position] = True
+            self._experience[position] = experience_years
+            self._education[position] = education
+            self._location[position] = self._location_code(location)
+            self._customer[position] = self._customer_codes.setdefault(key[0], len(self._customer_codes))
+            self._document_frequency[text_features] += 1
+            self._active_count += 1
+            self._pending.append((features[order], values[order]))
+            if len(self._pending) >= SEGMENT_ROWS:
+                self._flush_locked()
+
+    def add_analysis(self, candidate_id: str, text: str, result: Dict, ruleset, customer: Optional[str] = None):
+        """analyze_text / analyze_batch sonucundan (veya depodaki aşamalardan) adayı ekler"""
+        level = result['education_info']['level'].lower()
+        location = (result.get('document') or {}).get('location') or result['salary_prediction'].get('location')
+        terms = None
+        stored = result.get('features')
+        if stored and stored.get('version') == FEATURES_VERSION and self.max_terms == DEFAULT_MAX_TERMS:
+            terms = (np.array(stored['terms'], dtype=np.int32), np.array(stored['weights'], dtype=np.float32))
+        self.add(candidate_id, text, result['skills_found'], result['experience_years'],
+                 ruleset.education_levels.get(level, 0), location, terms, customer)
+
+    def sync(self, store, rulesets) -> int:
+        """Depoda (candidate_store) son eşitlemeden sonra eklenen, güncellenen
+        ve silinen adayları uygular; worker'lar aynı depodan beslenir. Yalnızca
+        sıralamaya eklenmiş (indexed) adaylar indekse girer."""
+        from ruleset import UnknownRulesetError
+        applied = 0
+        with self._sync_lock:
+            while True:
+                changes = store.changed_since(self._synced_seq)
+                if not changes:
+                    return applied
+                for change in changes:
+                    result = change['result']
+                    if change['deleted'] or not change['indexed'] or \
+                            'skills_found' not in result or 'salary_prediction' not in result:
+                        self.remove(change['candidate_id'], change['customer'])
+                    else:
+                        try:
+                            ruleset = rulesets.get(change['customer'])
+                        except UnknownRulesetError:
+                            ruleset = rulesets.get()
+                        self.add_analysis(change['candidate_id'], change['text'], result, ruleset,
+                                          change['customer'])
+                    self._synced_seq = change['seq']
+                applied += len(changes)
+
+    def set_posting(self, posting_id: str, posting: JobPosting):
+        with self._lock:
+            self.postings.pop(posting_id, None)
+            self.postings[posting_id] = posting
+            while len(self.postings) > MAX_POSTINGS:
+                del self.postings[next(iter(self.postings))]
+
+    def posting(self, posting_id: str, store=None, rulesets=None) -> Optional[JobPosting]:
+        """Kaydedilmiş ilan. Depo verilirse ilan depodan okunur; bu süreçte yoksa
+        veya başka bir worker güncellediyse kayıtlı sorgudan yeniden kurulur"""
+        posting = self.postings.get(posting_id)
+        if store is None:
+            return posting
+        saved = store.get_posting(posting_id)
+        if saved is None:
+            return None
+        if posting is not None and posting.saved_at == saved['updated_at']:
+            return posting
+
+        from ruleset import UnknownRulesetError
+        query = saved['query']
+        try:
+            ruleset = rulesets.get(query.get('customer'))
+        except UnknownRulesetError:
+            ruleset = rulesets.get()
+        posting = JobPosting(query['description'], ruleset, min_experience=query.get('min_experience'),
+                             education=query.get('education'), location=query.get('location'),
+                             customer=query.get('customer'))
+        posting.saved_at = saved['updated_at']
+        self.set_posting(posting_id, posting)
+        return posting
+
+    def remove(self, candidate_id: str, customer: Optional[str] = None) -> bool:
+        with self._lock:
+            return self._remove_locked((customer or '', candidate_id))
+
+    def rank(self, posting: JobPosting, top_k: int = 10, weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """İlanın müşterisine ait adaylardan ilana en uygun top_k adayı skor sırasıyla döndürür"""
+        with self._lock:
+            self._flush_locked()
+            segments = self._segments
+            count = len(self._keys)
+            active = self._active[:count]
+            customer = self._customer[:count]
+            customer_code = self._customer_codes.get(posting.customer)
+            experience = self._experience[:count]
+            education = self._education[:count]
+            location = self._location[:count]
+            query = self._query_vector(posting, count, weights)
+            location_code = self._location_codes.get(posting.location.lower()) if posting.location else None
+            keys, skills = self._keys, self._skills
+        if not self._active_count or query is None or customer_code is None:
+            return []
+        vector, weights = query
+
+        # Metin ve yetenek benzerliği: ilandaki özelliklerin aday listeleri üzerinde tek çarpım
+        relevance = np.zeros(count, dtype=np.float32)
+        for start, segment in segments:
+            product = vector @ segment
+            relevance[start + product.indices] = product.data
+        scores = relevance.copy()
+
+        experience_fit = education_fit = location_fit = None
+        if weights['experience']:
+            experience_fit = np.minimum(experience / posting.min_experience, 1)
+            scores += weights['experience'] * experience_fit
+        if weights['education']:
+            education_fit = np.minimum(education / posting.education, 1)
+            scores += weights['education'] * education_fit
+        if weights['location']:
+            # İndekste hiç geçmeyen lokasyon hiçbir adayla eşleşmez
+            location_fit = (location == location_code).astype(np.float32) if location_code is not None \
+                else np.zeros(count, dtype=np.float32)
+            scores += weights['location'] * location_fit
+        scores[~active | (customer != customer_code)] = -np.inf
+
+        k = min(top_k, self._active_count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Skora göre azalan; eşitlikte önce eklenen aday
+        top = top[np.lexsort((top, -scores[top]))]
+
+        results = []
+        for position in top:
+            if not np.isfinite(scores[position]):
+                break
+            components = {'relevance': round(float(relevance[position]), 4)}
+            for name, values in (('experience', experience_fit), ('education', education_fit),
+                                 ('location', location_fit)):
+                if values is not None:
+                    components[name] = round(float(values[position]), 4)
+            results.append({
+                'candidate_id': keys[position][1],
+                'score': round(float(scores[position]), 4),
+                'components': components,
+                'matched_skills': [skill for skill in skills[position] if skill in posting.skills],
+                'experience_years': round(float(experience[position]), 1)
+            })
+        return results
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'candidates': self._active_count,
+                'rows': len(self._keys),
+                'segments': [segment.shape[1] for _, segment in self._segments],
+                'pending': len(self._pending),
+                'nnz': sum(segment.nnz for _, segment in self._segments),
+                'postings': len(self.postings)
+            }
+
+    def _query_vector(self, posting: JobPosting, count: int,
+                      weights: Optional[Dict[str, float]]) -> Optional[Tuple['sp.csr_matrix', Dict[str, float]]]:
+        weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        if not posting.skills:
+            weights['skills'] = 0
+        if posting.min_experience <= 0:
+            weights['experience'] = 0
+        if posting.education <= 0:
+            weights['education'] = 0
+        if not posting.location:
+            weights['location'] = 0
+
+        # İlan kelimeleri: 1 + log(tf) x idf; en ayırt edici QUERY_TERMS kelime
+        features = np.fromiter(posting.terms.keys(), dtype=np.int32, count=len(posting.terms))
+        idf = np.log((1 + self._active_count) / (1 + self._document_frequency[features])) + 1
+        text_weights = (1 + np.log(np.fromiter(posting.terms.values(), dtype=np.float64,
+                                               count=len(posting.terms)))) * idf
+        known = self._document_frequency[features] > 0
+        features, text_weights = features[known], text_weights[known]
+        keep = np.argsort(-text_weights, kind='stable')[:QUERY_TERMS]
+        features, text_weights = features[keep], text_weights[keep]
+        norm = float(np.sqrt(np.dot(text_weights, text_weights)))
+        if not norm:
+            weights['text'] = 0
+
+        total = sum(value for value in weights.values() if value > 0)
+        if total <= 0:
+            return None
+        weights = {name: max(value, 0) / total for name, value in weights.items()}
+
+        # Yetenek kısmı: ilandaki yeteneklerin adayda bulunan oranı
+        skill_features = np.unique(np.array([_skill_feature(skill) for skill in posting.skills], dtype=np.int32))
+        columns = np.concatenate([features, skill_features])
+        values = np.concatenate([
+            text_weights / norm * weights['text'] if norm else np.zeros(0),
+            np.full(len(skill_features), weights['skills'] / max(len(posting.skills), 1))
+        ]).astype(np.float32)
+        import scipy.sparse as sp
+        vector = sp.csr_matrix((values, columns, [0, len(columns)]), shape=(1, TEXT_FEATURES + SKILL_FEATURES))
+        return vector, weights
+
+    def _location_code(self, location: Optional[str]) -> int:
+        if not location:
+            return -1
+        return self._location_codes.setdefault(location.lower(), len(self._location_codes))
+
+    def _remove_locked(self, key: Tuple[str, str]) -> bool:
+        position = self._positions.pop(key, None)
+        if position is None:
+            return False
+        self._active[position] = False
+        self._document_frequency[self._text_features[position]] -= 1
+        self._active_count -= 1
+        return True
+
+    def _ensure_capacity(self, size: int):
+        if size <= len(self._active):
+            return
+        capacity = max(size, 2 * len(self._active), 1024)
+        # Yeni diziler ayrılır; sorgudaki görünümler eski dizileri okumaya devam eder
+        for name in ('_active', '_experience', '_education', '_location', '_customer'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _flush_locked(self):
+        import scipy.sparse as sp
+        if self._pending:
+            self._flush_pending_locked(sp)
+        # Silinen ve güncellenen adayların eski satırları etkin satırları geçince geri kazanılır
+        dead = len(self._keys) - self._active_count
+        if dead >= SEGMENT_ROWS and dead > self._active_count:
+            self._compact_locked(sp)
+
+    def _flush_pending_locked(self, sp):
+        start = len(self._keys) - len(self._pending)
+        lengths = [len(features) for features, _ in self._pending]
+        rows = sp.csr_matrix(
+            (np.concatenate([values for _, values in self._pending]),
+             np.concatenate([features for features, _ in self._pending]),
+             np.concatenate([[0], np.cumsum(lengths)])),
+            shape=(len(self._pending), TEXT_FEATURES + SKILL_FEATURES))
+        self._pending = []
+
+        segments = self._segments + [(start, rows.T.tocsr())]
+        # Son iki segment benzer boyuttaysa birleştir (ikili sayaç gibi)
+        while len(segments) > 1 and segments[-2][1].shape[1] <= 2 * segments[-1][1].shape[1]:
+            (first_start, first), (_, second) = segments[-2], segments[-1]
+            segments[-2:] = [(first_start, sp.hstack([first, second], format='csr'))]
+        # Sorgular eski listeyi okuyor olabilir; liste yerinde değiştirilmez
+        self._segments = segments
+
+    def _compact_locked(self, sp):
+        """Yalnızca etkin satırları tutan yeni diziler ve tek segment kurar; sorgudaki
+        görünümler eski dizileri ve segmentleri okumaya devam eder"""
+        keep = np.flatnonzero(self._active[:len(self._keys)])
+        matrix = sp.hstack([segment for _, segment in self._segments], format='csc')[:, keep].tocsr()
+        self._segments = [(0, matrix)] if len(keep) else []
+        self._keys = [self._keys[position] for position in keep]
+        self._skills = [self._skills[position] for position in keep]
+        self._text_features = [self._text_features[position] for position in keep]
+        self._positions = {key: position for position, key in enumerate(self._keys)}
+        capacity = max(2 * len(keep), 1024)
+        for name in ('_active', '_experience', '_education', '_location', '_customer'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(keep)] = old[keep]
+            setattr(self, name, new)
+
+
+def index_from_env() -> CandidateIndex:
+    """Ortam değişkenlerinden aday indeksi oluşturur (CV_INDEX_MAX_TERMS)"""
+    return CandidateIndex(DEFAULT_MAX_TERMS)
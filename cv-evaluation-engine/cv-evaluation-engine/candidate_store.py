@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Analiz edilen CV'lerin kalıcı deposu (SQLite).
+
+Her aday için çıkarılmış metin ve çıkarma bilgisi bir kez saklanır; analiz
+sonucu aşamalara bölünür (aday indeksi özellikleri, puanlama, maaş tahmini) ve her aşama onu üreten
+kural seti/model sürümüyle etiketlenir. Kurallar veya model değiştiğinde
+yeniden puanlama yalnızca sürümü eskiyen aşamaları saklanan metinden yeniden
+hesaplar: PDF'ler yeniden okunmaz, yeniden eğitimden sonra yalnızca maaş
+tahmini çalışır.
+
+    python candidate_store.py --db data/candidates.db --rescore
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# features: aday indeksinin metin özellikleri (bkz. candidate_index.term_features)
+STAGES = ('features', 'scoring', 'salary')
+RESCORE_BATCH_SIZE = 200
+# PRAGMA user_version; 2: adaylar (müşteri, kimlik) ile anahtarlanır,
+# 3: yalnızca POST /api/candidates ile eklenen adaylar (indexed) sıralanır
+SCHEMA_VERSION = 3
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Gunicorn worker'ları aynı adayları ve ilanları görsün diye depo varsayılan
+# olarak açıktır; CV_STORE_DB=memory süreç içi indeksi seçer (yalnızca tek
+# süreçli kurulumlar)
+DEFAULT_STORE_DB = os.environ.get('CV_STORE_DB', os.path.join(BASE_DIR, 'data', 'candidates.db'))
+
+
+def content_id(text: str) -> str:
+    """Kimlik verilmeyen adaylar için metinden türetilen kimlik (müşteri içinde tekil)"""
+    return hashlib.sha256(text.strip().replace('\r\n', '\n').encode('utf-8')).hexdigest()[:24]
+
+
+class CandidateStore:
+    """Adaylar ve aşama sonuçları; gunicorn worker'ları ve yeniden puanlama
+    süreci aynı dosyayı paylaşır. Adaylar müşteri başınadır: aynı kimlik (veya
+    aynı metin) farklı müşterilerde ayrı kayıtlardır."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            version, = conn.execute('PRAGMA user_version').fetchone()
+            if version < 2 and conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'candidates'").fetchone():
+                self._migrate_v1(conn)
+            self._create_schema(conn)
+            if version == 2:
+                self._migrate_v2(conn)
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS candidates (
+                customer TEXT NOT NULL DEFAULT '',
+                id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                text TEXT NOT NULL,
+                filename TEXT,
+                extraction TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                seq INTEGER NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0,
+                indexed INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (customer, id)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS stage_results (
+                customer TEXT NOT NULL DEFAULT '',
+                candidate_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                version TEXT NOT NULL,
+                value TEXT NOT NULL,
+                computed_at REAL NOT NULL,
+                PRIMARY KEY (customer, candidate_id, stage)
+            )
+        ''')
+        # Sıralama için kaydedilen ilanlar; her worker ilanı buradan yeniden kurar
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS postings (
+                id TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        # seq: her değişiklikte artan sayaç; aday indeksi bu sırayla eşitlenir
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_candidates_seq ON candidates(seq)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_candidates_customer ON candidates(customer, deleted)')
+
+    @staticmethod
+    def _migrate_v1(conn: sqlite3.Connection):
+        """Yalnızca kimlikle anahtarlanan (1. sürüm) tabloları müşteri anahtarlı tablolara taşır"""
+        conn.execute('DROP INDEX IF EXISTS idx_candidates_seq')
+        conn.execute('DROP INDEX IF EXISTS idx_candidates_customer')
+        conn.execute('ALTER TABLE candidates RENAME TO candidates_v1')
+        conn.execute('ALTER TABLE stage_results RENAME TO stage_results_v1')
+        CandidateStore._create_schema(conn)
+        conn.execute('''
+            INSERT INTO candidates (customer, id, content_hash, text, filename, extraction,
+                                    created_at, updated_at, seq, deleted)
+            SELECT customer, id, content_hash, text, filename, extraction, created_at, updated_at, seq, deleted
+            FROM candidates_v1
+        ''')
+        conn.execute('''
+            INSERT INTO stage_results (customer, candidate_id, stage, version, value, computed_at)
+            SELECT c.customer, s.candidate_id, s.stage, s.version, s.value, s.computed_at
+            FROM stage_results_v1 s JOIN candidates_v1 c ON c.id = s.candidate_id
+        ''')
+        conn.execute('DROP TABLE candidates_v1')
+        conn.execute('DROP TABLE stage_results_v1')
+        logger.info("Aday deposu müşteri anahtarlı şemaya taşındı")
+
+    @staticmethod
+    def _migrate_v2(conn: sqlite3.Connection):
+        """indexed sütununu ekler; eski kayıtlarda analiz ile aday eklemesi ayırt
+        edilemediği için hiçbiri sıralanmaz, adaylar POST /api/candidates ile yeniden eklenir"""
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(candidates)')]
+        if 'indexed' not in columns:
+            conn.execute('ALTER TABLE candidates ADD COLUMN indexed INTEGER NOT NULL DEFAULT 0')
+            logger.warning("Aday deposuna indexed sütunu eklendi; sıralanacak adayları "
+                           "POST /api/candidates ile yeniden ekleyin")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def put(self, candidate_id: str, text: str, stages: Dict[str, Dict], versions: Dict[str, str],
+            filename: Optional[str] = None, customer: Optional[str] = None,
+            extraction: Optional[Dict] = None, indexed: bool = False):
+        """Adayı ve aşama sonuçlarını yazar (müşterinin aynı kimlikli adayı varsa günceller).
+        indexed: aday sıralamaya eklenir; sonraki analizler bu işareti kaldırmaz."""
+        now = time.time()
+        customer = customer or ''
+        content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            seq = self._next_seq(conn)
+            conn.execute('''
+                INSERT INTO candidates (customer, id, content_hash, text, filename, extraction,
+                                        created_at, updated_at, seq, deleted, indexed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
+                ON CONFLICT(customer, id) DO UPDATE SET
+                    content_hash = excluded.content_hash, text = excluded.text,
+                    filename = COALESCE(excluded.filename, candidates.filename),
+                    extraction = COALESCE(excluded.extraction, candidates.extraction),
+                    updated_at = excluded.updated_at, seq = excluded.seq, deleted = 0,
+                    indexed = MAX(candidates.indexed, excluded.indexed)
+            ''', (customer, candidate_id, content_hash, text, filename,
+                  json.dumps(extraction, ensure_ascii=False) if extraction is not None else None,
+                  now, now, seq, int(indexed)))
+            for stage, value in stages.items():
+                self._set_stage(conn, customer, candidate_id, stage, versions[stage], value, now)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def is_current(self, candidate_id: str, customer: Optional[str], text: str, versions: Dict[str, str],
+                   filename: Optional[str] = None, indexed: bool = False) -> bool:
+        """Aday aynı metin, dosya adı ve aşama sürümleriyle (indexed verilirse
+        sıralamaya eklenmiş olarak) zaten kayıtlı mı (yazma gereksiz)"""
+        customer = customer or ''
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT content_hash, filename, indexed FROM candidates WHERE customer = ? AND id = ? AND deleted = 0',
+            (customer, candidate_id)).fetchone()
+        if row is None or row[0] != hashlib.sha256(text.encode('utf-8')).hexdigest():
+            return False
+        if (filename is not None and row[1] != filename) or (indexed and not row[2]):
+            return False
+        stored = dict(conn.execute(
+            'SELECT stage, version FROM stage_results WHERE customer = ? AND candidate_id = ?',
+            (customer, candidate_id)))
+        return all(stored.get(stage) == version for stage, version in versions.items())
+
+    def get(self, candidate_id: str, customer: Optional[str] = None) -> Optional[Dict]:
+        """Müşterinin adayının birleştirilmiş sonucu ve aşama sürümleri"""
+        customer = customer or ''
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT id, filename, customer, created_at, updated_at FROM candidates '
+            'WHERE customer = ? AND id = ? AND deleted = 0', (customer, candidate_id)).fetchone()
+        if row is None:
+            return None
+        candidate = {'candidate_id': row[0], 'filename': row[1], 'customer': row[2] or None,
+                     'created_at': row[3], 'updated_at': row[4], 'versions': {}, 'result': {}}
+        for stage, version, value in conn.execute(
+                'SELECT stage, version, value FROM stage_results WHERE customer = ? AND candidate_id = ?',
+                (customer, candidate_id)):
+            candidate['versions'][stage] = version
+            candidate['result'].update(json.loads(value))
+        return candidate
+
+    def delete(self, candidate_id: str, customer: Optional[str] = None) -> bool:
+        """Adayı siler; satır, indekslerin silmeyi görmesi için işaretli kalır ve metni boşaltılır"""
+        customer = customer or ''
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute(
+                "UPDATE candidates SET deleted = 1, indexed = 0, text = '', extraction = NULL, updated_at = ?, seq = ? "
+                "WHERE customer = ? AND id = ? AND deleted = 0",
+                (time.time(), self._next_seq(conn), customer, candidate_id))
+            conn.execute('DELETE FROM stage_results WHERE customer = ? AND candidate_id = ?',
+                         (customer, candidate_id))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return cursor.rowcount > 0
+
+    def customers(self) -> List[str]:
+        return [row[0] for row in self._connection().execute(
+            'SELECT DISTINCT customer FROM candidates WHERE deleted = 0')]
+
+    def stale(self, customer: str, versions: Dict[str, str]) -> Dict[str, List[str]]:
+        """Aşama -> sürümü güncel olmayan (veya hiç hesaplanmamış) aday kimlikleri"""
+        conn = self._connection()
+        return {stage: [row[0] for row in conn.execute('''
+                    SELECT c.id FROM candidates c
+                    LEFT JOIN stage_results s
+                        ON s.customer = c.customer AND s.candidate_id = c.id AND s.stage = ?
+                    WHERE c.customer = ? AND c.deleted = 0 AND (s.version IS NULL OR s.version != ?)
+                    ORDER BY c.seq
+                ''', (stage, customer, versions[stage]))]
+                for stage in STAGES}
+
+    def texts(self, customer: str, candidate_ids: Iterable[str]) -> Dict[str, str]:
+        candidate_ids = list(candidate_ids)
+        placeholders = ','.join('?' * len(candidate_ids))
+        return dict(self._connection().execute(
+            f'SELECT id, text FROM candidates WHERE customer = ? AND id IN ({placeholders})',
+            [customer or ''] + candidate_ids))
+
+    def update_stages(self, customer: str, updates: Dict[str, Dict[str, Dict]], versions: Dict[str, str]):
+        """Müşterinin kimlik -> {aşama: değer} şeklindeki yeniden hesaplanmış aşamalarını yazar"""
+        customer = customer or ''
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for candidate_id, stages in updates.items():
+                for stage, value in stages.items():
+                    self._set_stage(conn, customer, candidate_id, stage, versions[stage], value, now)
+                conn.execute('UPDATE candidates SET updated_at = ?, seq = ? WHERE customer = ? AND id = ?',
+                             (now, self._next_seq(conn), customer, candidate_id))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def changed_since(self, seq: int, limit: int = 1000) -> List[Dict]:
+        """seq'ten sonra eklenen, güncellenen veya silinen adaylar (seq sırasıyla);
+        sıralamaya eklenmemiş adayların metni ve aşamaları okunmaz"""
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT id, seq, deleted, indexed, customer, CASE WHEN indexed THEN text ELSE '' END "
+            'FROM candidates WHERE seq > ? ORDER BY seq LIMIT ?',
+            (seq, limit)).fetchall()
+        changes = []
+        for candidate_id, row_seq, deleted, indexed, customer, text in rows:
+            change = {'candidate_id': candidate_id, 'seq': row_seq, 'deleted': bool(deleted),
+                      'indexed': bool(indexed), 'customer': customer or None, 'text': text, 'result': {}}
+            if indexed and not deleted:
+                for (value,) in conn.execute(
+                        'SELECT value FROM stage_results WHERE customer = ? AND candidate_id = ?',
+                        (customer, candidate_id)):
+                    change['result'].update(json.loads(value))
+            changes.append(change)
+        return changes
+
+    def put_posting(self, posting_id: str, query: Dict) -> float:
+        """İlan sorgusunu (açıklama ve parametreler) yazar; kayıt zamanını döndürür"""
+        now = time.time()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO postings (id, query, updated_at) VALUES (?, ?, ?)',
+            (posting_id, json.dumps(query, ensure_ascii=False), now))
+        return now
+
+    def get_posting(self, posting_id: str) -> Optional[Dict]:
+        """Kayıtlı ilan sorgusu ve kayıt zamanı ('query', 'updated_at') veya None"""
+        row = self._connection().execute(
+            'SELECT query, updated_at FROM postings WHERE id = ?', (posting_id,)).fetchone()
+        return {'query': json.loads(row[0]), 'updated_at': row[1]} if row else None
+
+    def stats(self) -> Dict:
+        conn = self._connection()
+        candidates, indexed = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(indexed), 0) FROM candidates WHERE deleted = 0').fetchone()
+        versions = {stage: count for stage, count in conn.execute(
+            'SELECT stage, COUNT(DISTINCT version) FROM stage_results GROUP BY stage')}
+        return {'candidates': candidates, 'indexed': indexed, 'db_path': self.db_path, 'versions_per_stage': versions}
+
+    @staticmethod
+    def _next_seq(conn: sqlite3.Connection) -> int:
+        return conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM candidates').fetchone()[0]
+
+    @staticmethod
+    def _set_stage(conn: sqlite3.Connection, customer: str, candidate_id: str, stage: str, version: str,
+                   value: Dict, now: float):
+        conn.execute(
+            'INSERT OR REPLACE INTO stage_results (customer, candidate_id, stage, version, value, computed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (customer, candidate_id, stage, version, json.dumps(value, ensure_ascii=False), now))
+
+
+def rescore_candidates(store: CandidateStore, model_manager=None,
+                       batch_size: int = RESCORE_BATCH_SIZE) -> Dict[str, int]:
+    """Sürümü eskiyen aşamaları saklanan metinden yeniden hesaplar. Metin
+    çıkarma hiç tekrarlanmaz; yalnızca model değiştiyse sadece maaş tahmini
+    çalışır. Aşama başına yeniden hesaplanan aday sayısını döndürür."""
+    from analysis import AnalysisContext, stage_versions, score_context, feature_stage
+    from utils import ModelManager
+    from metrics import get_metrics
+    model_manager = model_manager or ModelManager()
+
+    counts = dict.fromkeys(STAGES, 0)
+    for customer in store.customers():
+        ruleset = model_manager.rulesets.get(customer or None)
+        versions = stage_versions(model_manager, ruleset)
+        stale = store.stale(customer, versions)
+        needs = {stage: set(ids) for stage, ids in stale.items()}
+        ordered = list(dict.fromkeys(stale['features'] + stale['scoring'] + stale['salary']))
+
+        for start in range(0, len(ordered), batch_size):
+            batch = ordered[start:start + batch_size]
+            texts = store.texts(customer, batch)
+            batch = [candidate_id for candidate_id in batch if candidate_id in texts]
+            updates: Dict[str, Dict[str, Dict]] = {candidate_id: {} for candidate_id in batch}
+            for candidate_id in batch:
+                if candidate_id in needs['features']:
+                    updates[candidate_id]['features'] = feature_stage(texts[candidate_id])
+
+            # Belge yapısı yalnızca puanlama veya maaş aşaması eskiyse yeniden ayrıştırılır
+            parse_ids = [candidate_id for candidate_id in batch
+                         if candidate_id in needs['scoring'] or candidate_id in needs['salary']]
+            with get_metrics().timer('cv_stage_seconds', stage='parse'):
+                contexts = {candidate_id: AnalysisContext(texts[candidate_id], ruleset) for candidate_id in parse_ids}
+            for candidate_id in parse_ids:
+                if candidate_id in needs['scoring']:
+                    updates[candidate_id]['scoring'] = score_context(contexts[candidate_id], model_manager)
+            salary_ids = [candidate_id for candidate_id in batch if candidate_id in needs['salary']]
+            if salary_ids:
+                predictions = model_manager.salary_predictor.predict_salary_batch(
+                    [contexts[candidate_id] for candidate_id in salary_ids])
+                for candidate_id, prediction in zip(salary_ids, predictions):
+                    updates[candidate_id]['salary'] = {'salary_prediction': prediction}
+
+            store.update_stages(customer, updates, versions)
+            for stage in STAGES:
+                counts[stage] += sum(1 for candidate_id in batch if stage in updates[candidate_id])
+        if ordered:
+            logger.info(f"Yeniden puanlandı ({customer or 'varsayılan'}): özellikler {len(stale['features'])}, "
+                        f"puanlama {len(stale['scoring'])}, maaş {len(stale['salary'])}")
+    return counts
+
+
+def store_from_env() -> Optional[CandidateStore]:
+    """Aday deposu (CV_STORE_DB, varsayılan data/candidates.db); CV_STORE_DB=memory
+    ise None: sonuçlar saklanmaz ve aday indeksi süreç içidir"""
+    if DEFAULT_STORE_DB == 'memory':
+        logger.warning("CV_STORE_DB=memory: aday indeksi ve ilanlar süreç içidir; tek worker ile çalıştırın")
+        return None
+    return CandidateStore(DEFAULT_STORE_DB)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Kayıtlı adayları değişen kural/model sürümüyle yeniden puanlar')
+    parser.add_argument('--db', default=DEFAULT_STORE_DB, help='SQLite aday deposu (varsayılan: CV_STORE_DB)')
+    parser.add_argument('--rescore', action='store_true', help='Eskiyen aşamaları yeniden hesaplar')
+    parser.add_argument('--batch-size', type=int, default=RESCORE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    if args.db == 'memory':
+        parser.error('Bellek içi depo yeniden puanlanamaz; --db ile SQLite dosyası verin')
+
+    logging.basicConfig(level=logging.INFO)
+    store = CandidateStore(args.db)
+    if args.rescore:
+        start = time.perf_counter()
+        counts = rescore_candidates(store, batch_size=args.batch_size)
+        print(json.dumps({'rescored': counts, 'seconds': round(time.perf_counter() - start, 2)}))
+    print(json.dumps(store.stats(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
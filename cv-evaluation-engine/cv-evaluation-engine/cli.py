@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Komut satırı araçları.
+
+    python cli.py bulk <klasör|arşiv.zip|arşiv.tar.gz> -o sonuclar.jsonl [--resume]
+"""
+
+import os
+import sys
+import json
+import time
+import tarfile
+import zipfile
+import logging
+import argparse
+import multiprocessing
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.docx')
+STAGES = ('read', 'extract', 'analyze')
+
+# Parquet çıktısında iç içe alanlar JSON metni olarak saklanır
+PARQUET_SCALAR_FIELDS = ('source', 'status', 'error', 'total_score', 'experience_years')
+PARQUET_JSON_FIELDS = ('scores', 'skills_found', 'education_info', 'salary_prediction', 'extraction',
+                       'near_duplicate')
+
+# Worker süreci başına bir kez oluşturulur (bkz. _init_worker)
+_worker_model_manager = None
+
+
+def iter_sources(path: str, max_file_size: int) -> Iterator[Tuple[str, str, object]]:
+    """Klasör, zip veya tar içindeki CV'leri tembel olarak dolaşır.
+
+    (kaynak_kimliği, tür, referans) döndürür: 'file' için dosya yolu, 'zip' için
+    (arşiv, üye adı), 'bytes' için dosya içeriği (tar sırayla okunmak zorunda)."""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                if _is_supported(name) and os.path.getsize(file_path) <= max_file_size:
+                    yield os.path.relpath(file_path, path), 'file', file_path
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and _is_supported(info.filename) and info.file_size <= max_file_size:
+                    yield info.filename, 'zip', (path, info.filename)
+    elif tarfile.is_tarfile(path):
+        # 'r|*' akış modu: arşiv baştan sona bir kez okunur, belleğe alınmaz
+        with tarfile.open(path, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and _is_supported(member.name) and member.size <= max_file_size:
+                    yield member.name, 'bytes', archive.extractfile(member).read()
+    else:
+        raise ValueError(f"Desteklenmeyen girdi (klasör, zip veya tar olmalı): {path}")
+
+
+def _is_supported(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+def _init_worker():
+    """Pool başlatıcısı: modeller her worker sürecinde bir kez yüklenir"""
+    global _worker_model_manager
+    # Paralellik dosya düzeyinde; daemon worker'lar PDF süreç havuzu açamaz
+    os.environ['CV_PDF_WORKERS'] = '1'
+    from utils import ModelManager
+    _worker_model_manager = ModelManager()
+    _worker_model_manager.preload()
+
+
+def _read_source(kind: str, ref) -> bytes:
+    if kind == 'file':
+        with open(ref, 'rb') as file:
+            return file.read()
+    if kind == 'zip':
+        archive_path, member = ref
+        with zipfile.ZipFile(archive_path) as archive:
+            return archive.read(member)
+    return ref
+
+
+def process_chunk(items: List[Tuple[str, str, object]], include_text: bool = False,
+                  customer: Optional[str] = None, signatures: bool = False) -> List[Dict]:
+    """Bir grup dosyayı işler; maaş tahmini grup için tek model çağrısıyla yapılır.
+    Her kayıt aşama sürelerini '_timings' altında, signatures verilirse yakın
+    kopya imzasını '_signature' altında taşır."""
+    from analysis import analyze_batch
+    model_manager = _worker_model_manager
+    if model_manager is None:
+        _init_worker()
+        model_manager = _worker_model_manager
+
+    records, texts, text_records = [], [], []
+    for source, kind, ref in items:
+        record = {'source': source, 'status': 'ok', '_timings': dict.fromkeys(STAGES, 0.0)}
+        records.append(record)
+        try:
+            start = time.perf_counter()
+            data = _read_source(kind, ref)
+            record['_timings']['read'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            text, extraction = model_manager.cv_processor.extract_with_metadata(data, source)
+            record['_timings']['extract'] = time.perf_counter() - start
+            record['extraction'] = extraction
+            if not text.strip():
+                raise ValueError("Dosyadan metin çıkarılamadı")
+        except Exception as e:
+            record.update({'status': 'error', 'error': str(e)})
+            continue
+
+        if include_text:
+            record['extracted_text'] = text
+        texts.append(text)
+        text_records.append(record)
+
+    if texts:
+        start = time.perf_counter()
+        if signatures:
+            from near_duplicates import signature
+            for record, text in zip(text_records, texts):
+                record['_signature'] = signature(text)
+        try:
+            # Yakın kopyalar ana süreçte tüm girdiye karşı aranır (bkz. run_bulk)
+            results = analyze_batch(texts, model_manager, customer=customer, near_duplicates=False)
+        except Exception as e:
+            results = [{'status': 'error', 'error': str(e)}] * len(texts)
+        # Parti süresi belgelere eşit paylaştırılır
+        elapsed = (time.perf_counter() - start) / len(texts)
+        for record, result in zip(text_records, results):
+            record.update(result)
+            record['_timings']['analyze'] = elapsed
+
+    return records
+
+
+class JSONLWriter:
+    """Sonuçları satır satır ekler; --resume ile mevcut dosyanın sonuna yazar"""
+
+    def __init__(self, path: str, append: bool):
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, records: List[Dict]) -> List[str]:
+        """Kayıtları yazar; diske aktarılan kaynak kimliklerini döndürür"""
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+        return [record['source'] for record in records]
+
+    def close(self) -> List[str]:
+        self.file.close()
+        return []
+
+
+class ParquetWriter:
+    """Sonuçları bir klasöre parça dosyaları halinde yazar. Her parça kendi başına
+    geçerli bir Parquet dosyasıdır; yarıda kesilen çalıştırma bozuk dosya bırakmaz.
+    pyarrow gerektirir."""
+
+    def __init__(self, path: str, append: bool, rows_per_file: int = 5000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet çıktısı için pyarrow kurulu olmalı (pip install pyarrow)")
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.rows_per_file = rows_per_file
+
+        os.makedirs(path, exist_ok=True)
+        existing = sorted(name for name in os.listdir(path) if name.startswith('part-'))
+        if not append:
+            for name in existing:
+                os.remove(os.path.join(path, name))
+            existing = []
+        self.part_index = len(existing)
+
+        self.schema = pa.schema(
+            [('source', pa.string()), ('status', pa.string()), ('error', pa.string()),
+             ('total_score', pa.float64()), ('experience_years', pa.float64())] +
+            [(field, pa.string()) for field in PARQUET_JSON_FIELDS] +
+            [('extracted_text', pa.string())])
+        self.buffer: List[Dict] = []
+
+    def write(self, records: List[Dict]) -> List[str]:
+        """Kayıtları tamponlar; bir parça dosyası yazıldığında kimliklerini döndürür"""
+        for record in records:
+            row = {field: record.get(field) for field in PARQUET_SCALAR_FIELDS}
+            for field in PARQUET_JSON_FIELDS:
+                if field in record:
+                    row[field] = json.dumps(record[field], ensure_ascii=False)
+            row['extracted_text'] = record.get('extracted_text')
+            self.buffer.append(row)
+        if len(self.buffer) >= self.rows_per_file:
+            return self._flush()
+        return []
+
+    def _flush(self) -> List[str]:
+        if not self.buffer:
+            return []
+        part_path = os.path.join(self.path, f'part-{self.part_index:05d}.parquet')
+        table = self.pa.Table.from_pylist(self.buffer, schema=self.schema)
+        self.pq.write_table(table, part_path + '.tmp')
+        os.replace(part_path + '.tmp', part_path)
+
+        sources = [row['source'] for row in self.buffer]
+        self.part_index += 1
+        self.buffer = []
+        return sources
+
+    def close(self) -> List[str]:
+        return self._flush()
+
+
+class Checkpoint:
+    """Yazılmış kaynakların kaydı. Kimlikler sonuçlar diske yazıldıktan sonra
+    eklenir; yarıda kalan bir çalıştırmada yalnızca son grup tekrar işlenebilir."""
+
+    def __init__(self, path: str, resume: bool):
+        self.path = path
+        self.done: Set[str] = set()
+        if resume and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.done = {line.rstrip('\n') for line in file if line.strip()}
+        self.file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def add(self, sources: List[str]):
+        if not sources:
+            return
+        self.file.write(''.join(source + '\n' for source in sources))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+def _chunked(items: Iterator, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _flag_near_duplicate(record: Dict, text_signature, index):
+    """Kaydı önceden işlenen yakın kopyasıyla (kaynak kimliği) işaretler ve indekse ekler"""
+    match = index.query(text_signature, exclude=record['source'])
+    if match is not None:
+        record['near_duplicate'] = {'similarity': round(match[1], 3), 'source': match[0]}
+    index.add(record['source'], text_signature)
+
+
+def _process_chunk_task(args) -> List[Dict]:
+    return process_chunk(*args)
+
+
+def run_bulk(input_path: str, output_path: str, output_format: Optional[str] = None,
+             workers: int = None, chunk_size: int = 16, resume: bool = False,
+             include_text: bool = False, max_file_size: int = 16 * 1024 * 1024,
+             customer: Optional[str] = None, progress_every: int = 1000) -> Dict:
+    """Girdideki tüm CV'leri worker havuzunda puanlar ve sonuçları akış halinde yazar.
+    Çalıştırma özetini (belge/sn, aşama süreleri) döndürür."""
+    output_format = output_format or ('parquet' if output_path.endswith('.parquet') else 'jsonl')
+    workers = workers or os.cpu_count() or 1
+    if customer:
+        # Bilinmeyen müşteri adı worker'lar başlamadan hata verir
+        from ruleset import get_ruleset_registry
+        get_ruleset_registry().get(customer)
+
+    # İmzalar worker'larda hesaplanır; LSH indeksi tek ve ana süreçte olduğundan
+    # kopyalar parça/worker dağılımından bağımsız bulunur
+    from near_duplicates import index_from_env
+    near_duplicates = index_from_env()
+
+    checkpoint = Checkpoint(output_path.rstrip('/') + '.checkpoint', resume)
+    writer = (ParquetWriter if output_format == 'parquet' else JSONLWriter)(output_path, resume)
+
+    summary = {'processed': 0, 'ok': 0, 'errors': 0, 'skipped': 0}
+    stage_totals = dict.fromkeys(STAGES, 0.0)
+
+    def pending_items():
+        for item in iter_sources(input_path, max_file_size):
+            if item[0] in checkpoint.done:
+                summary['skipped'] += 1
+                continue
+            yield item
+
+    tasks = ((chunk, include_text, customer, near_duplicates is not None)
+             for chunk in _chunked(pending_items(), chunk_size))
+    start = time.perf_counter()
+    pool = multiprocessing.Pool(workers, initializer=_init_worker) if workers > 1 else None
+    try:
+        results = pool.imap_unordered(_process_chunk_task, tasks) if pool else map(_process_chunk_task, tasks)
+        next_report = progress_every
+        for records in results:
+            for record in records:
+                for stage, elapsed in record.pop('_timings').items():
+                    stage_totals[stage] += elapsed
+                text_signature = record.pop('_signature', None)
+                if text_signature is not None and record['status'] == 'ok':
+                    _flag_near_duplicate(record, text_signature, near_duplicates)
+                summary['ok' if record['status'] == 'ok' else 'errors'] += 1
+            checkpoint.add(writer.write(records))
+
+            summary['processed'] += len(records)
+            if summary['processed'] >= next_report:
+                elapsed = time.perf_counter() - start
+                logger.info(f"{summary['processed']} belge işlendi ({summary['processed'] / elapsed:.1f} belge/sn)")
+                next_report += progress_every
+    finally:
+        if pool:
+            pool.terminate() if sys.exc_info()[0] else pool.close()
+            pool.join()
+        checkpoint.add(writer.close())
+        checkpoint.close()
+
+    wall_seconds = time.perf_counter() - start
+    summary.update({
+        'wall_seconds': round(wall_seconds, 2),
+        'docs_per_second': round(summary['processed'] / wall_seconds, 2) if wall_seconds else 0.0,
+        'workers': workers,
+        # Aşama süreleri tüm worker'larda harcanan toplam süredir (CPU-saniye benzeri)
+        'stage_seconds': {stage: round(total, 2) for stage, total in stage_totals.items()},
+        'stage_ms_per_doc': {stage: round(total * 1000 / summary['processed'], 2) if summary['processed'] else 0.0
+                             for stage, total in stage_totals.items()}
+    })
+    return summary
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='cv-eval', description='CV Değerlendirme Motoru komut satırı araçları')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    bulk = subparsers.add_parser('bulk', help='Klasör veya arşivdeki CV\'leri toplu puanla')
+    bulk.add_argument('input', help='CV klasörü, .zip veya .tar(.gz) arşivi')
+    bulk.add_argument('-o', '--output', required=True, help='Çıktı dosyası (.jsonl) veya klasörü (.parquet)')
+    bulk.add_argument('--format', choices=('jsonl', 'parquet'), help='Çıktı formatı (varsayılan: uzantıdan)')
+    bulk.add_argument('--workers', type=int, default=None, help='Worker süreç sayısı (varsayılan: CPU sayısı)')
+    bulk.add_argument('--chunk-size', type=int, default=16, help='Worker\'a bir seferde gönderilen dosya sayısı')
+    bulk.add_argument('--resume', action='store_true', help='Kontrol noktasından devam et')
+    bulk.add_argument('--include-text', action='store_true', help='Çıkarılan metni de yaz')
+    bulk.add_argument('--max-file-size', type=int, default=16 * 1024 * 1024, help='Daha büyük dosyalar atlanır (byte)')
+    bulk.add_argument('--customer', help='Müşteriye özel kural seti (CV_RULESET_DIR/<ad>.json)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    from ruleset import UnknownRulesetError
+    try:
+        summary = run_bulk(args.input, args.output, args.format, args.workers, args.chunk_size,
+                           args.resume, args.include_text, args.max_file_size, args.customer)
+    except UnknownRulesetError as e:
+        parser.error(str(e))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Satır yapısını koruyan CV belge modeli: üst kısım (iletişim/lokasyon),
+bölümler (deneyim, eğitim, yetenekler...) ve tarih aralıklı iş kayıtları.
+
+Belge CV başına bir kez oluşturulur; puanlama ve maaş tahmini bölümleri metin
+üzerinde yeniden aramaz. to_dict/from_dict ile JSON'a çevrilebilir (sonuç
+önbelleği ve toplu çıktılar için). Konumlar metnin satır numaralarıdır."""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils import TextProcessor, WORD_PATTERN
+
+# Bölüm türü -> başlık satırları (büyük/küçük harf, noktalama ve 'ı/i' farkı gözetilmez)
+SECTION_HEADINGS = {
+    'experience': (
+        'experience', 'work experience', 'professional experience', 'employment',
+        'employment history', 'work history', 'career', 'career history',
+        'iş deneyimi', 'iş deneyimleri', 'deneyim', 'deneyimler', 'mesleki deneyim',
+        'profesyonel deneyim', 'çalışma geçmişi'
+    ),
+    'education': (
+        'education', 'academic background', 'eğitim', 'eğitim bilgileri', 'öğrenim',
+        'öğrenim durumu'
+    ),
+    'skills': (
+        'skills', 'technical skills', 'core skills', 'competencies', 'yetenekler', 'yetenek',
+        'beceriler', 'teknik beceriler', 'yetkinlikler'
+    ),
+    'summary': (
+        'summary', 'professional summary', 'profile', 'about me', 'objective', 'özet',
+        'profesyonel özet', 'profil', 'hakkımda', 'kariyer hedefi'
+    ),
+    'projects': ('projects', 'projeler'),
+    'certifications': ('certifications', 'certificates', 'sertifikalar'),
+    'languages': ('languages', 'diller', 'yabancı diller'),
+    'references': ('references', 'referanslar'),
+}
+
+# Bu uzunluktan uzun satırlar başlık sayılmaz
+HEADING_MAX_CHARS = 50
+# Başlık bulunamazsa üst kısım olarak kabul edilen satır sayısı
+HEADER_FALLBACK_LINES = 8
+# Tarih satırının üstünde unvan/şirket olarak alınan en fazla satır
+JOB_HEADER_LINES = 2
+
+
+def _heading_key(text: str) -> str:
+    # 'İ' -> 'i' ve 'ı' -> 'i': 'EĞİTİM', 'Eğitim' ve 'EGITIM' aynı anahtara düşer
+    return ' '.join(WORD_PATTERN.findall(text.replace('İ', 'i').lower().replace('ı', 'i')))
+
+
+_HEADING_KINDS = {_heading_key(heading): kind
+                  for kind, headings in SECTION_HEADINGS.items() for heading in headings}
+# PDF'lerde harf aralıklı başlıklar ('E D U C A T I O N') boşluksuz karşılaştırılır;
+# bu başlıklar bazen önceki satırın sonuna yapışık çıkar ('ModelsW O R K ...')
+_COMPACT_HEADING_KINDS = {key.replace(' ', ''): kind for key, kind in _HEADING_KINDS.items()}
+LETTER_SPACED_TAIL = re.compile(r'(?:\w ){3,}\w$')
+
+
+class Section:
+    """Bir CV bölümü; içerik satırları [start_line, end_line) aralığıdır.
+    'Skills: Python, SQL' gibi satır içi başlıklarda içerik başlık satırından başlar."""
+
+    def __init__(self, kind: str, heading: str, heading_line: int, start_line: int, end_line: int):
+        self.kind = kind
+        self.heading = heading
+        self.heading_line = heading_line
+        self.start_line = start_line
+        self.end_line = end_line
+
+    def to_dict(self) -> Dict:
+        return {'kind': self.kind, 'heading': self.heading, 'heading_line': self.heading_line,
+                'start_line': self.start_line, 'end_line': self.end_line}
+
+
+class JobEntry:
+    """Deneyim bölümündeki bir iş kaydı; bitiş yılı None ise iş devam ediyordur"""
+
+    def __init__(self, title: Optional[str], organization: Optional[str], start_year: int,
+                 end_year: Optional[int], start_line: int, end_line: int):
+        self.title = title
+        self.organization = organization
+        self.start_year = start_year
+        self.end_year = end_year
+        self.start_line = start_line
+        self.end_line = end_line
+
+    @property
+    def period(self) -> Tuple[int, Optional[int]]:
+        return self.start_year, self.end_year
+
+    def to_dict(self) -> Dict:
+        return {'title': self.title, 'organization': self.organization,
+                'start_year': self.start_year, 'end_year': self.end_year,
+                'start_line': self.start_line, 'end_line': self.end_line}
+
+
+class CVDocument:
+    """Ayrıştırılmış CV: metin, satırlar, üst kısım, bölümler ve iş kayıtları"""
+
+    def __init__(self, text: str, sections: List[Section], jobs: List[JobEntry],
+                 header_end: int, location: Optional[str] = None):
+        self.text = text
+        self.lines = text.split('\n')
+        self.sections = sections
+        self.jobs = jobs
+        # Üst kısım (ad, unvan, iletişim) ilk bölüm başlığından önceki satırlardır
+        self.header_end = header_end
+        # Üst kısımda geçen lokasyonun kanonik adı (ör. 'Istanbul'); yoksa None
+        self.location = location
+
+    @classmethod
+    def parse(cls, text: str, locations=None) -> 'CVDocument':
+        """Metni satır bazında bölümlere ve iş kayıtlarına ayırır (tek geçiş).
+        locations (GazetteerIndex) verilirse üst kısımdaki lokasyon da bulunur."""
+        lines = text.split('\n')
+
+        sections: List[Section] = []
+        for index, line in enumerate(lines):
+            heading = cls._match_heading(line)
+            if heading is None:
+                continue
+            kind, title, inline = heading
+            if sections:
+                sections[-1].end_line = index
+            sections.append(Section(kind, title, index, index if inline else index + 1, len(lines)))
+
+        header_end = sections[0].heading_line if sections else min(len(lines), HEADER_FALLBACK_LINES)
+
+        jobs: List[JobEntry] = []
+        for section in sections:
+            if section.kind == 'experience':
+                jobs.extend(cls._parse_jobs(lines, section))
+
+        document = cls(text, sections, jobs, header_end)
+        if locations is not None:
+            # En uzun (en spesifik) eşleşme kazanır
+            document.location = locations.longest(locations.find(document.header_text))
+        return document
+
+    @staticmethod
+    def _match_heading(line: str) -> Optional[Tuple[str, str, bool]]:
+        """(tür, başlık, satır_içi) ya da başlık değilse None"""
+        stripped = line.strip()
+        if not stripped:
+            return None
+
+        if len(stripped) <= HEADING_MAX_CHARS:
+            head, _, rest = stripped.partition(':')
+            kind = _HEADING_KINDS.get(_heading_key(head))
+            if kind is not None:
+                return kind, head.strip(), bool(rest.strip())
+
+        # Yalnızca satır sonu aranır; uzun satırlarda geri izleme sınırlı kalır
+        tail_start = max(0, len(stripped) - 2 * HEADING_MAX_CHARS)
+        tail = LETTER_SPACED_TAIL.search(stripped, tail_start)
+        if tail is None:
+            return None
+        kind = _COMPACT_HEADING_KINDS.get(_heading_key(tail.group()).replace(' ', ''))
+        if kind is None:
+            return None
+        # Başlık satırın sonundaysa satırın başı yeni bölüme dahil edilir
+        return kind, tail.group(), tail.start() > 0
+
+    @staticmethod
+    def _parse_jobs(lines: List[str], section: Section) -> List[JobEntry]:
+        """Tarih aralığı içeren her satır bir iş kaydı başlatır; hemen üstündeki
+        boş olmayan satırlar unvan ve şirket olarak alınır"""
+        dated = []
+        for index in range(section.start_line, section.end_line):
+            periods = TextProcessor.extract_date_periods(lines[index].lower())
+            if periods:
+                dated.append((index, periods[0]))
+
+        jobs: List[JobEntry] = []
+        lower_bound = section.start_line
+        for index, (start_year, end_year) in dated:
+            start = index
+            while (start > lower_bound and index - start < JOB_HEADER_LINES
+                   and lines[start - 1].strip()):
+                start -= 1
+            header = [line.strip() for line in lines[start:index]]
+            if not header:
+                # 'Data Scientist, Acme 2019 - 2021': tarihten önceki kısım unvandır
+                inline_title = lines[index]
+                for position, char in enumerate(inline_title):
+                    if char.isdigit():
+                        inline_title = inline_title[:position]
+                        break
+                inline_title = inline_title.strip(' ,-|(')
+                header = [inline_title] if inline_title else []
+
+            if jobs:
+                jobs[-1].end_line = start
+            jobs.append(JobEntry(header[0] if header else None,
+                                 header[1] if len(header) > 1 else None,
+                                 start_year, end_year, start, section.end_line))
+            lower_bound = index + 1
+        return jobs
+
+    @property
+    def header_text(self) -> str:
+        return '\n'.join(self.lines[:self.header_end])
+
+    def has_section(self, kind: str) -> bool:
+        return any(section.kind == kind for section in self.sections)
+
+    def section_text(self, kind: str) -> str:
+        """Aynı türdeki tüm bölümlerin içerik satırları"""
+        return '\n'.join('\n'.join(self.lines[section.start_line:section.end_line])
+                         for section in self.sections if section.kind == kind)
+
+    def text_without(self, kinds: Iterable[str]) -> str:
+        """Verilen türdeki bölümlerin içerikleri çıkarılmış metin"""
+        kinds = frozenset(kinds)
+        pieces, cursor = [], 0
+        for section in self.sections:
+            if section.kind in kinds:
+                pieces.extend(self.lines[cursor:section.start_line])
+                cursor = section.end_line
+        pieces.extend(self.lines[cursor:])
+        return '\n'.join(pieces)
+
+    def to_dict(self) -> Dict:
+        """JSON uyumlu gösterim; metnin kendisi dahil edilmez (bkz. from_dict)"""
+        return {
+            'header_end': self.header_end,
+            'location': self.location,
+            'sections': [section.to_dict() for section in self.sections],
+            'jobs': [job.to_dict() for job in self.jobs]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, text: str) -> 'CVDocument':
+        """to_dict çıktısını ve aynı metni kullanarak belgeyi yeniden oluşturur"""
+        return cls(text,
+                   [Section(**section) for section in data['sections']],
+                   [JobEntry(**job) for job in data['jobs']],
+                   data['header_end'], data.get('location'))
@@ -1,61 +1,298 @@
-import PyPDF2
+import io
 import os
 import re
-from typing import Dict, List
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Dict, List, Tuple, Union
 from utils import TextProcessor
+from cv_document import CVDocument
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+def _extract_pdf_pages(data: bytes, page_indices: List[int]) -> List[Tuple[int, str, float]]:
+    """Süreç havuzunda çalışır: verilen sayfaların metnini ve süresini (ms) döndürür"""
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    pages = []
+    for index in page_indices:
+        start = time.perf_counter()
+        text = pdf_reader.pages[index].extract_text() or ''
+        pages.append((index, text, (time.perf_counter() - start) * 1000))
+    return pages
+
+class _PageTimeout(Exception):
+    pass
+
+def _can_interrupt() -> bool:
+    """Sayfa işlemi SIGALRM ile kesilebilir mi (Unix, ana thread)"""
+    return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+@contextmanager
+def _time_limit(seconds: float):
+    """Ana thread'de süre dolunca bloğu _PageTimeout ile keser. Başka bir
+    zamanlayıcı etkinse veya kesme mümkün değilse sınır uygulanmaz."""
+    if not _can_interrupt() or signal.getitimer(signal.ITIMER_REAL)[0] > 0:
+        yield
+        return
+    
+    def handler(signum, frame):
+        raise _PageTimeout()
+    
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, max(seconds, 0.001))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+class _PagePool:
+    """Sayfa süreç havuzu ve onu kullanan istek sayısı"""
+    
+    def __init__(self, workers: int):
+        # fork yerine spawn: arka plan thread'leri olan süreçlerde güvenli
+        self.executor = ProcessPoolExecutor(
+            max_workers=max(1, workers), mp_context=multiprocessing.get_context('spawn'))
+        self.pid = os.getpid()
+        self.users = 0
+        self.retired = False
+    
+    def terminate(self):
+        # Çalışmaya devam eden sayfa işlemleri zorla durdurulur
+        processes = list((getattr(self.executor, '_processes', None) or {}).values())
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
 
 class CVProcessor:
-    def __init__(self):
+    # Büyük PDF'ler için süreç havuzu; tüm örnekler arasında paylaşılır ve
+    # ilk ihtiyaçta (gunicorn fork'undan sonra) oluşturulur
+    _pdf_pool = None
+    _pdf_pool_lock = threading.Lock()
+    
+    def __init__(self, max_pages: int = None, max_seconds: float = None,
+                 parallel_threshold: int = None, pdf_workers: int = None):
         self.supported_formats = ['.pdf', '.txt', '.docx']
+        
+        # Kötü niyetli/çok büyük PDF'lerin bir worker'ı kilitlememesi için bütçe
+        self.max_pages = max_pages if max_pages is not None else int(os.environ.get('CV_PDF_MAX_PAGES', '50'))
+        self.max_seconds = max_seconds if max_seconds is not None else float(os.environ.get('CV_PDF_MAX_SECONDS', '20'))
+        # Bu sayıdan fazla sayfalı PDF'ler süreç havuzunda paralel işlenir
+        self.parallel_threshold = parallel_threshold if parallel_threshold is not None else int(os.environ.get('CV_PDF_PARALLEL_PAGES', '8'))
+        self.pdf_workers = pdf_workers if pdf_workers is not None else int(os.environ.get('CV_PDF_WORKERS', str(os.cpu_count() or 1)))
     
     def extract_text(self, file_path: str) -> str:
         file_extension = os.path.splitext(file_path)[1].lower()
+        self._check_format(file_extension)
+        
+        with open(file_path, 'rb') as file:
+            return self.extract_text_from_stream(file, file_extension)
+    
+    def extract_text_from_stream(self, source: Union[bytes, BinaryIO], filename: str) -> str:
+        """Dosya benzeri nesneden veya byte dizisinden metin çıkarır (diske yazmadan).
+        filename yalnızca formatı belirlemek için kullanılır ('cv.pdf' ya da '.pdf')."""
+        return self.extract_with_metadata(source, filename)[0]
+    
+    def extract_with_metadata(self, source: Union[bytes, BinaryIO], filename: str) -> Tuple[str, Dict]:
+        """extract_text_from_stream ile aynı; ek olarak format, sayfa sayısı,
+        sayfa bazlı süreler ve bütçe nedeniyle kesilip kesilmediği bilgisini döndürür"""
+        file_extension = os.path.splitext(filename)[1].lower() or filename.lower()
+        self._check_format(file_extension)
         
-        if file_extension == '.pdf':
-            return self._extract_from_pdf(file_path)
-        elif file_extension == '.txt':
-            return self._extract_from_txt(file_path)
-        elif file_extension == '.docx':
-            return self._extract_from_docx(file_path)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            stream = io.BytesIO(source)
+        elif not (hasattr(source, 'seekable') and source.seekable()):
+            # PDF/DOCX okuyucuları rastgele erişim ister
+            stream = io.BytesIO(source.read())
         else:
+            stream = source
+        
+        start = time.perf_counter()
+        file_format = file_extension.lstrip('.')
+        metadata = {'format': file_format}
+        
+        metrics = get_metrics()
+        metrics.observe('cv_document_bytes', self._stream_size(stream), format=file_format)
+        with metrics.timer('cv_extraction_seconds', timing_name=f'extract.{file_format}', format=file_format):
+            if file_extension == '.pdf':
+                text = self._extract_from_pdf(stream, metadata)
+            elif file_extension == '.txt':
+                text = self._extract_from_txt(stream)
+            else:
+                text = self._extract_from_docx(stream)
+        
+        metadata['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return text, metadata
+    
+    def extract_document(self, source: Union[bytes, BinaryIO], filename: str,
+                         locations=None) -> Tuple[CVDocument, Dict]:
+        """Metni çıkarıp bölümlere ve iş kayıtlarına ayrılmış belge olarak döndürür"""
+        text, metadata = self.extract_with_metadata(source, filename)
+        return self.parse_document(text, locations), metadata
+    
+    def parse_document(self, text: str, locations=None) -> CVDocument:
+        """Temizlenmiş metinden yapılandırılmış belge (bkz. cv_document)"""
+        with get_metrics().timer('cv_stage_seconds', stage='structure'):
+            return CVDocument.parse(text, locations)
+    
+    @staticmethod
+    def _stream_size(stream: BinaryIO) -> int:
+        position = stream.tell()
+        size = stream.seek(0, io.SEEK_END) - position
+        stream.seek(position)
+        return size
+    
+    def _check_format(self, file_extension: str):
+        if file_extension not in self.supported_formats:
             raise ValueError(f"Desteklenmeyen dosya formatı: {file_extension}")
     
-    def _extract_from_pdf(self, file_path: str) -> str:
+    def _extract_from_pdf(self, stream: BinaryIO, metadata: Dict = None) -> str:
+        metadata = metadata if metadata is not None else {}
+        # PyPDF2 yalnızca ilk PDF'te yüklenir; .txt/.docx analizi açılışta ödemez
+        import PyPDF2
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                
-                return self._clean_text(text)
+            pdf_reader = PyPDF2.PdfReader(stream)
+            page_count = len(pdf_reader.pages)
+            page_indices = list(range(min(page_count, self.max_pages)))
+            deadline = time.monotonic() + self.max_seconds
+            
+            # Sıralı işlemde uzun süren bir sayfa SIGALRM ile kesilir; kesilemeyen
+            # thread'lerde (ör. iş kuyruğu) sayfalar süre sınırı için havuzda işlenir
+            parallel = self.pdf_workers > 1 and (len(page_indices) > self.parallel_threshold
+                                                 or not _can_interrupt())
+            if parallel:
+                stream.seek(0)
+                try:
+                    pages = self._extract_pages_parallel(stream.read(), page_indices, deadline)
+                except BrokenProcessPool as e:
+                    # Havuz çöktüyse istek kaybedilmez, sayfalar sırayla işlenir
+                    logger.error(f"PDF süreç havuzu kullanılamadı, sıralı işleniyor: {str(e)}")
+                    parallel = False
+                    pages = self._extract_pages_sequential(pdf_reader, page_indices, deadline)
+            else:
+                pages = self._extract_pages_sequential(pdf_reader, page_indices, deadline)
         except Exception as e:
             raise Exception(f"PDF dosyası okunamadı: {str(e)}")
+        
+        truncation_reason = None
+        if len(pages) < len(page_indices):
+            truncation_reason = 'max_seconds'
+        elif page_count > self.max_pages:
+            truncation_reason = 'max_pages'
+        if truncation_reason:
+            logger.warning(f"PDF kısmen işlendi ({len(pages)}/{page_count} sayfa, neden: {truncation_reason})")
+        
+        metadata.update({
+            'page_count': page_count,
+            'pages_processed': len(pages),
+            'truncated': truncation_reason is not None,
+            'truncation_reason': truncation_reason,
+            'parallel': parallel,
+            'page_timings_ms': [round(elapsed, 2) for _, _, elapsed in pages]
+        })
+        
+        # Sayfalar sırayla tek seferde birleştirilir
+        return self._clean_text('\n'.join(text for _, text, _ in pages) + '\n')
     
-    def _extract_from_txt(self, file_path: str) -> str:
+    def _extract_pages_sequential(self, pdf_reader, page_indices: List[int],
+                                  deadline: float) -> List[Tuple[int, str, float]]:
+        pages = []
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
-                return self._clean_text(text)
-        except UnicodeDecodeError:
-            try:
-                with open(file_path, 'r', encoding='latin-1') as file:
-                    text = file.read()
-                    return self._clean_text(text)
-            except Exception as e:
-                raise Exception(f"TXT dosyası okunamadı: {str(e)}")
+            with _time_limit(deadline - time.monotonic()):
+                for index in page_indices:
+                    if time.monotonic() > deadline:
+                        break
+                    start = time.perf_counter()
+                    text = pdf_reader.pages[index].extract_text() or ''
+                    pages.append((index, text, (time.perf_counter() - start) * 1000))
+        except _PageTimeout:
+            pass
+        return pages
+    
+    def _extract_pages_parallel(self, data: bytes, page_indices: List[int],
+                                deadline: float) -> List[Tuple[int, str, float]]:
+        """Sayfaları parçalara bölüp süreç havuzuna dağıtır. Süre bütçesi aşılırsa
+        bu isteğin başlamamış parçaları iptal edilir; çalışmaya devam eden parça
+        varsa havuz emekliye ayrılır ve onu kullanan son istek bitince sonlandırılır
+        (diğer isteklerin parçaları öldürülmez, worker kilitlenmez)."""
+        pool = self._acquire_pdf_pool(self.pdf_workers)
+        pending, broken = set(), False
+        try:
+            chunk_size = max(1, len(page_indices) // (self.pdf_workers * 2))
+            chunks = [page_indices[i:i + chunk_size] for i in range(0, len(page_indices), chunk_size)]
+            pending = {pool.executor.submit(_extract_pdf_pages, data, chunk) for chunk in chunks}
+            
+            pages = []
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pages.extend(future.result())
+        except BrokenProcessPool:
+            broken = True
+            raise
+        finally:
+            cancelled = [future.cancel() for future in pending]
+            self._release_pdf_pool(pool, broken or not all(cancelled))
+        
+        # Bütçe aşıldıysa yalnızca baştan kesintisiz işlenmiş sayfalar kullanılır
+        pages.sort(key=lambda page: page[0])
+        contiguous = []
+        for expected, page in zip(page_indices, pages):
+            if page[0] != expected:
+                break
+            contiguous.append(page)
+        return contiguous
+    
+    @classmethod
+    def _acquire_pdf_pool(cls, workers: int) -> _PagePool:
+        with cls._pdf_pool_lock:
+            if cls._pdf_pool is None or cls._pdf_pool.pid != os.getpid():
+                cls._pdf_pool = _PagePool(workers)
+            cls._pdf_pool.users += 1
+            return cls._pdf_pool
+    
+    @classmethod
+    def _release_pdf_pool(cls, pool: _PagePool, retire: bool = False):
+        """retire: havuzda bu isteğin bitmeyen işi kaldı (veya havuz çöktü); yeni
+        istekler yeni havuz kullanır, eski havuz son kullanıcısı bırakınca sonlandırılır"""
+        with cls._pdf_pool_lock:
+            pool.users -= 1
+            if retire and not pool.retired:
+                pool.retired = True
+                if cls._pdf_pool is pool:
+                    cls._pdf_pool = None
+            terminate = pool.retired and pool.users == 0
+        if terminate:
+            pool.terminate()
+    
+    def _extract_from_txt(self, stream: BinaryIO) -> str:
+        try:
+            data = stream.read()
         except Exception as e:
             raise Exception(f"TXT dosyası okunamadı: {str(e)}")
+        
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            # latin-1 her byte dizisini çözebilir
+            text = data.decode('latin-1')
+        return self._clean_text(text)
     
-    def _extract_from_docx(self, file_path: str) -> str:
+    def _extract_from_docx(self, stream: BinaryIO) -> str:
         try:
             from docx import Document
-            doc = Document(file_path)
-            text = ""
-            
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            doc = Document(stream)
+            text = '\n'.join(paragraph.text for paragraph in doc.paragraphs) + '\n'
             
             return self._clean_text(text)
         except Exception as e:
@@ -63,7 +300,8 @@ class CVProcessor:
     
     def _clean_text(self, text: str) -> str:
         """Metni temizler - utils.TextProcessor kullanır"""
-        return TextProcessor.clean_text(text)
+        with get_metrics().timer('cv_stage_seconds', stage='clean'):
+            return TextProcessor.clean_text(text)
     
     def get_file_info(self, file_path: str) -> Dict:
         if not os.path.exists(file_path):
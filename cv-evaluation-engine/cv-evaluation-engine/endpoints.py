@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Analiz uçlarının sunumdan bağımsız istek doğrulaması ve yanıt üretimi.
+
+Flask (app.py) ve ASGI (asgi.py) sunumları aynı fonksiyonları kullanır:
+gövde parse_json ve validate_* ile doğrulanır, analiz analyze_* ile çalışır
+(ASGI bunları süreç havuzunda çalıştırır), yanıt *_response ile üretilir.
+Yanıtlar (durum kodu, gövde, başlıklar) üçlüsüdür.
+"""
+
+import os
+import json
+import uuid
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from werkzeug.utils import secure_filename
+
+from utils import ModelManager, SecurityValidator
+from analysis import analyze_batch, analyze_document, cached_analyze_text, persist_analysis
+from ruleset import UnknownRulesetError
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = {'pdf', 'txt', 'docx'}
+MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+MAX_TEXT_LENGTH = 50000  # 50KB metin sınırı
+MAX_BATCH_SIZE = int(os.environ.get('CV_MAX_BATCH_SIZE', '1000'))
+
+Response = Tuple[int, Dict, Dict[str, str]]
+
+
+def error(message: str, status: int = 400) -> Response:
+    return status, {'error': message}, {}
+
+
+def count_error(error: Exception, endpoint: str):
+    get_metrics().inc('cv_errors_total', type=type(error).__name__, stage=endpoint)
+
+
+def allowed_file(filename: str) -> bool:
+    return SecurityValidator.validate_file_extension(filename, ALLOWED_EXTENSIONS)
+
+
+def parse_json(body: bytes, content_type: Optional[str]):
+    """JSON gövdesi; içerik türü JSON değilse veya gövde çözülemezse None
+    (uçlar bunu eksik veri olarak 400 ile yanıtlar)"""
+    mimetype = (content_type or '').split(';', 1)[0].strip().lower()
+    if not body or not (mimetype == 'application/json' or
+                        (mimetype.startswith('application/') and mimetype.endswith('+json'))):
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+def validate_text(data) -> Tuple[Optional[str], Optional[Response]]:
+    """/api/analyze gövdesi; (metin, hata_yanıtı)"""
+    if not isinstance(data, dict) or not isinstance(data.get('text'), str):
+        logger.warning("API analyze: Metin verisi bulunamadı")
+        return None, error('Metin verisi bulunamadı')
+
+    text = data['text'].strip()
+    if not text:
+        logger.warning("API analyze: Boş metin")
+        return None, error('Metin boş olamaz')
+
+    if len(text) > MAX_TEXT_LENGTH:
+        logger.warning("API analyze: Metin çok uzun")
+        return None, error('Metin çok uzun. Maksimum 50,000 karakter olmalıdır.')
+    return text, None
+
+
+def validate_batch(data) -> Tuple[Optional[List], Optional[Response]]:
+    """/api/analyze/batch gövdesi; (ham metin listesi, hata_yanıtı)"""
+    if not isinstance(data, dict) or not isinstance(data.get('texts'), list):
+        logger.warning("API batch: Metin listesi bulunamadı")
+        return None, error('Metin listesi (texts) bulunamadı')
+
+    texts = data['texts']
+    if not texts:
+        return None, error('Metin listesi boş olamaz')
+
+    if len(texts) > MAX_BATCH_SIZE:
+        logger.warning(f"API batch: Çok fazla metin ({len(texts)})")
+        return None, error(f'Tek istekte en fazla {MAX_BATCH_SIZE} metin gönderilebilir.')
+    return texts, None
+
+
+def split_batch(texts: List) -> Tuple[List[Optional[Dict]], List[int], List[str]]:
+    """Geçersiz metinler partiyi bozmaz; kendi sırasında hata olarak döner.
+    (sonuçlar, geçerli sıralar, geçerli metinler) döndürür."""
+    results: List[Optional[Dict]] = [None] * len(texts)
+    valid_indices, valid_texts = [], []
+    for index, text in enumerate(texts):
+        text = text.strip() if isinstance(text, str) else ''
+        if not text:
+            results[index] = {'error': 'Metin boş olamaz'}
+        elif len(text) > MAX_TEXT_LENGTH:
+            results[index] = {'error': 'Metin çok uzun. Maksimum 50,000 karakter olmalıdır.'}
+        else:
+            valid_indices.append(index)
+            valid_texts.append(text)
+    return results, valid_indices, valid_texts
+
+
+def validate_upload(filename: Optional[str], size: int) -> Tuple[Optional[str], Optional[Response]]:
+    """Yüklenen dosyanın adı ve boyutu; (güvenli_ad, hata_yanıtı)"""
+    if not filename:
+        logger.warning("Dosya seçilmedi")
+        return None, error('Dosya seçilmedi')
+
+    if not allowed_file(filename):
+        logger.warning(f"Geçersiz dosya formatı: {filename}")
+        return None, error('Geçersiz dosya formatı. Sadece PDF, TXT ve DOCX dosyaları desteklenir.')
+
+    if not SecurityValidator.validate_file_size(size, MAX_FILE_SIZE):
+        logger.warning(f"Dosya çok büyük: {size} bytes")
+        return None, error(f'Dosya çok büyük. Maksimum {MAX_FILE_SIZE // (1024*1024)}MB olmalıdır.')
+
+    return SecurityValidator.sanitize_filename(secure_filename(filename)), None
+
+
+def save_upload(data: bytes, filename: str, folder: str) -> str:
+    """Yüklenen dosyanın kopyasını benzersiz adla saklar (CV_SAVE_UPLOADS=1)"""
+    stored_name = f"{uuid.uuid4().hex}_{filename}"
+    with open(os.path.join(folder, stored_name), 'wb') as file:
+        file.write(data)
+    logger.info(f"Dosya kaydedildi: {stored_name}")
+    return stored_name
+
+
+def analyze_text(text: str, customer: Optional[str] = None,
+                 candidate_id: Optional[str] = None) -> Tuple[Dict, bool]:
+    """Puanlama ve maaş tahmini (önbellek ve yakın kopya indeksiyle); sonuç aday
+    deposunda saklanır. (sonuç, önbellekten_mi) döndürür."""
+    model_manager = ModelManager()
+    result, cache_hit = cached_analyze_text(text, model_manager, model_manager.result_cache, customer=customer)
+    candidate_id = persist_analysis(text, result, model_manager, customer=customer, candidate_id=candidate_id)
+    if candidate_id:
+        result['candidate_id'] = candidate_id
+    logger.info("API analyze tamamlandı")
+    return result, cache_hit
+
+
+def analyze_texts(texts: List[str], customer: Optional[str] = None) -> List[Dict]:
+    """Geçerli metinlerin toplu analizi; maaş tahmini tek model çağrısıyla yapılır"""
+    model_manager = ModelManager()
+    results = analyze_batch(texts, model_manager, model_manager.result_cache, customer=customer)
+    for text, result in zip(texts, results):
+        candidate_id = persist_analysis(text, result, model_manager, customer=customer)
+        if candidate_id:
+            result['candidate_id'] = candidate_id
+    return results
+
+
+def analyze_upload(data: bytes, filename: str, customer: Optional[str] = None,
+                   candidate_id: Optional[str] = None) -> Tuple[Dict, bool]:
+    """Yüklenen dosyanın analizi. Aynı dosya daha önce analiz edildiyse sonuç
+    önbellekten gelir; değilse metin bellekte çıkarılır, puanlanır ve tahmin yapılır."""
+    model_manager = ModelManager()
+    analysis, cache_hit = analyze_document(data, filename, model_manager, model_manager.result_cache,
+                                           customer=customer)
+
+    result = {'filename': filename}
+    result.update(analysis)
+    # Metin ve sonuç aday deposunda saklanır (CV_STORE_DB=memory değilse)
+    candidate_id = persist_analysis(analysis['extracted_text'], analysis, model_manager,
+                                    customer=customer, candidate_id=candidate_id,
+                                    filename=filename, extraction=analysis.get('extraction'))
+    if candidate_id:
+        result['candidate_id'] = candidate_id
+    logger.info(f"CV analizi tamamlandı: {filename}")
+    return result, cache_hit
+
+
+def analysis_response(result: Dict, cache_hit: bool) -> Response:
+    return 200, result, {'X-Cache': 'HIT' if cache_hit else 'MISS'}
+
+
+def batch_response(results: List[Optional[Dict]], valid_indices: List[int],
+                   batch_results: List[Dict]) -> Response:
+    for index, result in zip(valid_indices, batch_results):
+        results[index] = result
+    logger.info(f"API batch tamamlandı: {len(valid_indices)}/{len(results)} metin")
+    return 200, {'count': len(results), 'results': results}, {}
+
+
+def analysis_error(e: Exception, endpoint: str, label: str) -> Response:
+    """/api/analyze ve /api/analyze/batch hataları: bilinmeyen kural seti 400, diğerleri 500"""
+    if isinstance(e, UnknownRulesetError):
+        logger.warning(f"{label}: {str(e)}")
+        return error(str(e))
+    count_error(e, endpoint)
+    logger.error(f"{label} hatası: {str(e)}")
+    return error(f'Analiz sırasında hata oluştu: {str(e)}', 500)
+
+
+def upload_error(e: Exception, endpoint: str) -> Response:
+    """Dosya analizi hataları: okunamayan dosya 400, diğerleri 500"""
+    count_error(e, endpoint)
+    if isinstance(e, ValueError):
+        logger.error(f"Değer hatası: {str(e)}")
+        return error(f'Dosya işleme hatası: {str(e)}')
+    logger.error(f"Beklenmeyen hata: {str(e)}")
+    return error(f'Dosya işlenirken hata oluştu: {str(e)}', 500)
+
+
+def server_error(e: Exception, endpoint: str, label: str) -> Response:
+    count_error(e, endpoint)
+    logger.error(f"{label} hatası: {str(e)}")
+    return error('Sunucu hatası', 500)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Lokasyon ve iş türü gibi (çok kelimeli) ad listeleri için token n-gram
+sözlüğü. Metin bir kez kelimelere ayrılır; her kelimede yalnızca o kelimeyle
+başlayan adların uzunlukları sözlükte aranır. Arama maliyeti metin uzunluğuna
+bağlıdır, listedeki ad sayısına bağlı değildir (on binlerce şehir adı dahil).
+
+Aynı konumda en uzun ad kazanır ve içerdiği kısa adlar ayrıca sayılmaz:
+'product manager' bulunduğunda 'manager' o konumda eşleşmez."""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+_COMBINING_MARKS = re.compile('[̀-ͯ]')
+# NFKD ile ayrışmayan harfler
+_FOLD_TABLE = str.maketrans({'ı': 'i', 'ß': 'ss', 'ø': 'o', 'đ': 'd', 'ł': 'l'})
+
+# (token konumu, token sayısı, listedeki sıra, ad, değer)
+GazetteerMatch = Tuple[int, int, int, str, str]
+
+
+def fold(text: str) -> str:
+    """Küçük harfe çevirip aksanları kaldırır: 'İstanbul' -> 'istanbul', 'Eskişehir' -> 'eskisehir'"""
+    return _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', text.lower())).translate(_FOLD_TABLE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(fold(text))
+
+
+class GazetteerIndex:
+    """Ad -> değer eşlemesinden yükleme anında kurulan, değişmez arama indeksi.
+    Büyük/küçük harf, aksan ve noktalama farkları gözetilmez
+    ('San Francisco, CA' ile 'san francisco ca' aynı addır)."""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        # Anahtar: boşlukla birleştirilmiş tokenlar -> (listedeki sıra, ad, değer).
+        # Aynı anahtara düşen adlarda listede önce gelen kalır.
+        self._entries: Dict[str, Tuple[int, str, str]] = {}
+        # İlk token -> o tokenla başlayan adların token sayıları (büyükten küçüğe)
+        lengths: Dict[str, set] = {}
+        for name, value in entries:
+            tokens = tokenize(name)
+            if not tokens:
+                continue
+            key = ' '.join(tokens)
+            if key not in self._entries:
+                self._entries[key] = (len(self._entries), name, value)
+                lengths.setdefault(tokens[0], set()).add(len(tokens))
+        self._lengths: Dict[str, Tuple[int, ...]] = {
+            token: tuple(sorted(counts, reverse=True)) for token, counts in lengths.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(self, text: str) -> List[GazetteerMatch]:
+        """Metindeki adları soldan sağa, çakışmadan ve her konumda en uzun
+        haliyle bulur"""
+        tokens = tokenize(text)
+        matches: List[GazetteerMatch] = []
+        position = 0
+        while position < len(tokens):
+            counts = self._lengths.get(tokens[position])
+            if counts is not None:
+                for count in counts:
+                    entry = self._entries.get(' '.join(tokens[position:position + count]))
+                    if entry is not None:
+                        matches.append((position, count) + entry)
+                        position += count
+                        break
+                else:
+                    position += 1
+            else:
+                position += 1
+        return matches
+
+    @staticmethod
+    def longest(matches: List[GazetteerMatch]) -> Optional[str]:
+        """En çok kelimeden oluşan (en spesifik) adın değeri; eşitlikte metinde önce gelen"""
+        if not matches:
+            return None
+        return min(matches, key=lambda match: (-match[1], match[0]))[4]
+
+    @staticmethod
+    def first_listed(matches: List[GazetteerMatch]) -> Optional[str]:
+        """Listede en önce tanımlanmış adın değeri (kural dosyasındaki öncelik)"""
+        if not matches:
+            return None
+        return min(matches, key=lambda match: match[2])[4]
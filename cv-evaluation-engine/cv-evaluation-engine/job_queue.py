@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import ssl
+import uuid
+import socket
+import sqlite3
+import logging
+import ipaddress
+import threading
+import http.client
+import urllib.parse
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Gunicorn worker'ları kuyruğu paylaşsın diye varsayılan arka uç SQLite'tır;
+# CV_JOB_DB=memory süreç içi kuyruğu seçer (yalnızca tek süreçli kurulumlar)
+DEFAULT_JOB_DB = os.environ.get('CV_JOB_DB', os.path.join(BASE_DIR, 'data', 'jobs.db'))
+# Callback gönderilebilecek host'lar (virgülle ayrılmış); boşsa yalnızca genel
+# (özel, loopback, link-local olmayan) adreslere çözülen host'lar kabul edilir
+CALLBACK_HOSTS = frozenset(host.strip().lower() for host in os.environ.get('CV_CALLBACK_HOSTS', '').split(',')
+                           if host.strip())
+
+
+class QueueFullError(Exception):
+    """Kuyruk derinlik sınırına ulaşıldığında fırlatılır (HTTP 429)"""
+
+
+def resolve_callback_url(url) -> Optional[Tuple[urllib.parse.SplitResult, int, str]]:
+    """callback_url dışarıya açık bir http(s) adresiyse (adres parçaları, port,
+    bağlanılacak IP); değilse None (SSRF koruması)"""
+    if not isinstance(url, str):
+        return None
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError:
+        return None
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if CALLBACK_HOSTS and host not in CALLBACK_HOSTS:
+        return None
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)]
+    except (OSError, UnicodeError):
+        return None
+    if not CALLBACK_HOSTS:
+        for address in addresses:
+            ip = ipaddress.ip_address(address.split('%', 1)[0])
+            if not ip.is_global or ip.is_multicast:
+                return None
+    return (parts, port, addresses[0]) if addresses else None
+
+
+def validate_callback_url(url) -> bool:
+    """callback_url'in dışarıya açık bir http(s) adresi olduğunu doğrular (SSRF koruması)"""
+    return resolve_callback_url(url) is not None
+
+
+class _PinnedHTTPConnection(http.client.HTTPConnection):
+    """Doğrulanmış IP'ye bağlanır; host yeniden çözülmez (DNS rebinding).
+    Host başlığı URL'deki host'tur."""
+
+    def __init__(self, host: str, port: int, address: str, timeout: float):
+        super().__init__(host, port, timeout=timeout)
+        self.address = address
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+
+class _PinnedHTTPSConnection(_PinnedHTTPConnection):
+    """TLS sertifikası ve SNI URL'deki host'a göre doğrulanır"""
+
+    default_port = http.client.HTTPS_PORT
+
+    def __init__(self, host: str, port: int, address: str, timeout: float):
+        super().__init__(host, port, address, timeout)
+        self.ssl_context = ssl.create_default_context()
+
+    def connect(self):
+        super().connect()
+        self.sock = self.ssl_context.wrap_socket(self.sock, server_hostname=self.host)
+
+
+class JobBackend:
+    """İş kayıtlarının saklandığı arka uç için temel sınıf"""
+
+    def create(self, job: Dict):
+        raise NotImplementedError
+
+    def claim_next(self, stale_after: float) -> Optional[Dict]:
+        """Sıradaki işi 'running' durumuna alıp (payload dahil) döndürür"""
+        raise NotImplementedError
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict] = None,
+               error: Optional[str] = None):
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """İşin durumunu (payload olmadan) döndürür"""
+        raise NotImplementedError
+
+    def pending_count(self) -> int:
+        """Kuyrukta bekleyen ve çalışan iş sayısı"""
+        raise NotImplementedError
+
+    def purge(self, older_than: float):
+        """Belirtilen zamandan önce biten işleri siler"""
+        raise NotImplementedError
+
+
+class MemoryJobBackend(JobBackend):
+    """Süreç içi arka uç; yalnızca tek worker'lı kurulumlar ve testler için"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+        self._queue = deque()
+        self._lock = threading.Lock()
+
+    def create(self, job: Dict):
+        with self._lock:
+            self._jobs[job['id']] = dict(job)
+            self._queue.append(job['id'])
+
+    def claim_next(self, stale_after: float) -> Optional[Dict]:
+        with self._lock:
+            while self._queue:
+                job = self._jobs.get(self._queue.popleft())
+                if job is not None and job['status'] == STATUS_QUEUED:
+                    job['status'] = STATUS_RUNNING
+                    job['started_at'] = time.time()
+                    return dict(job)
+        return None
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict] = None,
+               error: Optional[str] = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(status=status, result=result, error=error,
+                       finished_at=time.time(), payload=None)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if key != 'payload'}
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values()
+                       if job['status'] in (STATUS_QUEUED, STATUS_RUNNING))
+
+    def purge(self, older_than: float):
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.get('finished_at') and job['finished_at'] < older_than]:
+                del self._jobs[job_id]
+
+
+class SQLiteJobBackend(JobBackend):
+    """SQLite arka ucu; gunicorn worker'ları ve ayrı worker süreçleri
+    aynı dosya üzerinden kuyruğu paylaşır, harici servis gerektirmez"""
+
+    _COLUMNS = ('id', 'kind', 'status', 'filename', 'callback_url', 'result', 'error',
+                'customer', 'created_at', 'started_at', 'finished_at')
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    filename TEXT,
+                    callback_url TEXT,
+                    customer TEXT,
+                    payload BLOB,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            ''')
+            # customer sütunu sonradan eklendi; eski veritabanları yerinde güncellenir
+            if 'customer' not in {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}:
+                conn.execute('ALTER TABLE jobs ADD COLUMN customer TEXT')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self, job: Dict):
+        self._connection().execute(
+            'INSERT INTO jobs (id, kind, status, filename, callback_url, customer, payload, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job['id'], job['kind'], job['status'], job.get('filename'),
+             job.get('callback_url'), job.get('customer'), job['payload'], job['created_at']))
+
+    def claim_next(self, stale_after: float) -> Optional[Dict]:
+        conn = self._connection()
+        now = time.time()
+        # IMMEDIATE kilit: iki worker aynı işi alamaz
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Worker'ı ölen (uzun süredir 'running' kalan) işler yeniden kuyruğa alınır
+            conn.execute('UPDATE jobs SET status = ?, started_at = NULL WHERE status = ? AND started_at < ?',
+                         (STATUS_QUEUED, STATUS_RUNNING, now - stale_after))
+            row = conn.execute(
+                'SELECT id, kind, filename, callback_url, customer, payload, created_at FROM jobs '
+                'WHERE status = ? ORDER BY created_at LIMIT 1', (STATUS_QUEUED,)).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute('UPDATE jobs SET status = ?, started_at = ? WHERE id = ?',
+                         (STATUS_RUNNING, now, row[0]))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        job_id, kind, filename, callback_url, customer, payload, created_at = row
+        return {'id': job_id, 'kind': kind, 'status': STATUS_RUNNING, 'filename': filename,
+                'callback_url': callback_url, 'customer': customer, 'payload': payload,
+                'created_at': created_at, 'started_at': now}
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict] = None,
+               error: Optional[str] = None):
+        self._connection().execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, payload = NULL WHERE id = ?',
+            (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+             error, time.time(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            'SELECT ' + ', '.join(self._COLUMNS) + ' FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self._COLUMNS, row))
+        if job['result'] is not None:
+            job['result'] = json.loads(job['result'])
+        return job
+
+    def pending_count(self) -> int:
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)',
+            (STATUS_QUEUED, STATUS_RUNNING)).fetchone()[0]
+
+    def purge(self, older_than: float):
+        self._connection().execute(
+            'DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?', (older_than,))
+
+
+class JobQueue:
+    """Büyük/yavaş belgeler için asenkron iş kuyruğu.
+
+    submit() işi kaydedip hemen bir iş kimliği döndürür; arka plandaki worker
+    thread'leri işleri sırayla alıp handler ile işler ve varsa callback_url'e
+    sonucu POST eder."""
+
+    def __init__(self, backend: JobBackend, handler: Callable[[Dict], Dict],
+                 workers: int = 2, max_depth: int = 100, job_timeout: float = 600,
+                 retention: float = 86400, poll_interval: float = 0.5):
+        self.backend = backend
+        self.handler = handler
+        self.workers = workers
+        self.max_depth = max_depth
+        self.job_timeout = job_timeout
+        self.retention = retention
+        self.poll_interval = poll_interval
+
+        self._threads: List[threading.Thread] = []
+        self._started_pid = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def submit(self, kind: str, payload: bytes, filename: Optional[str] = None,
+               callback_url: Optional[str] = None, customer: Optional[str] = None) -> str:
+        if self.backend.pending_count() >= self.max_depth:
+            raise QueueFullError("İş kuyruğu dolu")
+
+        job_id = uuid.uuid4().hex
+        self.backend.create({
+            'id': job_id,
+            'kind': kind,
+            'status': STATUS_QUEUED,
+            'filename': filename,
+            'callback_url': callback_url,
+            'customer': customer,
+            'payload': payload,
+            'created_at': time.time()
+        })
+
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.backend.get(job_id)
+
+    def start(self):
+        """Worker thread'lerini başlatır. gunicorn --preload ile master'da
+        başlatılan thread'ler fork sonrası kaybolacağı için süreç kimliği izlenir."""
+        if self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            self._threads = [
+                threading.Thread(target=self._worker_loop, name=f'cv-job-worker-{index}', daemon=True)
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._started_pid = os.getpid()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    def run_forever(self):
+        """Ayrı bir worker sürecinde kuyruğu tüketir (bkz. __main__); workers
+        döngüden biri bu thread'de çalışır"""
+        self._started_pid = os.getpid()
+        self._threads = [
+            threading.Thread(target=self._worker_loop, name=f'cv-job-worker-{index}', daemon=True)
+            for index in range(1, self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._worker_loop()
+
+    def _worker_loop(self):
+        last_purge = 0.0
+        while not self._stopping.is_set():
+            try:
+                job = self.backend.claim_next(self.job_timeout)
+            except Exception as e:
+                logger.error(f"İş kuyruğu okunamadı: {str(e)}")
+                job = None
+
+            if job is None:
+                if time.time() - last_purge > 3600:
+                    last_purge = time.time()
+                    self._purge()
+                # Diğer süreçlerin eklediği işler için periyodik kontrol
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._process(job)
+
+    def _process(self, job: Dict):
+        started = time.perf_counter()
+        try:
+            result = self.handler(job)
+            self.backend.finish(job['id'], STATUS_DONE, result=result)
+            logger.info(f"İş tamamlandı: {job['id']} ({time.perf_counter() - started:.2f} sn)")
+            status, error = STATUS_DONE, None
+        except Exception as e:
+            logger.error(f"İş başarısız: {job['id']}: {str(e)}")
+            self.backend.finish(job['id'], STATUS_FAILED, error=str(e))
+            status, result, error = STATUS_FAILED, None, str(e)
+
+        if job.get('callback_url'):
+            self._send_callback(job['callback_url'], {
+                'job_id': job['id'], 'status': status, 'result': result, 'error': error
+            })
+
+    def _send_callback(self, url: str, body: Dict):
+        # Adres gönderim anında yeniden çözülüp doğrulanır (DNS değişmiş olabilir)
+        # ve bağlantı doğrulanan IP'ye yapılır; yönlendirmeler izlenmez
+        target = resolve_callback_url(url)
+        if target is None:
+            logger.warning(f"Callback gönderilmedi, izin verilmeyen adres: {url}")
+            return
+        parts, port, address = target
+        connection_class = _PinnedHTTPSConnection if parts.scheme == 'https' else _PinnedHTTPConnection
+        path = urllib.parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+        connection = connection_class(parts.hostname, port, address, timeout=10)
+        try:
+            connection.request('POST', path, body=json.dumps(body, ensure_ascii=False).encode('utf-8'),
+                               headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 300:
+                logger.warning(f"Callback yanıtı {response.status} ({url})")
+        except Exception as e:
+            logger.warning(f"Callback gönderilemedi ({url}): {str(e)}")
+        finally:
+            connection.close()
+
+    def _purge(self):
+        try:
+            self.backend.purge(time.time() - self.retention)
+        except Exception as e:
+            logger.error(f"Eski işler silinemedi: {str(e)}")
+
+
+def queue_from_env(handler: Callable[[Dict], Dict], db_path: Optional[str] = None) -> JobQueue:
+    """Ortam değişkenlerinden iş kuyruğu oluşturur.
+
+    Varsayılan SQLite arka ucu (CV_JOB_DB, varsayılan data/jobs.db) worker'lar
+    arasında paylaşılır; CV_JOB_DB=memory bellek içi arka ucu seçer. CV_JOB_WORKERS=0
+    ile bu süreç yalnızca iş kabul eder; işleri `python job_queue.py` ile
+    başlatılan süreçler işler. db_path verilirse CV_JOB_DB yerine kullanılır."""
+    db_path = db_path or DEFAULT_JOB_DB
+    backend = MemoryJobBackend() if db_path == 'memory' else SQLiteJobBackend(db_path)
+    return JobQueue(
+        backend, handler,
+        workers=int(os.environ.get('CV_JOB_WORKERS', '2')),
+        max_depth=int(os.environ.get('CV_JOB_MAX_DEPTH', '100')),
+        job_timeout=float(os.environ.get('CV_JOB_TIMEOUT', '600'))
+    )
+
+
+if __name__ == '__main__':
+    import argparse
+    from analysis import run_job
+    from utils import ModelManager
+
+    parser = argparse.ArgumentParser(description='CV analiz iş kuyruğu worker süreci')
+    parser.add_argument('--db', default=DEFAULT_JOB_DB, help='SQLite iş veritabanı (varsayılan: CV_JOB_DB)')
+    args = parser.parse_args()
+    if args.db == 'memory':
+        parser.error('Ayrı worker süreci için SQLite veritabanı gerekli')
+
+    logging.basicConfig(level=logging.INFO)
+    ModelManager().preload()
+    # Thread sayısı, derinlik ve zaman aşımı web süreçleriyle aynı ortam değişkenlerinden gelir;
+    # CV_JOB_WORKERS=0 (yalnızca iş kabul eden web süreçleri) burada tek thread demektir
+    queue = queue_from_env(run_job, args.db)
+    queue.workers = max(queue.workers, 1)
+    logger.info(f"Worker başlatıldı: {args.db} ({queue.workers} thread)")
+    queue.run_forever()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+_is_word_char = re.compile(r'\w').match
+
+# suffix_groups kelimelerinden sonra gelebilecek Türkçe ekler (ünlü uyumu ve
+# kaynaştırma ünsüzlü biçimleriyle); en fazla üç ek art arda eklenebilir
+# ('lise-si', 'veri-ler-i', 'yazılım-cı-lar-dan')
+TURKISH_SUFFIXES = (
+    'ı', 'i', 'u', 'ü', 'yı', 'yi', 'yu', 'yü', 'nı', 'ni', 'nu', 'nü', 'sı', 'si', 'su', 'sü',
+    'a', 'e', 'ya', 'ye', 'na', 'ne',
+    'da', 'de', 'ta', 'te', 'nda', 'nde',
+    'dan', 'den', 'tan', 'ten', 'ndan', 'nden',
+    'ın', 'in', 'un', 'ün', 'nın', 'nin', 'nun', 'nün',
+    'la', 'le', 'yla', 'yle',
+    'm', 'ım', 'im', 'um', 'üm',
+    'mız', 'miz', 'muz', 'müz', 'ımız', 'imiz', 'umuz', 'ümüz',
+    'nız', 'niz', 'nuz', 'nüz', 'ınız', 'iniz', 'unuz', 'ünüz',
+    'lar', 'ler', 'ki',
+    'lı', 'li', 'lu', 'lü', 'lık', 'lik', 'luk', 'lük',
+    'cı', 'ci', 'cu', 'cü', 'çı', 'çi', 'çu', 'çü', 'sal', 'sel',
+    'dır', 'dir', 'dur', 'dür', 'tır', 'tir', 'tur', 'tür',
+)
+MAX_SUFFIXES = 3
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Kelime listesinden ortak önekleri birleştirilmiş (trie) bir regex üretir.
+    Alternatifler en uzun eşleşmeyi önce deneyecek şekilde sıralanır."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        is_terminal = '' in node
+        # Çok kelimeli anahtar kelimeler satır sonu/çoklu boşluk üzerinden de eşleşir
+        branches = [(r'\s+' if char == ' ' else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if is_terminal:
+            # Açgözlü ? önce uzun eşleşmeyi dener, sınır tutmazsa kısaya döner
+            return ('(?:' + body + ')?') if len(branches) == 1 else body + '?'
+        return body
+
+    return build(trie)
+
+
+# Ek zinciri ve ardından kelime sınırı ('mastered', 'database' eşleşmez)
+_SUFFIX_PATTERN = '(?:' + _trie_pattern(TURKISH_SUFFIXES) + '){0,%d}(?!\\w)' % MAX_SUFFIXES
+_suffix_boundary = re.compile(_SUFFIX_PATTERN).match
+
+
+class KeywordMatcher:
+    """Birden çok anahtar kelime grubunu (yetenek, eğitim, lokasyon...) metin
+    üzerinde tek geçişte bulan, yükleme anında derlenmiş eşleştirici.
+
+    Anahtar kelimeler kelime sınırlarına göre eşleşir; 'r', 'go' gibi kısa
+    kelimeler başka kelimelerin içinde ('your', 'google') bulunmaz.
+    suffix_groups içindeki grupların kelimeleri Türkçe ekleri (TURKISH_SUFFIXES)
+    kabul eder ('lise' -> 'lisesi', 'bilgisayar' -> 'bilgisayarı'); başka
+    kelimelerin öneki olarak ('data' -> 'database') eşleşmez."""
+
+    def __init__(self, groups: Dict[str, Iterable[str]], suffix_groups: Iterable[str] = (),
+                 cache_size: int = 32):
+        self.groups: Dict[str, Tuple[str, ...]] = {
+            name: tuple(dict.fromkeys(keyword.lower() for keyword in keywords))
+            for name, keywords in groups.items()
+        }
+        self.suffix_groups = frozenset(suffix_groups)
+
+        # Anahtar kelime -> ait olduğu gruplar
+        self._keyword_groups: Dict[str, Tuple[str, ...]] = {}
+        for name, keywords in self.groups.items():
+            for keyword in keywords:
+                self._keyword_groups[keyword] = self._keyword_groups.get(keyword, ()) + (name,)
+
+        suffix_keywords = {keyword for name in self.suffix_groups
+                           for keyword in self.groups.get(name, ())}
+        strict_keywords = sorted(set(self._keyword_groups) - suffix_keywords)
+        suffix_keywords = sorted(suffix_keywords)
+
+        # Aynı konumda başlayan kısa anahtar kelimeler ('data' / 'data science')
+        # regex tarafından yalnızca en uzun haliyle bulunur; önekler önceden hesaplanır
+        self._expansions: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(
+                keyword[:i] for i in range(1, len(keyword))
+                if keyword[:i] in self._keyword_groups and (
+                    not _is_word_char(keyword[i]) or
+                    (keyword[:i] in suffix_keywords and _suffix_boundary(keyword, i)))
+            ) + (keyword,)
+            for keyword in self._keyword_groups
+        }
+
+        # Sıfır genişlikli lookahead'ler her kelime başında en uzun eşleşmeyi
+        # yakalar; böylece iç içe/çakışan anahtar kelimeler de kaçırılmaz
+        strict = '(?:' + _trie_pattern(strict_keywords) + r')(?!\w)' if strict_keywords else None
+        # Ek zinciri lookahead'dedir; yakalanan metin yalın anahtar kelimedir
+        suffix = '(?:' + _trie_pattern(suffix_keywords) + ')(?=' + _SUFFIX_PATTERN + ')' if suffix_keywords else None
+        alternatives = [part for part in (strict, suffix) if part]
+        self._pattern = re.compile(
+            r'(?<!\w)(?=' + '|'.join(alternatives) + ')' +
+            ''.join('(?:(?=(' + part + ')))?' for part in alternatives)
+        ) if alternatives else None
+
+        self.version = hashlib.sha1(
+            repr((sorted(self.groups.items()), sorted(self.suffix_groups))).encode('utf-8')).hexdigest()[:12]
+
+        self._cache: 'OrderedDict[str, Dict[str, FrozenSet[str]]]' = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+
+    def match(self, text: str) -> Dict[str, FrozenSet[str]]:
+        """Metinde bulunan anahtar kelimeleri grup bazında döndürür.
+        Aynı metin için sonuç önbellekten gelir; motorlar metni yeniden taramaz."""
+        with self._cache_lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+
+        result = self._scan(text)
+
+        with self._cache_lock:
+            self._cache[text] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def find_all(self, text: str) -> List[str]:
+        """Metinde geçen tüm anahtar kelimeleri (gruptan bağımsız) döndürür"""
+        if self._pattern is None:
+            return []
+
+        found = set()
+        for match in self._pattern.finditer(text.lower()):
+            for keyword in match.groups():
+                if keyword is not None:
+                    if keyword not in self._expansions:
+                        keyword = ' '.join(keyword.split())
+                    found.update(self._expansions[keyword])
+        return sorted(found)
+
+    def _scan(self, text: str) -> Dict[str, FrozenSet[str]]:
+        found: Dict[str, set] = {name: set() for name in self.groups}
+        for keyword in self.find_all(text):
+            for name in self._keyword_groups[keyword]:
+                found[name].add(keyword)
+        return {name: frozenset(keywords) for name, keywords in found.items()}
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Çalışan bir sunucuya eşzamanlı istek gönderen yük testi.
+
+    gunicorn --bind :5000 --workers 4 --preload app:app
+    python load_test.py http://localhost:5000 --concurrency 1 4 16 64 -o sync.json
+
+    uvicorn asgi:app --port 5000
+    python load_test.py http://localhost:5000 --concurrency 1 4 16 64 -o asgi.json --compare sync.json
+
+Her eşzamanlılık düzeyinde istemci sayısı kadar thread (kalıcı bağlantıyla)
+süre boyunca istek gönderir. Metinler test_files/ altındaki CV'lerdir ve sonuç
+önbelleğine isabet etmemesi için her istekte tekilleştirilir. Çıktı; saniyedeki
+istek sayısı, p50/p95/p99 gecikme ve durum kodu dağılımını içeren JSON'dur.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import uuid
+import argparse
+import threading
+import http.client
+from collections import Counter
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = ('analyze', 'upload')
+
+
+def load_texts() -> List[str]:
+    texts = []
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, 'test_files', '*.txt'))):
+        with open(path, encoding='utf-8') as file:
+            texts.append(file.read())
+    return texts
+
+
+def build_request(endpoint: str, text: str, sequence: int):
+    """(yol, gövde, başlıklar); metin sonuç önbelleğine isabet etmemesi için tekilleştirilir"""
+    text = f'{text}\n#{sequence}-{uuid.uuid4().hex}'
+    if endpoint == 'analyze':
+        body = json.dumps({'text': text}).encode('utf-8')
+        return '/api/analyze', body, {'Content-Type': 'application/json'}
+
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="cv.txt"\r\n'
+            f'Content-Type: text/plain\r\n\r\n{text}\r\n--{boundary}--\r\n').encode('utf-8')
+    return '/upload', body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+def _client(url, endpoint: str, texts: List[str], deadline: float, offset: int,
+            latencies: List[float], statuses: Counter, lock: threading.Lock, timeout: float):
+    connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(url.hostname, url.port, timeout=timeout)
+    sequence = offset
+    local_latencies, local_statuses = [], Counter()
+    while time.perf_counter() < deadline:
+        path, body, headers = build_request(endpoint, texts[sequence % len(texts)], sequence)
+        sequence += 1
+        start = time.perf_counter()
+        try:
+            connection.request('POST', url.path.rstrip('/') + path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            local_statuses[response.status] += 1
+        except (OSError, http.client.HTTPException) as e:
+            local_statuses[type(e).__name__] += 1
+            connection.close()
+            continue
+        local_latencies.append(time.perf_counter() - start)
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        statuses.update(local_statuses)
+
+
+def run_level(base_url: str, endpoint: str, concurrency: int, duration: float, timeout: float) -> Dict:
+    """concurrency istemciyle duration saniye istek gönderir"""
+    url = urlsplit(base_url)
+    texts = load_texts()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+
+    start = time.perf_counter()
+    deadline = start + duration
+    threads = [threading.Thread(target=_client, args=(url, endpoint, texts, deadline, index * 1000000,
+                                                      latencies, statuses, lock, timeout))
+               for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ok = statuses.get(200, 0)
+    result = {'concurrency': concurrency, 'requests': sum(statuses.values()), 'ok': ok,
+              'seconds': round(elapsed, 2), 'rps': round(ok / elapsed, 2),
+              'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)}}
+    if latencies:
+        values = np.array(latencies) * 1000
+        result.update({
+            'p50_ms': round(float(np.percentile(values, 50)), 2),
+            'p95_ms': round(float(np.percentile(values, 95)), 2),
+            'p99_ms': round(float(np.percentile(values, 99)), 2)
+        })
+    return result
+
+
+def compare(baseline: Dict, current: Dict):
+    print(f"{'uç':<10}{'eşzamanlı':>10}{'istek/sn':>26}{'p95 (ms)':>26}")
+    for endpoint, levels in current['results'].items():
+        old_levels = {level['concurrency']: level for level in baseline.get('results', {}).get(endpoint, [])}
+        for level in levels:
+            old = old_levels.get(level['concurrency'])
+            if not old:
+                continue
+            ratio = level['rps'] / old['rps'] if old['rps'] else float('inf')
+            print(f"{endpoint:<10}{level['concurrency']:>10}"
+                  f"{old['rps']:>10.1f} → {level['rps']:<8.1f}{ratio:>5.2f}x"
+                  f"{old.get('p95_ms', 0):>12.1f} → {level.get('p95_ms', 0):<10.1f}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='CV değerlendirme sunucusu yük testi')
+    parser.add_argument('url', help='Sunucu adresi (ör. http://localhost:5000)')
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument('-c', '--concurrency', nargs='+', type=int, default=[1, 4, 16])
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='Düzey başına süre (saniye)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='İstek zaman aşımı (saniye)')
+    parser.add_argument('--label', help='Sonuca yazılacak açıklama (ör. gunicorn-4-sync)')
+    parser.add_argument('-o', '--output', help='JSON çıktı dosyası (varsayılan: stdout)')
+    parser.add_argument('--compare', help='Karşılaştırılacak önceki JSON sonucu')
+    args = parser.parse_args(argv)
+
+    report = {'meta': {'url': args.url, 'label': args.label, 'cpu_count': os.cpu_count(),
+                       'duration': args.duration, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+              'results': {}}
+    for endpoint in args.endpoints:
+        for concurrency in args.concurrency:
+            result = run_level(args.url, endpoint, concurrency, args.duration, args.timeout)
+            report['results'].setdefault(endpoint, []).append(result)
+            print(f"{endpoint} x{concurrency}: {result['rps']} istek/sn, p95 {result.get('p95_ms')} ms, "
+                  f"durum {result['statuses']}", file=sys.stderr)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    elif not args.compare:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare(json.load(file), report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Süreç başına benzersiz ve paylaşılan bellek raporu (Linux /proc).
+
+Gunicorn ana süreci ve worker'ları için RSS, PSS, USS (yalnızca o sürece ait
+sayfalar) ve paylaşılan sayfaları; ayrıca slim model dosyalarının eşlenmiş
+sayfalarını gösterir. Yeni bir worker yaklaşık olarak bir worker'ın USS'i kadar
+bellek ekler; rapor bu değerle boş bellekte kaç worker daha çalışabileceğini
+tahmin eder.
+
+    python memory_report.py --pid <gunicorn ana süreç pid'i>
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List, Optional
+
+# smaps_rollup alanı -> rapor alanı (kB cinsinden okunur, byte olarak raporlanır)
+_ROLLUP_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty', 'Swap')
+
+
+def _parse_kb_fields(lines, fields=_ROLLUP_FIELDS) -> Dict[str, int]:
+    values = dict.fromkeys(fields, 0)
+    for line in lines:
+        name, _, rest = line.partition(':')
+        if name in values:
+            values[name] += int(rest.split()[0]) * 1024
+    return values
+
+
+def _summary(values: Dict[str, int]) -> Dict[str, int]:
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'uss': values['Private_Clean'] + values['Private_Dirty'],
+        'shared': values['Shared_Clean'] + values['Shared_Dirty'],
+        'swap': values['Swap']
+    }
+
+
+def process_memory(pid: int) -> Dict[str, int]:
+    """Sürecin toplam bellek kullanımı (byte)"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as file:
+            return _summary(_parse_kb_fields(file))
+    except FileNotFoundError:
+        if not os.path.exists(f'/proc/{pid}'):
+            raise
+        # smaps_rollup olmayan eski çekirdekler
+        with open(f'/proc/{pid}/smaps') as file:
+            return _summary(_parse_kb_fields(file))
+
+
+def mapped_file_memory(pid: int, directory: str) -> Dict[str, int]:
+    """Verilen klasördeki dosyaların (ör. mmap ile açılmış model dizileri) süreçteki sayfaları"""
+    prefix = os.path.realpath(directory) + os.sep
+    values = dict.fromkeys(_ROLLUP_FIELDS, 0)
+    files = 0
+    inside = False
+    with open(f'/proc/{pid}/smaps') as file:
+        for line in file:
+            first = line.split(None, 1)[0]
+            if not first.endswith(':'):
+                # Eşleme başlığı: adres izinler offset aygıt inode [yol]
+                parts = line.split(None, 5)
+                path = parts[5].strip() if len(parts) > 5 else ''
+                inside = path.startswith(prefix)
+                files += inside
+            elif inside:
+                name = first[:-1]
+                if name in values:
+                    values[name] += int(line.split()[1]) * 1024
+    summary = _summary(values)
+    summary['mappings'] = files
+    return summary
+
+
+def child_pids(pid: int) -> List[int]:
+    children: List[int] = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as file:
+                children.extend(int(child) for child in file.read().split())
+    except OSError:
+        pass
+    return sorted(set(children))
+
+
+def _command(pid: int) -> str:
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as file:
+            return file.read().replace(b'\0', b' ').decode('utf-8', 'replace').strip()
+    except OSError:
+        return ''
+
+
+def _mem_available() -> Optional[int]:
+    try:
+        with open('/proc/meminfo') as file:
+            return _parse_kb_fields(file, ('MemAvailable',))['MemAvailable']
+    except OSError:
+        return None
+
+
+def memory_report(root_pid: Optional[int] = None, model_dir: Optional[str] = None) -> Dict:
+    """Ana süreç ve doğrudan alt süreçleri (worker'lar) için bellek raporu"""
+    if not os.path.exists('/proc/self/smaps'):
+        return {'supported': False}
+    root_pid = root_pid or os.getpid()
+    if model_dir is None:
+        from model_registry import DEFAULT_SLIM_MODEL_DIR
+        model_dir = DEFAULT_SLIM_MODEL_DIR
+
+    processes = []
+    for role, pid in [('master', root_pid)] + [('worker', pid) for pid in child_pids(root_pid)]:
+        try:
+            entry = {'pid': pid, 'role': role, 'command': _command(pid)}
+            entry.update(process_memory(pid))
+            entry['model'] = mapped_file_memory(pid, model_dir)
+        except OSError:
+            # Bu arada kapanan worker
+            continue
+        processes.append(entry)
+
+    workers = [entry for entry in processes if entry['role'] == 'worker'] or processes
+    average_uss = sum(entry['uss'] for entry in workers) // max(len(workers), 1)
+    available = _mem_available()
+    return {
+        'supported': True,
+        'processes': processes,
+        'total_pss': sum(entry['pss'] for entry in processes),
+        'total_uss': sum(entry['uss'] for entry in processes),
+        'average_worker_uss': average_uss,
+        'mem_available': available,
+        # Yeni worker başına yaklaşık maliyet benzersiz sayfalarıdır
+        'additional_workers_estimate': available // average_uss if available and average_uss else None
+    }
+
+
+def _mb(value: Optional[int]) -> str:
+    return '-' if value is None else f'{value / (1024 * 1024):.1f}'
+
+
+def format_report(report: Dict) -> str:
+    if not report.get('supported'):
+        return 'Bellek raporu yalnızca Linux (/proc) üzerinde desteklenir'
+    lines = [f"{'PID':>7} {'ROL':<7} {'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8} {'PAYLAŞ. MB':>10} "
+             f"{'MODEL RSS':>9} {'MODEL PAYLAŞ.':>13}"]
+    for entry in report['processes']:
+        lines.append(f"{entry['pid']:>7} {entry['role']:<7} {_mb(entry['rss']):>8} {_mb(entry['pss']):>8} "
+                     f"{_mb(entry['uss']):>8} {_mb(entry['shared']):>10} {_mb(entry['model']['rss']):>9} "
+                     f"{_mb(entry['model']['shared']):>13}")
+    lines.append(f"Toplam PSS: {_mb(report['total_pss'])} MB, worker başına ortalama USS: "
+                 f"{_mb(report['average_worker_uss'])} MB, kullanılabilir bellek: {_mb(report['mem_available'])} MB")
+    if report['additional_workers_estimate'] is not None:
+        lines.append(f"Tahmini ek worker kapasitesi: {report['additional_workers_estimate']}")
+    return '\n'.join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Süreç başına benzersiz/paylaşılan bellek raporu')
+    parser.add_argument('--pid', type=int, default=None,
+                        help='Ana süreç (ör. gunicorn master); verilmezse bu süreç')
+    parser.add_argument('--model-dir', default=None, help='Eşlenmiş sayfaları raporlanacak model klasörü')
+    parser.add_argument('--json', action='store_true', help='JSON çıktı')
+    args = parser.parse_args(argv)
+
+    report = memory_report(args.pid, args.model_dir)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0 if report.get('supported') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Süre histogramları ve sayaçlar; Prometheus metin formatında /metrics çıktısı.
+
+Gunicorn worker'ları ayrı süreçler olduğundan CV_METRICS_DIR ayarlıysa her süreç
+kendi durumunu bu klasöre `metrics_<pid>.json` olarak yazar ve /metrics tüm
+dosyaları toplayarak döndürür. Sayaçların geriye gitmemesi için kapanan
+worker'ların dosyaları silinmez; klasör uygulama başlatılırken temizlenmelidir.
+"""
+
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+# Saniye cinsinden süre kovaları (Prometheus varsayılanlarına yakın)
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Byte cinsinden belge boyutu kovaları (üst sınır 16MB yükleme limiti)
+SIZE_BUCKETS = (1024, 5 * 1024, 10 * 1024, 50 * 1024, 100 * 1024, 500 * 1024,
+                1024 * 1024, 5 * 1024 * 1024, 16 * 1024 * 1024)
+
+METRICS = {
+    'cv_request_seconds': ('histogram', 'HTTP isteği süresi', DURATION_BUCKETS),
+    'cv_extraction_seconds': ('histogram', 'Dosyadan metin çıkarma süresi (formata göre)', DURATION_BUCKETS),
+    'cv_stage_seconds': ('histogram', 'Analiz aşaması süresi', DURATION_BUCKETS),
+    'cv_document_bytes': ('histogram', 'Yüklenen belge boyutu (formata göre)', SIZE_BUCKETS),
+    'cv_requests_total': ('counter', 'HTTP istek sayısı', None),
+    'cv_cache_lookups_total': ('counter', 'Sonuç önbelleği sorguları', None),
+    'cv_near_duplicates_total': ('counter', 'Yakın kopya CV tespitleri (işleme göre)', None),
+    'cv_errors_total': ('counter', 'Hata sayısı (türe göre)', None),
+}
+
+# İstek başına aşama süreleri (X-Timing başlığı için); istek dışında None
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('cv_request_timings', default=None)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class MetricsRegistry:
+    """Süreç içi metrik deposu; isteğe bağlı olarak klasördeki diğer süreçlerle birleşir"""
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        # Histogram: etiket -> [kova sayıları..., toplam, adet]
+        self._histograms: Dict[str, Dict[LabelKey, list]] = {}
+        self._last_flush = 0.0
+        self._pid = os.getpid()
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _check_pid(self):
+        # --preload ile fork edilen worker ana süreçteki sayıları devralmasın
+        if self._pid != os.getpid():
+            self._counters, self._histograms = {}, {}
+            self._pid = os.getpid()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._check_pid()
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        buckets = METRICS[name][2]
+        key = _label_key(labels)
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            self._check_pid()
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+            # Son kova +Inf; birikimli toplamlar çıktı sırasında hesaplanır
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def timer(self, name: str, timing_name: str = None, **labels) -> Iterator[None]:
+        """Bloğun süresini histograma ve (istek içindeyse) X-Timing dökümüne ekler"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(name, elapsed, **labels)
+            timings = _request_timings.get()
+            if timings is not None:
+                timing_name = timing_name or '.'.join(str(value) for value in labels.values()) or name
+                timings[timing_name] = timings.get(timing_name, 0.0) + elapsed
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._check_pid()
+            return {
+                'counters': {name: [[list(key), value] for key, value in series.items()]
+                             for name, series in self._counters.items()},
+                'histograms': {name: [[list(key), list(state)] for key, state in series.items()]
+                               for name, series in self._histograms.items()}
+            }
+
+    def flush(self, force: bool = False):
+        """Süreç durumunu paylaşılan klasöre yazar (en fazla flush_interval'da bir)"""
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+
+        path = os.path.join(self.directory, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(tmp_path, path)
+
+    def collect(self) -> Dict:
+        """Tüm süreçlerin toplanmış durumu"""
+        if not self.directory:
+            return self.snapshot()
+
+        self.flush(force=True)
+        counters: Dict[str, Dict[LabelKey, float]] = {}
+        histograms: Dict[str, Dict[LabelKey, list]] = {}
+        for name in os.listdir(self.directory):
+            if not (name.startswith('metrics_') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for metric, series in data.get('counters', {}).items():
+                target = counters.setdefault(metric, {})
+                for key, value in series:
+                    key = tuple(tuple(pair) for pair in key)
+                    target[key] = target.get(key, 0) + value
+            for metric, series in data.get('histograms', {}).items():
+                target = histograms.setdefault(metric, {})
+                for key, state in series:
+                    key = tuple(tuple(pair) for pair in key)
+                    current = target.get(key)
+                    target[key] = state if current is None else [a + b for a, b in zip(current, state)]
+
+        return {
+            'counters': {name: [[list(key), value] for key, value in series.items()]
+                         for name, series in counters.items()},
+            'histograms': {name: [[list(key), state] for key, state in series.items()]
+                           for name, series in histograms.items()}
+        }
+
+    def render(self) -> str:
+        """Prometheus metin formatı (text/plain; version=0.0.4)"""
+        data = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            if kind == 'counter':
+                series = data['counters'].get(name)
+            else:
+                series = data['histograms'].get(name)
+            if not series:
+                continue
+
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key, value in sorted(series, key=lambda item: item[0]):
+                labels = [(label, label_value) for label, label_value in key]
+                if kind == 'counter':
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(list(buckets) + ['+Inf'], value[:-2]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels + [("le", _format_value(bound))])} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-2])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    escaped = (name + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for name, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return f'{value:.1f}'
+    return repr(value)
+
+
+def start_request() -> object:
+    """İstek için boş bir süre dökümü başlatır; end_request'e verilecek token'ı döndürür"""
+    return _request_timings.set({})
+
+
+def end_request(token) -> Dict[str, float]:
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+def format_timing_header(timings: Dict[str, float]) -> str:
+    """X-Timing başlık değeri: `aşama;dur=ms` öğeleri (Server-Timing sözdizimi)"""
+    return ', '.join(f'{name};dur={elapsed * 1000:.2f}' for name, elapsed in timings.items())
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Süreç genelinde tek metrik deposu (CV_METRICS_DIR ile süreçler arası)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry(os.environ.get('CV_METRICS_DIR') or None)
+    return _registry
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_MODEL_PATH = os.environ.get(
+    'CV_MODEL_PATH', os.path.join(BASE_DIR, 'salary_prediction_model.joblib'))
+DEFAULT_ENCODER_PATH = os.environ.get(
+    'CV_ENCODER_PATH', os.path.join(BASE_DIR, 'salary_label_encoder.joblib'))
+DEFAULT_SLIM_MODEL_DIR = os.environ.get(
+    'CV_SLIM_MODEL_DIR', os.path.join(BASE_DIR, 'salary_model_slim'))
+# train_model.py'nin artifact'lardan sonra yazdığı eğitim manifest'i
+DEFAULT_MODEL_MANIFEST_PATH = os.environ.get(
+    'CV_MODEL_MANIFEST_PATH', os.path.join(BASE_DIR, 'salary_model_manifest.json'))
+# auto: slim model klasörü varsa onu, yoksa joblib Pipeline'ı kullanır
+DEFAULT_MODEL_FORMAT = os.environ.get('CV_MODEL_FORMAT', 'auto')
+DEFAULT_RELOAD_INTERVAL = float(os.environ.get('CV_MODEL_RELOAD_INTERVAL', '5'))
+# Slim model dizilerini kopyalamadan, worker'lar arasında paylaşılan sayfalardan oku
+DEFAULT_MODEL_MMAP = os.environ.get('CV_MODEL_MMAP', '1') != '0'
+
+# Başlangıçta modeli ısıtmak için kullanılan örnek satır
+WARM_UP_SAMPLE = {
+    'experience_num': 3.0,
+    'job_type': 'Software Development',
+    'key_skills': 'python, sql',
+    'location': 'Istanbul',
+    'job_desig': 'Software Engineer',
+    'skill_count': 2
+}
+
+
+class ModelBundle:
+    """Birlikte yüklenen model ve encoder çifti (yüklendikten sonra değişmez)"""
+
+    def __init__(self, model, encoder, signature: Tuple, loaded_at: float, model_format: str = 'joblib',
+                 manifest: Optional[Dict] = None):
+        self.model = model
+        self.encoder = encoder
+        self.signature = signature
+        self.loaded_at = loaded_at
+        # 'slim' modeller özellik sözlüklerinin listesini doğrudan kabul eder
+        self.format = model_format
+        # Eğitim manifest'i (sürüm, eğitim modu, ağaç sayısı, metrikler)
+        self.manifest = manifest
+
+    @property
+    def version(self) -> str:
+        """Slim modelde içerik sürümü; joblib modelde eğitim manifest'indeki
+        sürüm, manifest yoksa dosyaların mtime/boyut bilgisi"""
+        if self.format == 'slim':
+            return self.model.version
+        if self.manifest and self.manifest.get('version'):
+            return self.manifest['version']
+        return '-'.join(str(part) for part in self.signature)
+
+
+class ModelRegistry:
+    """Maaş modelini süreç başına bir kez yükleyen, ısıtan ve diskteki
+    dosya değiştiğinde yeni artifact'a atomik olarak geçen kayıt"""
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH,
+                 encoder_path: str = DEFAULT_ENCODER_PATH,
+                 reload_interval: Optional[float] = DEFAULT_RELOAD_INTERVAL,
+                 warm_up: bool = True, slim_dir: str = DEFAULT_SLIM_MODEL_DIR,
+                 model_format: str = DEFAULT_MODEL_FORMAT, mmap: bool = DEFAULT_MODEL_MMAP,
+                 manifest_path: str = DEFAULT_MODEL_MANIFEST_PATH):
+        if model_format not in ('auto', 'slim', 'joblib'):
+            raise ValueError(f"Geçersiz model biçimi: {model_format}")
+        self.model_path = model_path
+        self.encoder_path = encoder_path
+        self.slim_dir = slim_dir
+        self.manifest_path = manifest_path
+        self.model_format = model_format
+        self.mmap = mmap
+        self.reload_interval = reload_interval
+        self.warm_up = warm_up
+
+        self._bundle: Optional[ModelBundle] = None
+        self._load_lock = threading.Lock()
+        self._last_check = 0.0
+        self._load_attempted = False
+
+    def get(self) -> Optional[ModelBundle]:
+        """Güncel model paketini döndürür; gerekirse ilk yüklemeyi veya
+        yeniden yüklemeyi yapar. Model yoksa None döner."""
+        if self._bundle is None and not self._load_attempted:
+            return self.load()
+
+        if self.reload_interval is not None and self.reload_interval >= 0:
+            now = time.monotonic()
+            if now - self._last_check >= self.reload_interval:
+                self._last_check = now
+                self._reload_if_changed()
+        return self._bundle
+
+    def load(self, blocking: bool = True) -> Optional[ModelBundle]:
+        """Modeli (yeniden) yükler ve yeni paketi devreye alır"""
+        # Başka bir thread zaten yüklüyorsa (blocking=False) eski modelle devam et
+        if not self._load_lock.acquire(blocking=blocking):
+            return self._bundle
+
+        try:
+            self._load_attempted = True
+            self._last_check = time.monotonic()
+            try:
+                bundle = self._load_bundle()
+            except FileNotFoundError:
+                logger.warning("Maaş tahmin modeli bulunamadı. Model dosyalarını kontrol edin.")
+                return self._bundle
+            except Exception as e:
+                # Yarım yazılmış dosya vb. durumlarda eski modele devam edilir
+                logger.error(f"Model yüklenemedi, mevcut model kullanılmaya devam ediliyor: {str(e)}")
+                return self._bundle
+
+            # Referans ataması atomiktir; eşzamanlı istekler ya eski ya yeni paketi görür
+            self._bundle = bundle
+            logger.info(f"Maaş modeli yüklendi (sürüm: {bundle.version})")
+            return bundle
+        finally:
+            self._load_lock.release()
+
+    def info(self) -> Dict:
+        """Yüklü model hakkında özet bilgi"""
+        bundle = self._bundle
+        return {
+            'loaded': bundle is not None,
+            'model_path': self.slim_dir if bundle and bundle.format == 'slim' else self.model_path,
+            'format': bundle.format if bundle else None,
+            'mmap': bool(bundle and bundle.format == 'slim' and self.mmap),
+            'version': bundle.version if bundle else None,
+            'training': self._training_summary(bundle),
+            'loaded_at': bundle.loaded_at if bundle else None
+        }
+
+    def _reload_if_changed(self):
+        try:
+            signature = self._file_signature()
+        except FileNotFoundError:
+            return
+
+        bundle = self._bundle
+        if bundle is not None and signature == bundle.signature:
+            return
+
+        logger.info("Model dosyası değişti, yeniden yükleniyor")
+        self.load(blocking=False)
+
+    def _use_slim(self) -> bool:
+        if self.model_format == 'auto':
+            from slim_model import MANIFEST_NAME
+            return os.path.exists(os.path.join(self.slim_dir, MANIFEST_NAME))
+        return self.model_format == 'slim'
+
+    def _file_signature(self) -> Tuple:
+        if self._use_slim():
+            # Manifest en son ve atomik olarak yazılır; dizi dosyaları sürüm adı taşır
+            from slim_model import MANIFEST_NAME
+            manifest_stat = os.stat(os.path.join(self.slim_dir, MANIFEST_NAME))
+            return ('slim', manifest_stat.st_mtime_ns, manifest_stat.st_size)
+        model_stat = os.stat(self.model_path)
+        encoder_stat = os.stat(self.encoder_path)
+        signature = (model_stat.st_mtime_ns, model_stat.st_size,
+                     encoder_stat.st_mtime_ns, encoder_stat.st_size)
+        # Manifest artifact'lardan sonra yazılır; değişmesi eğitimin bittiğini gösterir
+        if os.path.exists(self.manifest_path):
+            manifest_stat = os.stat(self.manifest_path)
+            signature += (manifest_stat.st_mtime_ns,)
+        return signature
+
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _training_summary(bundle: Optional[ModelBundle]) -> Optional[Dict]:
+        if bundle is None or not bundle.manifest:
+            return None
+        manifest = bundle.manifest
+        return {key: manifest.get(key) for key in
+                ('version', 'parent_version', 'mode', 'n_estimators', 'created_at')}
+
+    def _load_bundle(self) -> ModelBundle:
+        signature = self._file_signature()
+        if signature[0] == 'slim':
+            # sklearn ve pandas yüklenmez; diziler numpy ile okunur
+            from slim_model import load_slim_model
+            model = load_slim_model(self.slim_dir, mmap=self.mmap)
+            manifest = self._read_manifest()
+            # Manifest slim klasöründen farklı bir eğitime aitse eşleştirilmez
+            if manifest and manifest.get('slim_version') != model.version:
+                manifest = None
+            bundle = ModelBundle(model, model.encoder, signature, time.time(), model_format='slim',
+                                 manifest=manifest)
+        else:
+            import joblib
+            model = joblib.load(self.model_path)
+            encoder = joblib.load(self.encoder_path)
+            bundle = ModelBundle(model, encoder, signature, time.time(), manifest=self._read_manifest())
+
+        if self.warm_up:
+            self._warm_up(bundle)
+        return bundle
+
+    def _warm_up(self, bundle: ModelBundle):
+        """İlk isteğin gecikmesini azaltmak için örnek bir tahmin yapar"""
+        start = time.perf_counter()
+        # Servis yolu: predict_proba ve sınıf etiketleri
+        if bundle.format == 'slim':
+            bundle.model.predict_proba([WARM_UP_SAMPLE])
+        else:
+            import pandas as pd
+            bundle.model.predict_proba(pd.DataFrame([WARM_UP_SAMPLE]))
+        bundle.encoder.inverse_transform(bundle.model.classes_)
+        logger.info(f"Model ısıtma tamamlandı ({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Süreç genelinde paylaşılan model kaydını döndürür"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
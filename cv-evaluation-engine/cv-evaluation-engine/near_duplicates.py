@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Yakın kopya CV tespiti (kelime shingle'ları + MinHash + LSH).
+
+Aynı adayın küçük düzeltmeler, yeni bir tarih veya farklı dosya adıyla
+tekrar gönderilen CV'si birebir içerik hash'iyle yakalanmaz. Çıkarılan metnin
+5 kelimelik shingle'larından 128 değerli bir MinHash imzası hesaplanır; imza
+bantlara bölünüp her bant bir sözlükte aranır (LSH). Sorgu yalnızca en az bir
+bandı aynı olan adayları karşılaştırır, kayıt sayısıyla doğrusal büyümez.
+İki imzadaki eşit değerlerin oranı metinlerin Jaccard benzerliğini tahmin eder.
+
+    python near_duplicates.py klasor/*.pdf --threshold 0.85   # toplu tarama
+"""
+
+import os
+import sys
+import json
+import zlib
+import argparse
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from gazetteer import tokenize
+
+DEFAULT_THRESHOLD = float(os.environ.get('CV_NEAR_DUPLICATE_THRESHOLD', '0.9'))
+# off: kapalı, flag: sonuca near_duplicate bilgisi eklenir, reuse: yakın kopyanın
+# önbellekteki sonucu yeniden kullanılır (puanlama ve tahmin atlanır). İndeks
+# süreç içidir (gunicorn worker'ları paylaşmaz) ve imza istek başına birkaç ms
+# sürer; bu yüzden varsayılan olarak kapalıdır
+DEFAULT_MODE = os.environ.get('CV_NEAR_DUPLICATES', 'off')
+MODES = ('off', 'flag', 'reuse')
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+# Kayıt başına ~3,8 KB (imza ve bant anahtarları); varsayılan worker başına ~75 MB
+DEFAULT_MAX_ENTRIES = int(os.environ.get('CV_NEAR_DUPLICATE_MAX_ENTRIES', '20000'))
+
+# Çarp-kaydır hash ailesi: h(x) = ((a * x + b) mod 2^64) >> 32, a tek sayı
+_RANDOM = np.random.RandomState(1)
+_A = (_RANDOM.randint(0, 2 ** 32, NUM_PERM, dtype=np.uint64) << np.uint64(32) |
+      _RANDOM.randint(0, 2 ** 32, NUM_PERM, dtype=np.uint64) | np.uint64(1))[:, None]
+_B = (_RANDOM.randint(0, 2 ** 32, NUM_PERM, dtype=np.uint64) << np.uint64(32) |
+      _RANDOM.randint(0, 2 ** 32, NUM_PERM, dtype=np.uint64))[:, None]
+_EMPTY_SIGNATURE = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Ardışık size kelimenin (aksan/büyük harf katlanmış) 32 bit hash'leri"""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        tokens = tokens and [' '.join(tokens)]
+        size = 1
+    return np.unique(np.array([zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+                               for i in range(len(tokens) - size + 1)], dtype=np.uint64))
+
+
+def signature(text: str) -> np.ndarray:
+    """Metnin MinHash imzası (NUM_PERM adet uint32)"""
+    values = shingles(text)
+    if not len(values):
+        return _EMPTY_SIGNATURE.copy()
+    with np.errstate(over='ignore'):
+        hashed = (_A * values[None, :] + _B) >> np.uint64(32)
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """İmzalardan tahmini Jaccard benzerliği"""
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+def lsh_parameters(threshold: float, num_perm: int = NUM_PERM, recall: float = 0.95) -> Tuple[int, int]:
+    """(bant, satır) sayısı: eşikteki bir çifti en az recall olasılıkla aday yapan
+    bölmeler arasından eşik altındaki çiftleri en az aday yapanı (yanlış pozitif)"""
+    grid = np.linspace(0, threshold, 101)
+    best, best_error = None, None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        # Benzerliği s olan bir çiftin en az bir bantta eşleşme olasılığı
+        if 1 - (1 - threshold ** rows) ** bands < recall:
+            continue
+        probability = 1 - (1 - grid ** rows) ** bands
+        # Yamuk kuralı (np.trapz/np.trapezoid adı numpy sürümüne göre değişir)
+        error = float((probability[1:] + probability[:-1]).sum() / 2 * (grid[1] - grid[0]))
+        if best_error is None or error < best_error:
+            best, best_error = (bands, rows), error
+    return best or (num_perm, 1)
+
+
+class NearDuplicateIndex:
+    """Bellek içi LSH indeksi; en eski kayıtlar max_entries aşıldığında atılır"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 mode: str = 'flag'):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Geçersiz benzerlik eşiği: {threshold}")
+        if mode not in MODES[1:]:
+            raise ValueError(f"Geçersiz yakın kopya modu: {mode}")
+        self.threshold = threshold
+        self.mode = mode
+        self.max_entries = max_entries
+        self.bands, self.rows = lsh_parameters(threshold)
+        self._entries: 'OrderedDict[str, Tuple[np.ndarray, Dict]]' = OrderedDict()
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def query(self, text_signature: np.ndarray, exclude: Optional[str] = None,
+              scope=None) -> Optional[Tuple[str, float, Dict]]:
+        """Eşiği geçen en benzer kayıt: (anahtar, benzerlik, bilgi). exclude
+        anahtarlı kayıt (aynı metnin kendi kaydı) atlanır; scope verilirse
+        yalnızca aynı scope ile eklenen kayıtlar aranır."""
+        with self._lock:
+            candidates = set()
+            for band, key in zip(self._buckets, self._band_keys(text_signature)):
+                candidates.update(band.get(key, ()))
+            candidates.discard(exclude)
+            best = None
+            for key in candidates:
+                stored, meta = self._entries[key]
+                if scope is not None and meta.get('scope') != scope:
+                    continue
+                score = similarity(text_signature, stored)
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (key, score, meta)
+            return best
+
+    def add(self, key: str, text_signature: np.ndarray, meta: Optional[Dict] = None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (text_signature, meta or {})
+            for band, band_key in zip(self._buckets, self._band_keys(text_signature)):
+                band.setdefault(band_key, []).append(key)
+            while len(self._entries) > self.max_entries:
+                old_key, (old_signature, _) = self._entries.popitem(last=False)
+                for band, band_key in zip(self._buckets, self._band_keys(old_signature)):
+                    bucket = band[band_key]
+                    bucket.remove(old_key)
+                    if not bucket:
+                        del band[band_key]
+
+    def stats(self) -> Dict:
+        return {'entries': len(self._entries), 'threshold': self.threshold, 'mode': self.mode,
+                'bands': self.bands, 'rows': self.rows}
+
+    def _band_keys(self, text_signature: np.ndarray) -> List[bytes]:
+        return [text_signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)]
+
+
+def duplicate_groups(signatures: Dict[str, np.ndarray], threshold: float = DEFAULT_THRESHOLD) -> List[List[str]]:
+    """Toplu tarama: eşiği geçen çiftleri birleştirerek kopya gruplarını bulur"""
+    index = NearDuplicateIndex(threshold, max_entries=len(signatures) + 1)
+    parent = {name: name for name in signatures}
+
+    def root(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    for name, text_signature in signatures.items():
+        match = index.query(text_signature)
+        if match is not None:
+            parent[root(name)] = root(match[0])
+        index.add(name, text_signature)
+
+    groups: Dict[str, List[str]] = {}
+    for name in signatures:
+        groups.setdefault(root(name), []).append(name)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def index_from_env() -> Optional[NearDuplicateIndex]:
+    """CV_NEAR_DUPLICATES (off/flag/reuse), CV_NEAR_DUPLICATE_THRESHOLD; kapalıysa None"""
+    if DEFAULT_MODE not in MODES:
+        raise ValueError(f"Geçersiz CV_NEAR_DUPLICATES: {DEFAULT_MODE}")
+    if DEFAULT_MODE == 'off':
+        return None
+    return NearDuplicateIndex(DEFAULT_THRESHOLD, mode=DEFAULT_MODE)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='CV dosyalarında yakın kopyaları gruplar')
+    parser.add_argument('files', nargs='+', help='PDF, DOCX veya TXT dosyaları')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Tahmini Jaccard benzerlik eşiği (varsayılan: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--json', action='store_true', help='JSON çıktı')
+    args = parser.parse_args(argv)
+
+    from cv_processor import CVProcessor
+    processor = CVProcessor()
+    signatures = {}
+    for path in args.files:
+        try:
+            signatures[path] = signature(processor.extract_text(path))
+        except (OSError, ValueError) as e:
+            print(f"Atlandı: {path} ({e})", file=sys.stderr)
+
+    groups = duplicate_groups(signatures, args.threshold)
+    if args.json:
+        print(json.dumps({'files': len(signatures), 'groups': groups}, ensure_ascii=False, indent=1))
+    else:
+        for group in groups:
+            print(' = '.join(group))
+        print(f"{len(signatures)} dosya, {len(groups)} yakın kopya grubu "
+              f"({sum(len(group) for group in groups)} dosya)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """Analiz sonuçları için iki katmanlı önbellek.
+
+    - Bellek katmanı: süreç içi LRU + TTL
+    - Disk katmanı (isteğe bağlı): gunicorn worker'ları arasında paylaşılan SQLite dosyası
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 86400,
+                 db_path: Optional[str] = None, max_disk_entries: int = 100000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0,
+                          'sets': 0, 'evictions': 0, 'expired': 0, 'errors': 0}
+        self._disk_writes = 0
+
+        if self.db_path:
+            self._init_db()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Verilen parçalardan (içerik hash'i, model/kural sürümü...) anahtar üretir"""
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode('utf-8')
+            digest.update(hashlib.sha256(part).digest())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Önbellekteki sonucun sığ bir kopyasını döndürür, yoksa None"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters['hits'] += 1
+                    self._counters['memory_hits'] += 1
+                    get_metrics().inc('cv_cache_lookups_total', result='hit', tier='memory')
+                    return dict(value)
+                del self._memory[key]
+                self._counters['expired'] += 1
+
+        value = self._disk_get(key, now) if self.db_path else None
+        with self._lock:
+            if value is None:
+                self._counters['misses'] += 1
+                get_metrics().inc('cv_cache_lookups_total', result='miss', tier='none')
+                return None
+            self._counters['hits'] += 1
+            self._counters['disk_hits'] += 1
+        get_metrics().inc('cv_cache_lookups_total', result='hit', tier='disk')
+
+        # Diskten gelen sonuç bellek katmanına da alınır
+        self._memory_set(key, value, now)
+        return dict(value)
+
+    def set(self, key: str, value: Dict):
+        now = time.time()
+        self._memory_set(key, value, now)
+        if self.db_path:
+            self._disk_set(key, value, now)
+        with self._lock:
+            self._counters['sets'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            try:
+                with self._connection() as conn:
+                    conn.execute('DELETE FROM results')
+            except sqlite3.Error as e:
+                logger.error(f"Önbellek temizlenemedi: {str(e)}")
+
+    def stats(self) -> Dict:
+        """İsabet/ıska sayaçları ve katman boyutları"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['disk_enabled'] = bool(self.db_path)
+        return stats
+
+    def _memory_set(self, key: str, value: Dict, now: float):
+        if self.max_entries <= 0:
+            return
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._memory[key] = (expires_at, dict(value))
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 bağlantıları thread'ler arasında paylaşılmaz
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_results_created ON results(created_at)')
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict]:
+        try:
+            row = self._connection().execute(
+                'SELECT value, expires_at FROM results WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Önbellek okunamadı: {str(e)}")
+            with self._lock:
+                self._counters['errors'] += 1
+            return None
+
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            with self._lock:
+                self._counters['expired'] += 1
+            return None
+        return json.loads(value)
+
+    def _disk_set(self, key: str, value: Dict, now: float):
+        expires_at = now + self.ttl if self.ttl else None
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO results (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)',
+                    (key, json.dumps(value, ensure_ascii=False), now, expires_at))
+
+                # Süresi dolan ve sınırı aşan kayıtlar ara ara temizlenir
+                self._disk_writes += 1
+                if self._disk_writes % 500 == 0:
+                    conn.execute('DELETE FROM results WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,))
+                    conn.execute('''
+                        DELETE FROM results WHERE key IN (
+                            SELECT key FROM results ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                        )
+                    ''', (self.max_disk_entries,))
+        except sqlite3.Error as e:
+            logger.error(f"Önbelleğe yazılamadı: {str(e)}")
+            with self._lock:
+                self._counters['errors'] += 1
+
+
+def cache_from_env() -> ResultCache:
+    """Ortam değişkenlerinden önbellek oluşturur (CV_CACHE_SIZE, CV_CACHE_TTL, CV_CACHE_DB)"""
+    ttl = float(os.environ.get('CV_CACHE_TTL', '86400'))
+    return ResultCache(
+        max_entries=int(os.environ.get('CV_CACHE_SIZE', '1024')),
+        ttl=ttl if ttl > 0 else None,
+        db_path=os.environ.get('CV_CACHE_DB') or None
+    )
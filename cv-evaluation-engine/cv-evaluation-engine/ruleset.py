@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Puanlama ve maaş tahmini kuralları (yetenekler, eğitim seviyeleri, iş
+türleri, lokasyonlar, unvan desenleri, puan eşikleri) tek bir JSON dosyasından
+yüklenir ve yükleme anında arama yapılarına derlenir.
+
+Müşteriye özel taksonomiler CV_RULESET_DIR altında `<müşteri>.json` olarak
+durur ve temel kural setinin üzerine uygulanır: `skills` kategorileri
+birleştirilir, diğer alanlar tamamen değiştirilir. Dosyalar değiştiğinde
+kural seti yeniden başlatma olmadan yeniden derlenir.
+
+Büyük lokasyon listeleri (ör. aday havuzundaki tüm şehirler) `location_files`
+alanında verilen, satır başına `ad<TAB>kanonik ad` içeren dosyalardan okunur;
+yollar onları tanımlayan JSON dosyasına göredir."""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from keyword_matcher import KeywordMatcher
+from gazetteer import GazetteerIndex
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_RULESET_PATH = os.environ.get('CV_RULESET_PATH', os.path.join(BASE_DIR, 'ruleset.json'))
+DEFAULT_CUSTOMER_DIR = os.environ.get('CV_RULESET_DIR', os.path.join(BASE_DIR, 'rulesets'))
+DEFAULT_RELOAD_INTERVAL = float(os.environ.get('CV_RULESET_RELOAD_INTERVAL', '5'))
+
+REQUIRED_FIELDS = ('skills', 'education_levels', 'relevant_fields', 'salary_skills',
+                   'job_types', 'locations', 'title_patterns', 'scoring')
+CUSTOMER_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class UnknownRulesetError(ValueError):
+    """İstenen müşteri kural seti bulunamadı"""
+
+
+def _order(keywords) -> Dict[str, int]:
+    """Anahtar kelime -> ilk geçtiği sıra (listelerdeki 'ilk eşleşen kazanır' kuralı için)"""
+    order: Dict[str, int] = {}
+    for keyword in keywords:
+        order.setdefault(keyword, len(order))
+    return order
+
+
+class Ruleset:
+    """Derlenmiş, değişmez kural seti. Puanlama tek geçişli eşleştiricinin
+    bulduğu kelimeler üzerinden yapılır; anahtar kelime sayısından bağımsızdır."""
+
+    def __init__(self, data: Dict, name: str = 'default', signature: Tuple = (), files: Tuple = ()):
+        missing = [field for field in REQUIRED_FIELDS if field not in data]
+        if missing:
+            raise ValueError(f"Kural setinde eksik alanlar: {', '.join(missing)}")
+
+        self.name = name
+        self.signature = signature
+        # Değişiklikleri izlenen dosyalar (JSON ve lokasyon listeleri)
+        self.files = files
+        # Sürüm içerikten türetilir; önbellek anahtarlarına girer
+        self.version = hashlib.sha1(
+            json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
+        self.skills: Dict[str, Tuple[str, ...]] = {
+            category: tuple(keyword.lower() for keyword in keywords)
+            for category, keywords in data['skills'].items()
+        }
+        all_skills = [keyword for keywords in self.skills.values() for keyword in keywords]
+        self.skill_order = _order(all_skills)
+        # Birden çok kategoride geçen yetenek her kategori için ayrı sayılır
+        self.skill_weights: Dict[str, int] = {}
+        for keyword in all_skills:
+            self.skill_weights[keyword] = self.skill_weights.get(keyword, 0) + 1
+
+        self.education_levels: Dict[str, int] = {
+            level.lower(): score for level, score in data['education_levels'].items()}
+        self.education_order = _order(self.education_levels)
+        self.relevant_fields: Tuple[str, ...] = tuple(field.lower() for field in data['relevant_fields'])
+        self.field_order = _order(self.relevant_fields)
+
+        self.salary_skills: Tuple[str, ...] = tuple(skill.lower() for skill in data['salary_skills'])
+        self.salary_skill_order = _order(self.salary_skills)
+        # İş türleri ve lokasyonlar token n-gram indeksleriyle aranır; arama
+        # maliyeti liste boyutundan bağımsızdır (bkz. gazetteer)
+        self.job_type_index = GazetteerIndex(data['job_types'].items())
+        self.location_index = GazetteerIndex(data['locations'].items())
+        self.title_patterns = tuple(re.compile(pattern) for pattern in data['title_patterns'])
+
+        scoring = data['scoring']
+        self.max_skills_score = scoring['max_skills_score']
+        self.max_education_score = scoring['max_education_score']
+        self.field_relevance_bonus = scoring['field_relevance_bonus']
+        # (en az yıl, puan) çiftleri; büyükten küçüğe denenir
+        self.experience_points = tuple(sorted(
+            ((float(years), points) for years, points in scoring['experience_points']), reverse=True))
+        self.max_period_years = scoring['max_period_years']
+        self.reference_year = scoring['reference_year']
+
+        self.suffix_groups: FrozenSet[str] = frozenset(data.get('suffix_groups', ()))
+        self.matcher = KeywordMatcher({
+            'skills': self.skill_order,
+            'education_levels': self.education_levels,
+            'relevant_fields': self.relevant_fields,
+            'salary_skills': self.salary_skills
+        }, suffix_groups=self.suffix_groups)
+
+    def first(self, found, order: Dict[str, int]) -> Optional[str]:
+        """Bulunan kelimelerden kural listesinde en önce gelen"""
+        return min(found, key=order.__getitem__) if found else None
+
+    def ordered(self, found, order: Dict[str, int]) -> List[str]:
+        """Bulunan kelimeler kural listesindeki sırayla"""
+        return sorted(found, key=order.__getitem__)
+
+    def experience_score(self, years: float) -> int:
+        for min_years, points in self.experience_points:
+            if years >= min_years:
+                return points
+        return 0
+
+
+def merge_rules(base: Dict, overlay: Dict) -> Dict:
+    """Müşteri dosyasını temel kural setinin üzerine uygular"""
+    merged = dict(base)
+    for field, value in overlay.items():
+        if field == 'skills':
+            merged['skills'] = {**base.get('skills', {}), **value}
+        elif field == 'scoring':
+            merged['scoring'] = {**base.get('scoring', {}), **value}
+        else:
+            merged[field] = value
+    return merged
+
+
+def _read_json(path: str) -> Dict:
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    # Lokasyon dosyaları tanımlandıkları JSON dosyasının dizinine göre çözülür
+    if 'location_files' in data:
+        base = os.path.dirname(os.path.abspath(path))
+        data['location_files'] = [os.path.join(base, name) for name in data['location_files']]
+    return data
+
+
+def read_gazetteer(path: str) -> Dict[str, str]:
+    """`ad<TAB>kanonik ad` satırlarından ad -> değer eşlemesi; kanonik ad
+    verilmezse adın kendisi kullanılır. Boş ve '#' ile başlayan satırlar atlanır."""
+    entries: Dict[str, str] = {}
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name, _, value = line.partition('\t')
+            entries.setdefault(name.strip(), value.strip() or name.strip())
+    return entries
+
+
+class RulesetRegistry:
+    """Temel ve müşteriye özel kural setlerini süreç başına bir kez derleyen,
+    dosyalar değiştiğinde yeni sürüme atomik olarak geçen kayıt"""
+
+    def __init__(self, path: str = DEFAULT_RULESET_PATH, customer_dir: str = DEFAULT_CUSTOMER_DIR,
+                 reload_interval: Optional[float] = DEFAULT_RELOAD_INTERVAL):
+        self.path = path
+        self.customer_dir = customer_dir
+        self.reload_interval = reload_interval
+
+        self._rulesets: Dict[Optional[str], Ruleset] = {}
+        self._last_check: Dict[Optional[str], float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, customer: Optional[str] = None) -> Ruleset:
+        """Güncel kural setini döndürür (customer verilmezse temel set)"""
+        customer = customer or None
+        ruleset = self._rulesets.get(customer)
+        if ruleset is None:
+            return self.load(customer, only_if_missing=True)
+
+        if self.reload_interval is not None and self.reload_interval >= 0:
+            now = time.monotonic()
+            if now - self._last_check.get(customer, 0.0) >= self.reload_interval:
+                self._last_check[customer] = now
+                try:
+                    changed = self._signature(ruleset.files) != ruleset.signature
+                except FileNotFoundError:
+                    changed = False
+                if changed:
+                    logger.info(f"Kural seti dosyası değişti, yeniden derleniyor ({ruleset.name})")
+                    return self.load(customer)
+        return ruleset
+
+    def load(self, customer: Optional[str] = None, only_if_missing: bool = False) -> Ruleset:
+        """Kural setini (yeniden) derler. Derleme başarısız olursa mevcut
+        sürümle devam edilir; hiç sürüm yoksa hata yükseltilir."""
+        customer = customer or None
+        with self._lock:
+            if only_if_missing and customer in self._rulesets:
+                # Başka bir thread aynı seti bu arada derledi
+                return self._rulesets[customer]
+            self._last_check[customer] = time.monotonic()
+            try:
+                ruleset = self._compile(customer)
+            except UnknownRulesetError:
+                raise
+            except Exception as e:
+                current = self._rulesets.get(customer)
+                if current is None:
+                    raise
+                logger.error(f"Kural seti derlenemedi, mevcut sürüm kullanılmaya devam ediliyor: {str(e)}")
+                return current
+
+            # Referans ataması atomiktir; eşzamanlı istekler ya eski ya yeni seti görür
+            self._rulesets[customer] = ruleset
+            logger.info(f"Kural seti yüklendi ({ruleset.name}, sürüm: {ruleset.version})")
+            return ruleset
+
+    def customers(self) -> List[str]:
+        """CV_RULESET_DIR altındaki müşteri kural setleri"""
+        if not os.path.isdir(self.customer_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.customer_dir)
+                      if name.endswith('.json') and CUSTOMER_NAME_PATTERN.match(name[:-5]))
+
+    def info(self) -> Dict:
+        return {
+            'path': self.path,
+            'customers': self.customers(),
+            'loaded': {ruleset.name: ruleset.version for ruleset in list(self._rulesets.values())}
+        }
+
+    def _customer_path(self, customer: str) -> str:
+        if not CUSTOMER_NAME_PATTERN.match(customer):
+            raise UnknownRulesetError(f"Geçersiz müşteri adı: {customer}")
+        path = os.path.join(self.customer_dir, f'{customer}.json')
+        if not os.path.exists(path):
+            raise UnknownRulesetError(f"Müşteri kural seti bulunamadı: {customer}")
+        return path
+
+    @staticmethod
+    def _signature(paths) -> Tuple:
+        signature = ()
+        for path in paths:
+            stat = os.stat(path)
+            signature += (stat.st_mtime_ns, stat.st_size)
+        return signature
+
+    def _compile(self, customer: Optional[str]) -> Ruleset:
+        paths = [self.path] + ([self._customer_path(customer)] if customer else [])
+        signature = self._signature(paths)
+        data = _read_json(self.path)
+        if customer:
+            data = merge_rules(data, _read_json(paths[1]))
+
+        location_files = data.pop('location_files', [])
+        if location_files:
+            # JSON'daki lokasyonlar aynı ad için dosyalardakilerden önceliklidir
+            locations = dict(data['locations'])
+            for path in location_files:
+                for name, value in read_gazetteer(path).items():
+                    locations.setdefault(name, value)
+            data['locations'] = locations
+            signature += self._signature(location_files)
+            paths += location_files
+        return Ruleset(data, name=customer or 'default', signature=signature, files=tuple(paths))
+
+
+_registry: Optional[RulesetRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_ruleset_registry() -> RulesetRegistry:
+    """Süreç genelinde paylaşılan kural seti kaydı"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = RulesetRegistry()
+    return _registry
@@ -1,18 +1,13 @@
-import joblib
-import pandas as pd
-import re
-from typing import Dict, List, Tuple
-from utils import TextProcessor
+from typing import Dict, List, Union
+from model_registry import ModelRegistry, get_registry
+from analysis import AnalysisContext
+from ruleset import RulesetRegistry, get_ruleset_registry
+from metrics import get_metrics
 
 class SalaryPredictor:
-    def __init__(self):
-        try:
-            self.model = joblib.load('salary_prediction_model.joblib')
-            self.encoder = joblib.load('salary_label_encoder.joblib')
-            self.model_loaded = True
-        except FileNotFoundError:
-            print("⚠️ Maaş tahmin modeli bulunamadı. Model dosyalarını kontrol edin.")
-            self.model_loaded = False
+    def __init__(self, registry: ModelRegistry = None, rulesets: RulesetRegistry = None):
+        # Model dosyaları süreç başına bir kez yüklenir ve paylaşılır
+        self.registry = registry if registry is not None else get_registry()
         
         self.label_to_range = {
             'low': '$40.000 - $60.000',
@@ -20,211 +15,154 @@ class SalaryPredictor:
             'high': '$100.000 - $200.000'
         }
         
-        self.job_type_mapping = {
-            'data science': 'Analytics',
-            'data scientist': 'Analytics',
-            'data analyst': 'Analytics',
-            'data visualization': 'Analytics',
-            'machine learning': 'Analytics',
-            'analytics': 'Analytics',
-            'software': 'Software Development',
-            'software engineer': 'Software Development',
-            'developer': 'Software Development',
-            'programmer': 'Software Development',
-            'web developer': 'Software Development',
-            'mobile developer': 'Software Development',
-            'backend': 'Software Development',
-            'frontend': 'Software Development',
-            'full stack': 'Software Development',
-            'devops': 'DevOps',
-            'cloud': 'DevOps',
-            'infrastructure': 'DevOps',
-            'system administrator': 'DevOps',
-            'product': 'Product Management',
-            'product manager': 'Product Management',
-            'project manager': 'Product Management',
-            'manager': 'Management',
-            'lead': 'Management',
-            'senior': 'Management',
-            'director': 'Management',
-            'cto': 'Management',
-            'ceo': 'Management'
-        }
-        
-        self.location_mapping = {
-            'istanbul': 'Istanbul',
-            'ankara': 'Ankara', 
-            'izmir': 'Izmir',
-            'bursa': 'Bursa',
-            'antalya': 'Antalya',
-            'adana': 'Adana',
-            'konya': 'Konya',
-            'gaziantep': 'Gaziantep',
-            'mersin': 'Mersin',
-            'diyarbakir': 'Diyarbakir',
-            'kayseri': 'Kayseri',
-            'eskisehir': 'Eskisehir',
-            'urfa': 'Urfa',
-            'malatya': 'Malatya',
-            'erzurum': 'Erzurum',
-            'van': 'Van',
-            'batman': 'Batman',
-            'elazig': 'Elazig',
-            'izmit': 'Izmit',
-            'manisa': 'Manisa',
-            'sivas': 'Sivas',
-            'gebze': 'Gebze',
-            'balikesir': 'Balikesir',
-            'kahramanmaras': 'Kahramanmaras',
-            'denizli': 'Denizli',
-            'sakarya': 'Sakarya',
-            'trabzon': 'Trabzon',
-            'ordu': 'Ordu',
-            'afyon': 'Afyon',
-            'mugla': 'Mugla',
-            'san francisco': 'San Francisco',
-            'san francisco, ca': 'San Francisco',
-            'san francisco ca': 'San Francisco',
-            'new york': 'New York',
-            'new york, ny': 'New York',
-            'new york ny': 'New York',
-            'london': 'London',
-            'london, uk': 'London',
-            'london uk': 'London',
-            'berlin': 'Berlin',
-            'berlin, germany': 'Berlin',
-            'berlin germany': 'Berlin',
-            'paris': 'Paris',
-            'paris, france': 'Paris',
-            'paris france': 'Paris',
-            'amsterdam': 'Amsterdam',
-            'amsterdam, netherlands': 'Amsterdam',
-            'amsterdam netherlands': 'Amsterdam',
-            'zurich': 'Zurich',
-            'zurich, switzerland': 'Zurich',
-            'zurich switzerland': 'Zurich',
-            'toronto': 'Toronto',
-            'toronto, canada': 'Toronto',
-            'toronto canada': 'Toronto',
-            'sydney': 'Sydney',
-            'sydney, australia': 'Sydney',
-            'sydney australia': 'Sydney',
-            'tokyo': 'Tokyo',
-            'tokyo, japan': 'Tokyo',
-            'tokyo japan': 'Tokyo',
-            'singapore': 'Singapore',
-            'singapore, singapore': 'Singapore',
-            'singapore singapore': 'Singapore',
-            'dubai': 'Dubai',
-            'dubai, uae': 'Dubai',
-            'dubai uae': 'Dubai'
-        }
+        # Yetenek listesi, iş türleri, lokasyonlar ve unvan desenleri ruleset.json'dan gelir
+        self.rulesets = rulesets if rulesets is not None else get_ruleset_registry()
     
-    def extract_experience(self, text: str) -> float:
-        """Deneyim yılını çıkarır - utils.TextProcessor kullanır"""
-        return TextProcessor.extract_experience_years(text)
+    def _context(self, text: Union[str, AnalysisContext]) -> AnalysisContext:
+        if isinstance(text, AnalysisContext):
+            return text
+        return AnalysisContext(text, self.rulesets.get())
     
-    def extract_job_type(self, text: str) -> str:
-        text_lower = text.lower()
-        
-        for keyword, job_type in self.job_type_mapping.items():
-            if keyword in text_lower:
-                return job_type
-        
-        return 'Software Development'
+    @property
+    def model(self):
+        bundle = self.registry.get()
+        return bundle.model if bundle else None
     
-    def extract_location(self, text: str) -> str:
-        text_lower = text.lower()
-        
-        sorted_mappings = sorted(self.location_mapping.items(), key=lambda x: len(x[0]), reverse=True)
-        
-        for keyword, location in sorted_mappings:
-            if keyword in text_lower:
-                return location
+    @property
+    def encoder(self):
+        bundle = self.registry.get()
+        return bundle.encoder if bundle else None
+    
+    @property
+    def model_loaded(self) -> bool:
+        return self.registry.get() is not None
+    
+    def extract_experience(self, text: Union[str, AnalysisContext]) -> float:
+        """Deneyim yılını çıkarır - utils.TextProcessor kurallarını kullanır"""
+        return self._context(text).experience_years
+    
+    def extract_job_type(self, text: Union[str, AnalysisContext]) -> str:
+        context = self._context(text)
         
-        return 'Istanbul'
+        # Her konumda en uzun ad eşleşir ('product manager' içindeki 'manager'
+        # ayrıca sayılmaz); bulunanlardan kural dosyasında önce gelen kazanır
+        matches = context.ruleset.job_type_index.find(context.text)
+        return context.ruleset.job_type_index.first_listed(matches) or 'Software Development'
     
-    def extract_job_designation(self, text: str) -> str:
-        text_lower = text.lower()
+    def extract_location(self, text: Union[str, AnalysisContext]) -> str:
+        context = self._context(text)
+        # İletişim bilgilerindeki lokasyon, metnin geri kalanındakilerden önceliklidir
+        if context.document.location:
+            return context.document.location
         
-        title_patterns = [
-            r'(data\s+scientist|data\s+analyst|data\s+engineer|data\s+visualization\s+specialist)',
-            r'(software\s+engineer|developer|programmer|web\s+developer|mobile\s+developer)',
-            r'(senior\s+\w+|\w+\s+manager|lead\s+\w+|principal\s+\w+)',
-            r'(cto|ceo|director|head\s+of)',
-            r'(product\s+manager|project\s+manager|technical\s+lead)'
-        ]
+        # En uzun (en spesifik) eşleşme kazanır; eşitlikte metinde önce geçen
+        matches = context.ruleset.location_index.find(context.text)
+        return context.ruleset.location_index.longest(matches) or 'Istanbul'
+    
+    def extract_job_designation(self, text: Union[str, AnalysisContext]) -> str:
+        context = self._context(text)
         
-        for pattern in title_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in context.ruleset.title_patterns:
+            match = pattern.search(context.text_lower)
             if match:
-                return match.group(1).title()
+                return ' '.join(match.group(1).split()).title()
         
         return 'Software Engineer'
     
-    def extract_skills(self, text: str) -> str:
-        """Yetenekleri çıkarır - utils.TextProcessor kullanır"""
-        skills_keywords = [
-            'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
-            'sql', 'mysql', 'postgresql', 'oracle', 'mongodb', 'redis', 'cassandra', 'elasticsearch',
-            'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch', 'keras', 'matplotlib',
-            'seaborn', 'plotly', 'jupyter', 'anaconda', 'spark', 'hadoop', 'hive', 'pig',
-            'html', 'css', 'react', 'angular', 'vue', 'node.js', 'django', 'flask', 'fastapi',
-            'spring', 'express', 'laravel', 'symfony', 'asp.net', 'rails',
-            'aws', 'azure', 'gcp', 'google cloud', 'amazon web services', 'microsoft azure',
-            'kubernetes', 'docker', 'terraform', 'ansible',
-            'git', 'github', 'gitlab', 'jenkins', 'ci/cd', 'jira', 'confluence', 'slack',
-            'tableau', 'power bi', 'excel', 'vba', 'linux', 'unix', 'windows',
-            'unity3d', 'unity', 'spss', 'shiny', 'arcgis', 'adobe illustrator', 'illustrator'
-        ]
-        
-        found_skills = TextProcessor.extract_skills_from_text(text, skills_keywords)
+    def extract_skills(self, text: Union[str, AnalysisContext]) -> str:
+        """Yetenekleri çıkarır - paylaşılan anahtar kelime eşleştiricisini kullanır"""
+        context = self._context(text)
+        found_skills = context.ruleset.ordered(context.keyword_hits['salary_skills'],
+                                               context.ruleset.salary_skill_order)
         return ', '.join(found_skills[:10])
     
-    def predict_salary(self, cv_text: str) -> Dict[str, str]:
-        if not self.model_loaded:
-            return {
+    def extract_features(self, cv_text: Union[str, AnalysisContext]) -> Dict:
+        """Modelin beklediği özellik satırını üretir"""
+        context = self._context(cv_text)
+        skills = self.extract_skills(context)
+        return {
+            'experience_num': self.extract_experience(context),
+            'job_type': self.extract_job_type(context),
+            'key_skills': skills,
+            'location': self.extract_location(context),
+            'job_desig': self.extract_job_designation(context),
+            'skill_count': len(skills.split(', ')) if skills else 0
+        }
+    
+    def predict_salary(self, cv_text: Union[str, AnalysisContext]) -> Dict[str, str]:
+        return self.predict_salary_batch([cv_text])[0]
+    
+    def predict_salary_batch(self, texts: List[Union[str, AnalysisContext]]) -> List[Dict[str, str]]:
+        """Birden çok CV için maaş tahmini yapar. Özellikler tek bir DataFrame'de
+        toplanır; model ve encoder her parti için bir kez çağrılır."""
+        # Model ve encoder aynı paketten alınır; yeniden yükleme sırasında karışmaz
+        bundle = self.registry.get()
+        if bundle is None:
+            return [{
                 'salary_group': 'unknown',
                 'salary_range': 'Model yüklenemedi',
                 'confidence': 0.0
-            }
+            } for _ in texts]
         
-        try:
-            experience = self.extract_experience(cv_text)
-            job_type = self.extract_job_type(cv_text)
-            skills = self.extract_skills(cv_text)
-            location = self.extract_location(cv_text)
-            job_designation = self.extract_job_designation(cv_text)
-            skill_count = len(skills.split(', ')) if skills else 0
-            sample_data = pd.DataFrame([{
-                'experience_num': experience,
-                'job_type': job_type,
-                'key_skills': skills,
-                'location': location,
-                'job_desig': job_designation,
-                'skill_count': skill_count
-            }])
-            
-            predicted_class = self.model.predict(sample_data)[0]
-            predicted_salary_group = self.encoder.inverse_transform([predicted_class])[0]
-            
-            salary_range = self.label_to_range.get(predicted_salary_group, 'Bilinmeyen Aralık')
-            
-            confidence = min(0.95, max(0.4, experience / 8 + skill_count / 15))
-            
-            return {
-                'salary_group': predicted_salary_group,
-                'salary_range': salary_range,
-                'confidence': round(confidence, 2),
-                'experience_years': round(experience, 1),
-                'job_type': job_type,
-                'location': location,
-                'skill_count': skill_count
-            }
-            
-        except Exception as e:
-            return {
-                'salary_group': 'error',
-                'salary_range': f'Hata: {str(e)}',
-                'confidence': 0.0
-            }
+        metrics = get_metrics()
+        results: List[Dict] = [None] * len(texts)
+        rows, row_indices = [], []
+        with metrics.timer('cv_stage_seconds', stage='features'):
+            for index, cv_text in enumerate(texts):
+                try:
+                    rows.append(self.extract_features(cv_text))
+                    row_indices.append(index)
+                except Exception as e:
+                    results[index] = self._error_result(e)
+        
+        if rows:
+            try:
+                with metrics.timer('cv_stage_seconds', stage='predict'):
+                    # Slim model DataFrame'e ihtiyaç duymaz; pandas yalnızca joblib
+                    # Pipeline'ı için (ilk kullanımda) yüklenir
+                    if bundle.format == 'slim':
+                        features = rows
+                    else:
+                        import pandas as pd
+                        features = pd.DataFrame(rows)
+                    # Sınıf ve güven aynı (kalibre edilmiş) olasılık çağrısından gelir;
+                    # predict() de olasılığı en yüksek sınıfı seçer
+                    probabilities = bundle.model.predict_proba(features)
+                    groups = bundle.encoder.inverse_transform(bundle.model.classes_)
+                    best = probabilities.argmax(axis=1)
+                
+                for index, features, row, best_index in zip(row_indices, rows, probabilities, best):
+                    results[index] = self._format_prediction(features, groups, row, best_index)
+            except Exception as e:
+                for index in row_indices:
+                    results[index] = self._error_result(e)
+        
+        return results
+    
+    def _format_prediction(self, features: Dict, groups, probabilities, best_index: int) -> Dict:
+        experience = features['experience_num']
+        skill_count = features['skill_count']
+        
+        predicted_salary_group = str(groups[best_index])
+        salary_range = self.label_to_range.get(predicted_salary_group, 'Bilinmeyen Aralık')
+        
+        return {
+            'salary_group': predicted_salary_group,
+            'salary_range': salary_range,
+            # Tahmin edilen grubun modele göre olasılığı
+            'confidence': round(float(probabilities[best_index]), 2),
+            'probabilities': {str(group): round(float(probability), 3)
+                              for group, probability in zip(groups, probabilities)},
+            'experience_years': round(experience, 1),
+            'job_type': features['job_type'],
+            'location': features['location'],
+            'skill_count': skill_count
+        }
+    
+    def _error_result(self, error: Exception) -> Dict:
+        get_metrics().inc('cv_errors_total', type=type(error).__name__, stage='salary_prediction')
+        return {
+            'salary_group': 'error',
+            'salary_range': f'Hata: {str(error)}',
+            'confidence': 0.0
+        }
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Maaş modelinin sklearn gerektirmeyen, hızlı yüklenen çıkarım biçimi.
+
+train_model.py eğitilen Pipeline'ı (TfidfVectorizer + StandardScaler sütunları,
+RandomForestClassifier) bir klasöre aktarır: sözlükler ve idf değerleri,
+düzleştirilmiş ağaç düğümleri (`np.save` ile .npy, bellek eşlemeye uygun) ve
+bunları tanımlayan manifest.json. Model CalibratedClassifierCV ile kalibre
+edildiyse kalibrasyon eğrileri de aktarılır. SlimSalaryModel yalnızca numpy
+ile predict/predict_proba sonuçlarını birebir üretir.
+
+Diziler varsayılan olarak salt okunur bellek eşlemeyle (mmap) açılır: aynı
+makinedeki tüm worker'lar ağaç düğümlerini işletim sisteminin sayfa
+önbelleğindeki tek kopyadan okur, model yeniden yüklendiğinde de paylaşım bozulmaz."""
+
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_NAME = 'cv-salary-slim'
+FORMAT_VERSION = 3
+# 1: kalibrasyonsuz; 2: isteğe bağlı `calibration` alanı; 3: `labels` encoder'ın
+# tüm sınıflarıdır (önceden `classes` sırasıyla yalnızca modeldeki sınıflar)
+SUPPORTED_FORMAT_VERSIONS = (1, 2, 3)
+
+class SlimLabelEncoder:
+    """LabelEncoder.inverse_transform karşılığı; classes encoder.classes_ ile aynıdır
+    (model.classes_ değerleri bu listedeki sıralardır)"""
+
+    def __init__(self, classes: List[str]):
+        self.classes_ = np.asarray(classes)
+
+    def inverse_transform(self, encoded) -> np.ndarray:
+        return self.classes_.take(np.asarray(encoded, dtype=np.int64))
+
+
+class _TfidfColumn:
+    """TfidfVectorizer.transform karşılığı (kelime analizörü, l2 normu)"""
+
+    def __init__(self, spec: Dict, vocabulary: np.ndarray, idf: np.ndarray, offset: int):
+        self.name = spec['name']
+        self.lowercase = spec['lowercase']
+        self.token_pattern = re.compile(spec['token_pattern'])
+        self.min_n, self.max_n = spec['ngram_range']
+        self.sublinear_tf = spec['sublinear_tf']
+        self.norm = spec['norm']
+        self.vocabulary = {term: index for index, term in enumerate(vocabulary.tolist())}
+        self.idf = idf.tolist()
+        self.offset = offset
+        self.width = len(self.vocabulary)
+
+    def _terms(self, value) -> List[str]:
+        text = str(value)
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        if self.max_n == 1:
+            return tokens
+        terms = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n, len(tokens)) + 1):
+            terms.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def fill(self, values, out: np.ndarray):
+        for row, value in enumerate(values):
+            counts: Dict[int, int] = {}
+            for term in self._terms(value):
+                index = self.vocabulary.get(term)
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+            if not counts:
+                continue
+            # sklearn ile aynı sıra: sıralı sütunlar, sırayla toplanan kareler
+            indices = sorted(counts)
+            weights = []
+            for index in indices:
+                tf = float(counts[index])
+                if self.sublinear_tf:
+                    tf = float(np.log(tf)) + 1.0
+                weights.append(tf * self.idf[index])
+            if self.norm == 'l2':
+                total = 0.0
+                for weight in weights:
+                    total += weight * weight
+                if total != 0.0:
+                    total = float(np.sqrt(total))
+                    weights = [weight / total for weight in weights]
+            elif self.norm == 'l1':
+                total = 0.0
+                for weight in weights:
+                    total += abs(weight)
+                if total != 0.0:
+                    weights = [weight / total for weight in weights]
+            for index, weight in zip(indices, weights):
+                out[row, self.offset + index] = weight
+
+
+class _ScalerColumn:
+    """StandardScaler.transform karşılığı (tek sütun)"""
+
+    def __init__(self, spec: Dict, offset: int):
+        self.name = spec['name']
+        self.mean = spec['mean']
+        self.scale = spec['scale']
+        self.offset = offset
+        self.width = 1
+
+    def fill(self, values, out: np.ndarray):
+        column = np.asarray(values, dtype=np.float64)
+        if self.mean is not None:
+            column = column - self.mean
+        if self.scale is not None:
+            column = column / self.scale
+        out[:, self.offset] = column
+
+
+class _Calibration:
+    """CalibratedClassifierCV (FrozenEstimator, tek kalibratör) olasılık dönüşümü"""
+
+    def __init__(self, spec: Dict, arrays: Dict[str, np.ndarray], n_classes: int):
+        self.method = spec['method']
+        self.class_indices = spec['class_indices']
+        self.calibrators = spec['calibrators']
+        self.arrays = arrays
+        self.n_classes = n_classes
+
+    def _isotonic(self, index: int, spec: Dict, values: np.ndarray) -> np.ndarray:
+        x = self.arrays[f'calibration.{index}.x']
+        y = self.arrays[f'calibration.{index}.y']
+        if len(y) == 1:
+            return np.repeat(y, len(values))
+        values = np.clip(values, spec['x_min'], spec['x_max'])
+        # scipy interp1d(kind='linear') ile aynı formül (düğüm noktalarında da)
+        hi = np.clip(np.searchsorted(x, values), 1, len(x) - 1)
+        lo = hi - 1
+        slope = (y[hi] - y[lo]) / (x[hi] - x[lo])
+        return slope * (values - x[lo]) + y[lo]
+
+    def apply(self, predictions: np.ndarray) -> np.ndarray:
+        if self.n_classes == 2:
+            # İkili durumda yalnızca pozitif sınıfın olasılığı kalibre edilir
+            predictions = predictions[:, 1:]
+        proba = np.zeros((predictions.shape[0], self.n_classes))
+        for index, (class_index, spec) in enumerate(zip(self.class_indices, self.calibrators)):
+            if self.n_classes == 2:
+                class_index += 1
+            values = predictions[:, index]
+            if spec['kind'] == 'isotonic':
+                proba[:, class_index] = self._isotonic(index, spec, values)
+            else:
+                proba[:, class_index] = 1.0 / (1.0 + np.exp(spec['a'] * values + spec['b']))
+
+        if self.n_classes == 2:
+            proba[:, 0] = 1.0 - proba[:, 1]
+        else:
+            denominator = np.sum(proba, axis=1)[:, np.newaxis]
+            uniform = np.full_like(proba, 1 / self.n_classes)
+            proba = np.divide(proba, denominator, out=uniform, where=denominator != 0)
+        proba[(1.0 < proba) & (proba <= 1.0 + 1e-5)] = 1.0
+        return proba
+
+
+class SlimSalaryModel:
+    """Aktarılmış Pipeline ile aynı sonuçları veren numpy tahmincisi.
+    Girdi bir DataFrame ya da özellik sözlüklerinin listesi olabilir."""
+
+    def __init__(self, manifest: Dict, arrays: Dict[str, np.ndarray], path: str = ''):
+        self.manifest = manifest
+        self.path = path
+        self.version = manifest['version']
+        self.classes_ = np.asarray(manifest['classes'])
+        labels = manifest['labels']
+        if manifest['format_version'] < 3:
+            # Eski biçimde labels[i] = encoder.classes_[classes[i]]; sınıf değerleri
+            # 0..n-1 değilse encoder sırasına yerleştirilir
+            by_value = dict(zip(manifest['classes'], labels))
+            labels = [by_value.get(value) for value in range(max(manifest['classes'], default=-1) + 1)]
+        self.encoder = SlimLabelEncoder(labels)
+
+        self.columns = []
+        offset = 0
+        for spec in manifest['columns']:
+            if spec['kind'] == 'tfidf':
+                column = _TfidfColumn(spec, arrays[spec['name'] + '.vocabulary'],
+                                      arrays[spec['name'] + '.idf'], offset)
+            else:
+                column = _ScalerColumn(spec, offset)
+            self.columns.append(column)
+            offset += column.width
+        self.n_features = offset
+
+        forest = manifest['forest']
+        self.n_trees = forest['n_trees']
+        self.max_depth = forest['max_depth']
+        self.feature = arrays['tree.feature']
+        self.threshold = arrays['tree.threshold']
+        self.left = arrays['tree.left']
+        self.right = arrays['tree.right']
+        self.proba = arrays['tree.proba']
+        self.roots = arrays['tree.roots']
+
+        calibration = manifest.get('calibration')
+        self.calibration = _Calibration(calibration, arrays, len(self.classes_)) if calibration else None
+
+    def transform(self, rows) -> np.ndarray:
+        """ColumnTransformer çıktısı; ağaçlar gibi float32'ye çevrilir"""
+        n_rows = len(rows)
+        out = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        for column in self.columns:
+            if isinstance(rows, list):
+                values = [row[column.name] for row in rows]
+            else:
+                values = rows[column.name].tolist()
+            column.fill(values, out)
+        return out.astype(np.float32)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Her satırın her ağaçta düştüğü yaprak (n_satır, n_ağaç), global indeks"""
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        rows = np.arange(X.shape[0])[:, None]
+        for _ in range(self.max_depth):
+            left = self.left[nodes]
+            internal = left != -1
+            if not internal.any():
+                break
+            # Yapraklarda feature negatiftir; sonucu kullanılmadığı için 0'a çekilir
+            feature = np.where(internal, self.feature[nodes], 0)
+            go_left = X[rows, feature] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.right[nodes]), nodes)
+        return nodes
+
+    def predict_proba(self, rows) -> np.ndarray:
+        leaves = self.apply(self.transform(rows))
+        proba = np.zeros((leaves.shape[0], self.proba.shape[1]), dtype=np.float64)
+        # RandomForestClassifier ile aynı toplama sırası (ağaç ağaç)
+        for tree in range(self.n_trees):
+            proba += self.proba[leaves[:, tree]]
+        proba /= self.n_trees
+        if self.calibration is not None:
+            proba = self.calibration.apply(proba)
+        return proba
+
+    def predict(self, rows) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(rows), axis=1))
+
+
+def load_slim_model(directory: str, mmap: bool = True) -> SlimSalaryModel:
+    with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as file:
+        manifest = json.load(file)
+    if manifest.get('format') != FORMAT_NAME or manifest.get('format_version') not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(f"Desteklenmeyen model biçimi: {manifest.get('format')} "
+                         f"v{manifest.get('format_version')}")
+    arrays = {}
+    for name, file_name in manifest['arrays'].items():
+        array = np.load(os.path.join(directory, file_name), mmap_mode='r' if mmap else None,
+                        allow_pickle=False)
+        # np.memmap alt sınıfı yerine aynı belleği gösteren düz ndarray
+        arrays[name] = array.view(np.ndarray)
+    return SlimSalaryModel(manifest, arrays, directory)
+
+
+def _column_spec(name: str, transformer, columns) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    kind = type(transformer).__name__
+    if kind == 'TfidfVectorizer':
+        if (transformer.analyzer != 'word' or transformer.tokenizer is not None
+                or transformer.preprocessor is not None or transformer.stop_words is not None
+                or transformer.strip_accents is not None or transformer.binary
+                or transformer.norm not in (None, 'l1', 'l2') or not transformer.use_idf
+                or np.dtype(transformer.dtype) != np.float64):
+            raise ValueError(f"Desteklenmeyen TfidfVectorizer ayarı: {name}")
+        vocabulary = sorted(transformer.vocabulary_, key=transformer.vocabulary_.__getitem__)
+        spec = {
+            'name': columns, 'kind': 'tfidf', 'lowercase': bool(transformer.lowercase),
+            'token_pattern': transformer.token_pattern, 'ngram_range': list(transformer.ngram_range),
+            'sublinear_tf': bool(transformer.sublinear_tf), 'norm': transformer.norm
+        }
+        return spec, {columns + '.vocabulary': np.array(vocabulary, dtype=str),
+                      columns + '.idf': np.asarray(transformer.idf_, dtype=np.float64)}
+    if kind == 'StandardScaler':
+        if len(columns) != 1:
+            raise ValueError(f"StandardScaler tek sütun olmalı: {name}")
+        mean = getattr(transformer, 'mean_', None)
+        scale = getattr(transformer, 'scale_', None)
+        return {
+            'name': columns[0], 'kind': 'scaler',
+            'mean': float(mean[0]) if transformer.with_mean else None,
+            'scale': float(scale[0]) if transformer.with_std else None
+        }, {}
+    raise ValueError(f"Desteklenmeyen dönüştürücü: {name} ({kind})")
+
+
+def _forest_arrays(classifier) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    if getattr(classifier, 'n_outputs_', 1) != 1:
+        raise ValueError("Yalnızca tek çıktılı sınıflandırıcılar aktarılabilir")
+    features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in classifier.estimators_:
+        tree = estimator.tree_
+        roots.append(offset)
+        features.append(tree.feature.astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(tree.children_left == -1, -1, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(tree.children_right == -1, -1, tree.children_right + offset).astype(np.int32))
+        # sklearn >= 1.4 düğümlerde sınıf oranlarını tutar; predict_proba bunları aynen döndürür
+        probas.append(tree.value[:, 0, :classifier.n_classes_].astype(np.float64))
+        offset += tree.node_count
+    forest = {'n_trees': len(classifier.estimators_),
+              'max_depth': max(estimator.tree_.max_depth for estimator in classifier.estimators_)}
+    return forest, {
+        'tree.feature': np.concatenate(features),
+        'tree.threshold': np.concatenate(thresholds),
+        'tree.left': np.concatenate(lefts),
+        'tree.right': np.concatenate(rights),
+        'tree.proba': np.concatenate(probas),
+        'tree.roots': np.asarray(roots, dtype=np.int64),
+    }
+
+
+def _calibration_spec(model) -> Tuple[object, Optional[Dict], Dict[str, np.ndarray]]:
+    """(Pipeline, kalibrasyon tanımı, diziler); model kalibre edilmemişse tanım None"""
+    if type(model).__name__ != 'CalibratedClassifierCV':
+        return model, None, {}
+    if len(model.calibrated_classifiers_) != 1:
+        raise ValueError("Yalnızca FrozenEstimator ile kalibre edilmiş (tek kalibratörlü) modeller aktarılabilir")
+
+    calibrated = model.calibrated_classifiers_[0]
+    # FrozenEstimator sarmalayıcısı
+    pipeline = getattr(calibrated.estimator, 'estimator', calibrated.estimator)
+    calibrators, arrays = [], {}
+    for index, calibrator in enumerate(calibrated.calibrators):
+        kind = type(calibrator).__name__
+        if kind == 'IsotonicRegression':
+            if calibrator.out_of_bounds != 'clip':
+                raise ValueError("Isotonic kalibratör out_of_bounds='clip' olmalı")
+            calibrators.append({'kind': 'isotonic', 'x_min': float(calibrator.X_min_),
+                                'x_max': float(calibrator.X_max_)})
+            arrays[f'calibration.{index}.x'] = np.asarray(calibrator.X_thresholds_, dtype=np.float64)
+            arrays[f'calibration.{index}.y'] = np.asarray(calibrator.y_thresholds_, dtype=np.float64)
+        elif kind == '_SigmoidCalibration':
+            calibrators.append({'kind': 'sigmoid', 'a': float(calibrator.a_), 'b': float(calibrator.b_)})
+        else:
+            raise ValueError(f"Desteklenmeyen kalibratör: {kind}")
+
+    spec = {
+        'method': model.method,
+        # Sınıflandırıcı sınıflarının kalibre edilmiş model sınıfları içindeki yeri
+        'class_indices': np.searchsorted(model.classes_, pipeline.classes_).tolist(),
+        'calibrators': calibrators
+    }
+    return pipeline, spec, arrays
+
+
+def export_slim_model(model, encoder, directory: str, check_rows=None,
+                      source: Optional[str] = None) -> Dict:
+    """Modeli (Pipeline ya da FrozenEstimator ile kalibre edilmiş Pipeline) ve
+    LabelEncoder'ı slim biçimde klasöre yazar. Dizi dosyaları sürüm adıyla
+    yazılır, manifest en son ve atomik olarak değiştirilir; çalışan worker'lar
+    ya eski ya yeni sürümü görür. check_rows verilirse slim modelin
+    olasılıkları asıl modelle karşılaştırılır."""
+    pipeline, calibration, calibration_arrays = _calibration_spec(model)
+    preprocessor = pipeline.named_steps['preprocessor']
+    classifier = pipeline.named_steps['classifier']
+    if getattr(preprocessor, 'remainder', 'drop') != 'drop':
+        raise ValueError("ColumnTransformer remainder='drop' olmalı")
+
+    columns, arrays = [], {}
+    for name, transformer, selected in preprocessor.transformers_:
+        if transformer == 'drop':
+            continue
+        spec, column_arrays = _column_spec(name, transformer, selected)
+        columns.append(spec)
+        arrays.update(column_arrays)
+    forest, tree_arrays = _forest_arrays(classifier)
+    arrays.update(tree_arrays)
+    arrays.update(calibration_arrays)
+
+    digest = hashlib.sha1()
+    for name in sorted(arrays):
+        digest.update(name.encode('utf-8'))
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    digest.update(json.dumps(columns, sort_keys=True).encode('utf-8'))
+    if calibration:
+        digest.update(json.dumps(calibration, sort_keys=True).encode('utf-8'))
+    version = digest.hexdigest()[:12]
+
+    manifest = {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'source': source,
+        'classes': model.classes_.tolist(),
+        'labels': encoder.classes_.tolist(),
+        'columns': columns,
+        'forest': forest,
+        'calibration': calibration,
+        'arrays': {name: f'{name}-{version}.npy' for name in arrays}
+    }
+
+    if check_rows is not None:
+        expected = model.predict_proba(check_rows)
+        actual = SlimSalaryModel(manifest, arrays).predict_proba(check_rows)
+        # Sigmoid kalibrasyonda exp uygulamaları son bitte ayrışabilir
+        tolerance = 1e-12 if calibration and calibration['method'] == 'sigmoid' else 0.0
+        if expected.shape != actual.shape or np.abs(expected - actual).max(initial=0.0) > tolerance:
+            raise ValueError("Slim model sonuçları asıl modelle aynı değil "
+                             f"(en büyük fark: {np.abs(expected - actual).max():.3g})")
+
+    os.makedirs(directory, exist_ok=True)
+    for name, file_name in manifest['arrays'].items():
+        # Eşlenmiş bir dosyanın üzerine yazmak okuyan süreçleri çökertir (SIGBUS);
+        # her zaman yeni dosya yazılıp yerine taşınır
+        path = os.path.join(directory, file_name)
+        with open(f'{path}.{os.getpid()}.tmp', 'wb') as file:
+            np.save(file, arrays[name], allow_pickle=False)
+        os.replace(f'{path}.{os.getpid()}.tmp', path)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    temp_path = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=1)
+    os.replace(temp_path, manifest_path)
+
+    # Önceki sürümlerin dizileri (açık tutan süreçler etkilenmez)
+    current = set(manifest['arrays'].values())
+    for file_name in os.listdir(directory):
+        if file_name.endswith('.npy') and file_name not in current:
+            os.remove(os.path.join(directory, file_name))
+    return manifest
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Slim model ile joblib Pipeline'ının aynı olasılıkları ve etiketleri verdiğini doğrular.
+
+    python -m pytest test_slim_model.py
+"""
+
+import os
+import glob
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+
+from model_registry import DEFAULT_ENCODER_PATH, DEFAULT_MODEL_PATH, DEFAULT_SLIM_MODEL_DIR
+from slim_model import MANIFEST_NAME, export_slim_model, load_slim_model
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TFIDF_COLUMNS = ('job_type', 'key_skills', 'location', 'job_desig')
+
+
+def _random_rows(pipeline, count, seed=0):
+    """Pipeline'ın TF-IDF sözlüklerinden rastgele özellik satırları"""
+    random = np.random.RandomState(seed)
+    vocabularies = {name: sorted(transformer.vocabulary_)
+                    for name, transformer, _ in pipeline.named_steps['preprocessor'].transformers_
+                    if name in TFIDF_COLUMNS}
+    rows = []
+    for _ in range(count):
+        row = {name: ' '.join(random.choice(words, size=random.randint(0, 4)))
+               for name, words in vocabularies.items()}
+        row['key_skills'] = ', '.join(row['key_skills'].split())
+        row['experience_num'] = float(random.randint(0, 26))
+        row['skill_count'] = len(row['key_skills'].split(', ')) if row['key_skills'] else 0
+        rows.append(row)
+    return rows
+
+
+def _cv_rows():
+    from salary_predictor import SalaryPredictor
+    predictor = SalaryPredictor()
+    rows = []
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, 'test_files', '*.txt'))):
+        with open(path, encoding='utf-8') as file:
+            rows.append(predictor.extract_features(file.read()))
+    return rows
+
+
+def _assert_same_predictions(model, encoder, slim, rows):
+    expected = model.predict_proba(pd.DataFrame(rows))
+    actual = slim.predict_proba(rows)
+    assert actual.shape == expected.shape
+    assert np.abs(actual - expected).max() <= 1e-12
+    # Servis yolu (salary_predictor): argmax sırası model.classes_ üzerinden etikete çevrilir
+    expected_labels = encoder.inverse_transform(model.classes_)[expected.argmax(axis=1)]
+    actual_labels = slim.encoder.inverse_transform(slim.classes_)[actual.argmax(axis=1)]
+    assert actual_labels.tolist() == expected_labels.tolist()
+    assert slim.encoder.inverse_transform(slim.predict(rows)).tolist() == \
+        encoder.inverse_transform(model.predict(pd.DataFrame(rows))).tolist()
+
+
+@pytest.mark.skipif(not os.path.exists(os.path.join(DEFAULT_SLIM_MODEL_DIR, MANIFEST_NAME)),
+                    reason='slim model aktarılmamış')
+def test_shipped_slim_model_matches_joblib_pipeline():
+    model = joblib.load(DEFAULT_MODEL_PATH)
+    encoder = joblib.load(DEFAULT_ENCODER_PATH)
+    slim = load_slim_model(DEFAULT_SLIM_MODEL_DIR)
+    pipeline = model.estimator if hasattr(model, 'estimator') else model
+    _assert_same_predictions(model, encoder, slim, _cv_rows() + _random_rows(pipeline, 300))
+
+
+def _train_with_missing_class():
+    """Encoder'da 4 grup var, eğitim verisinde 'low' yok: model.classes_ = [0, 2, 3]"""
+    from train_model import build_pipeline
+    random = np.random.RandomState(1)
+    skills = ['python', 'java', 'sql', 'excel', 'aws', 'react']
+    rows, groups = [], []
+    for index in range(120):
+        picked = random.choice(skills, size=3, replace=False)
+        experience = float(random.randint(0, 20))
+        rows.append({'experience_num': experience, 'job_type': random.choice(['full time', 'part time']),
+                     'key_skills': ', '.join(picked), 'location': random.choice(['bangalore', 'mumbai', 'pune']),
+                     'job_desig': random.choice(['software engineer', 'data analyst', 'manager']),
+                     'skill_count': 3})
+        groups.append('high' if experience > 12 else 'mid' if 'python' in picked else 'unknown')
+    encoder = LabelEncoder().fit(['high', 'low', 'mid', 'unknown'])
+    model = build_pipeline({'classifier__n_estimators': 5, 'classifier__n_jobs': 1})
+    model.fit(pd.DataFrame(rows), encoder.transform(groups))
+    assert model.classes_.tolist() == [0, 2, 3]
+    return model, encoder, rows
+
+
+def test_labels_follow_model_classes(tmp_path):
+    model, encoder, rows = _train_with_missing_class()
+    manifest = export_slim_model(model, encoder, str(tmp_path), check_rows=pd.DataFrame(rows))
+    assert manifest['labels'] == encoder.classes_.tolist()
+    _assert_same_predictions(model, encoder, load_slim_model(str(tmp_path)), rows)
+
+
+def test_reads_labels_of_older_manifests(tmp_path):
+    model, encoder, rows = _train_with_missing_class()
+    export_slim_model(model, encoder, str(tmp_path))
+    # 1-2. sürüm biçimi: labels, classes sırasıyla modeldeki sınıfların etiketleri
+    path = os.path.join(str(tmp_path), MANIFEST_NAME)
+    with open(path, encoding='utf-8') as file:
+        manifest = json.load(file)
+    manifest['format_version'] = 2
+    manifest['labels'] = encoder.classes_[model.classes_].tolist()
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+    _assert_same_predictions(model, encoder, load_slim_model(str(tmp_path)), rows)
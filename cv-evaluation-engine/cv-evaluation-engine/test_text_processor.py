@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""TextProcessor'ın doğrusal zamanlı tarih/bölüm çıkarımının eski regex
+uygulamasıyla aynı sonuçları verdiğini doğrular (çakışan ve bitişik aralıklar dahil).
+
+    python -m pytest test_text_processor.py
+"""
+
+import os
+import re
+import glob
+import random
+
+import pytest
+
+from utils import TextProcessor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Eski uygulama (doğrusal zamanlı sürümden önceki TextProcessor); karşılaştırma için aynen korunur
+_OLD_DURATION_PATTERN = re.compile(r'(\d+)\s*(yıl|year|ay(?:lık)?\b|month|hafta|week)')
+_OLD_DURATION_UNITS = {'y': 'year', 'a': 'month', 'm': 'month', 'h': 'week', 'w': 'week'}
+
+
+def _old_extract_duration_mentions(text):
+    return [(int(value), _OLD_DURATION_UNITS[unit[0]]) for value, unit in _OLD_DURATION_PATTERN.findall(text)]
+
+
+def _old_extract_work_section(text):
+    work_section_patterns = [
+        r'work\s+experience.*?(?=education|skills|$)',
+        r'employment.*?(?=education|skills|$)',
+        r'professional\s+experience.*?(?=education|skills|$)',
+        r'career.*?(?=education|skills|$)',
+        r'iş\s+deneyimi.*?(?=eğitim|yetenek|$)',
+        r'çalışma\s+geçmişi.*?(?=eğitim|yetenek|$)',
+    ]
+    work_text = text
+    for pattern in work_section_patterns:
+        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        if match:
+            work_text = match.group(0)
+            break
+    return re.sub(r'education.*?(?=work|skills|$)', '', work_text, flags=re.IGNORECASE | re.DOTALL)
+
+
+def _old_extract_date_periods(work_text):
+    periods = []
+    date_patterns = [
+        r'(\w+\s+\d{4})\s*-\s*(\w+\s+\d{4})',
+        r'(\w+\s+\d{4})\s*-\s*(current|present|şimdi|şu\s*an)',
+        r'(\d{4})\s*-\s*(\d{4})',
+        r'(\d{4})\s*/\s*(\d{4})',
+        r'(\d{4})\s*to\s*(\d{4})',
+    ]
+    for pattern in date_patterns:
+        for start_date, end_date in re.findall(pattern, work_text, re.IGNORECASE):
+            start_year = re.search(r'(\d{4})', start_date)
+            end_year = re.search(r'(\d{4})', end_date)
+            if start_year and end_year:
+                periods.append((int(start_year.group(1)), int(end_year.group(1))))
+            elif start_year and ('current' in end_date.lower() or 'present' in end_date.lower()
+                                 or 'şimdi' in end_date.lower()):
+                periods.append((int(start_year.group(1)), None))
+
+    current_job_patterns = [
+        r'(\d{4})\s*-\s*şimdi',
+        r'(\d{4})\s*-\s*şu\s*an',
+        r'(\d{4})\s*-\s*present',
+        r'(\d{4})\s*-\s*current',
+    ]
+    for pattern in current_job_patterns:
+        for start_year in re.findall(pattern, work_text, re.IGNORECASE):
+            periods.append((int(start_year), None))
+    return periods
+
+
+def _old_extract_experience_years(text):
+    text_lower = text.lower()
+    total_months = TextProcessor.duration_months(_old_extract_duration_mentions(text_lower))
+    if total_months > 0:
+        return total_months / 12
+    return TextProcessor.years_from_periods(_old_extract_date_periods(_old_extract_work_section(text_lower)))
+
+
+# Çakışan, bitişik ve kelime ortasında başlayan aralıklar
+ADVERSARIAL = [
+    '2010-2012-2014-2016',
+    '2010 - 2012 - present',
+    '2010-2012/2014to2016',
+    '2010to2012to2014',
+    '2010/2012/2014',
+    '20102012-2014',
+    '2010-20122014',
+    '201020122014-2016',
+    'jan 2010 - feb 2012 - mar 2014 - present',
+    'jan 2010 - 2012 - mar 2014',
+    'jan2010 2011 - feb 2012',
+    'abc 2010 - def 2012ghi 2014 - present',
+    'jan 2010 - feb 2012abc 2014 - mar 2015',
+    'jan 2010 - feb 2012x 2013 - present',
+    'may 2001 - june 20022003 2004 - july 2005',
+    'ocak 2015 - şimdi, şubat 2016 - şu an, 2017-şuan, 2018 - şu  an',
+    'mart 2019 -şimdi2020 - present',
+    'x 2010 - present 2012 - current 2014 - 2015',
+    '2010 -\n2012\nmay 2013\n-\njune 2014',
+    'worked 2010 - 2012 education 2012 - 2016 work 2016 - 2018 skills 2018 - 2020',
+    'work experience: jan 2015 - present. education: bsc 2011 - 2015. skills: python',
+    'career 2001 to 2005 employment 2005/2009',
+    'iş deneyimi 2012 - 2016 eğitim 2008 - 2012 yetenek 2016 - şimdi',
+    'çalışma geçmişi ocak 2010 - aralık 2014 yetenekler',
+    'professional experience 1999-2003 2003-2007 educationeducation 2007-2011 work 2011-present',
+    '12345 - 67890 1234-5678-9012',
+    '5 yıl 2010 - 2015',
+    '123 years 2010-2015 18 aylık 6 months 2 hafta',
+    'a' * 200 + ' 2010 - ' + 'b' * 200 + ' 2012',
+    '2010 ' * 50 + '- present',
+    '',
+]
+
+_DATE_TOKENS = ['2010', '2012', '1999', '2021', '20100', '-', ' - ', '/', 'to', ' to ', 'jan', 'march', 'ocak',
+                'present', 'current', 'şimdi', 'şu an', 'şuan', '2011-2013', 'jan 2014 - ', ' - present', '2015/',
+                '2016to', '2017 -', 'feb 2018']
+_OTHER_TOKENS = ['work experience', 'work', 'experience', 'professional', 'employment', 'career', 'education',
+                 'skills', 'eğitim', 'yetenek', 'iş deneyimi', 'çalışma geçmişi', '5 yıl', '3 months', 'ay',
+                 'aylık', '12', 'x', 'ab1']
+
+
+def _fuzz_texts(count=3000, seed=12):
+    """Tarih parçaları ağırlıklı rastgele token dizileri"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(rng.choice(_DATE_TOKENS if rng.random() < 0.75 else _OTHER_TOKENS)
+                      + rng.choice(['', '', ' ', '\n', ', '])
+                      for _ in range(rng.randint(1, 30)))
+
+
+def _cv_texts():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, 'test_files', '*.txt'))):
+        with open(path, encoding='utf-8') as file:
+            texts.append(file.read())
+    return texts
+
+
+def _check(text):
+    lower = text.lower()
+    assert TextProcessor.extract_date_periods(text) == _old_extract_date_periods(text)
+    assert TextProcessor.extract_date_periods(lower) == _old_extract_date_periods(lower)
+    assert TextProcessor.extract_work_section(lower) == _old_extract_work_section(lower)
+    assert TextProcessor.extract_duration_mentions(lower) == _old_extract_duration_mentions(lower)
+    assert TextProcessor.extract_experience_years(text) == _old_extract_experience_years(text)
+
+
+@pytest.mark.parametrize('text', ADVERSARIAL)
+def test_adversarial_inputs_match_old_regex(text):
+    _check(text)
+
+
+def test_sample_cvs_match_old_regex():
+    texts = _cv_texts()
+    assert texts
+    for text in texts:
+        _check(text)
+
+
+def test_random_token_soups_match_old_regex():
+    for text in _fuzz_texts():
+        _check(text)
+
+
+def test_long_single_word_is_linear():
+    # Eski uygulamada ~68 sn süren girdi
+    text = 'a' * 50000
+    assert TextProcessor.extract_date_periods(text) == []
+    assert TextProcessor.extract_experience_years(text) == 0
@@ -1,18 +1,54 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 import joblib
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
-from sklearn.metrics import classification_report
+from sklearn.model_selection import GridSearchCV, ParameterGrid, StratifiedKFold
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.frozen import FrozenEstimator
+from sklearn.metrics import classification_report, log_loss, brier_score_loss
+from slim_model import export_slim_model, load_slim_model
 import warnings
 warnings.filterwarnings('ignore')
 
+TRAIN_PATH = 'train.csv'
+MODEL_PATH = 'salary_prediction_model.joblib'
+ENCODER_PATH = 'salary_label_encoder.joblib'
+SLIM_MODEL_DIR = 'salary_model_slim'
+# Eğitim sürümü, satır sayıları ve metrikler; en son yazılır
+MODEL_MANIFEST_PATH = 'salary_model_manifest.json'
+# Satır hash'i -> türetilmiş özellikler (experience_num, skill_count, salary_group)
+FEATURE_CACHE_PATH = 'train_features.parquet'
+CHUNK_SIZE = 50000
+
+COLUMNS_NEEDED = ['experience', 'job_type', 'key_skills', 'location', 'job_desig', 'salary']
+FEATURE_COLUMNS = ['experience_num', 'job_type', 'key_skills', 'location', 'job_desig', 'skill_count']
+ENGINEERED_COLUMNS = ['experience_num', 'skill_count', 'salary_group']
+
+# --tune: orman ve TF-IDF ayarları (36 ayar)
+TUNE_PARAM_GRID = {
+    'preprocessor__key_skills__max_features': [300, 1000],
+    'classifier__n_estimators': [50, 100, 200],
+    'classifier__max_depth': [10, 15, None],
+    'classifier__min_samples_split': [2, 5],
+}
+TUNE_REPORT_PATH = 'tuning_report.json'
+# Fold başına ColumnTransformer çıktıları (joblib.Memory); sonraki aramalarda da kullanılır
+TUNE_CACHE_DIR = 'tune_cache'
+
 def extract_experience(exp):
     try:
         exp = str(exp).lower().strip()
@@ -37,37 +73,94 @@ def simplify_salary(s):
         return 'high'
     return 'unknown'
 
-def train_salary_model():
-    print("Model eğitimi başlatılıyor...")
-    
+def row_hashes(df):
+    """Kaynak satırın (gerekli sütunlar) kararlı 64 bit hash'i"""
+    return pd.util.hash_pandas_object(df[COLUMNS_NEEDED], index=False).to_numpy(dtype=np.uint64)
+
+def split_of(hashes):
+    """Satırın bölümü hash'ten gelir ve yeni veri eklendikçe değişmez:
+    %10 kalibrasyon, %10 değerlendirme, %80 eğitim"""
+    bucket = hashes % 100
+    return np.where(bucket < 10, 'calibration', np.where(bucket < 20, 'evaluation', 'train'))
+
+def engineer_features(df):
+    return pd.DataFrame({
+        'experience_num': df['experience'].apply(extract_experience).astype(float),
+        'skill_count': df['key_skills'].apply(lambda x: len(str(x).split(','))),
+        'salary_group': df['salary'].apply(simplify_salary)
+    }, index=df.index)
+
+def load_feature_cache(path=FEATURE_CACHE_PATH):
+    """Önbelleği yükler; pyarrow yoksa None (önbelleksiz devam edilir)"""
     try:
-        train_df = pd.read_csv("train.csv")
-        print(f"Train data yüklendi: {train_df.shape}")
-    except Exception as e:
-        print(f"Train data yükleme hatası: {e}")
-        return None, None
-    
-    columns_needed = ['experience', 'job_type', 'key_skills', 'location', 'job_desig', 'salary']
-    train_df = train_df[columns_needed].dropna()
-    print(f"Temizlenmiş data: {train_df.shape}")
-    
-    train_df['experience_num'] = train_df['experience'].apply(extract_experience)
-    train_df['skill_count'] = train_df['key_skills'].apply(lambda x: len(str(x).split(',')))
-    train_df['salary_group'] = train_df['salary'].apply(simplify_salary)
-    
-    print(f"Salary groups: {train_df['salary_group'].value_counts()}")
-    
-    salary_encoder = LabelEncoder()
-    train_df['salary_encoded'] = salary_encoder.fit_transform(train_df['salary_group'])
-    
-    X = train_df[['experience_num', 'job_type', 'key_skills', 'location', 'job_desig', 'skill_count']]
-    y = train_df['salary_encoded']
-    
-    print(f"Features shape: {X.shape}")
-    print(f"Target shape: {y.shape}")
-    
-    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("Uyarı: pyarrow kurulu değil, özellik önbelleği kullanılmayacak (pip install pyarrow)")
+        return None
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=ENGINEERED_COLUMNS, index=pd.Index([], dtype=np.uint64, name='row_hash'))
+    return pd.read_parquet(path)
+
+def save_feature_cache(cache, new_features, path=FEATURE_CACHE_PATH):
+    if cache is None or not new_features:
+        return cache
+    cache = pd.concat([cache] + new_features)
+    cache = cache[~cache.index.duplicated()]
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    cache.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    return cache
+
+def read_training_chunks(path, cache, new_features, chunk_size=CHUNK_SIZE):
+    """CSV'yi parça parça okur. Önbellekte olan satırların türetilmiş
+    özellikleri önbellekten alınır; yenileri hesaplanıp new_features'a eklenir."""
+    for chunk in pd.read_csv(path, usecols=COLUMNS_NEEDED, dtype=str, chunksize=chunk_size):
+        chunk = chunk[COLUMNS_NEEDED].dropna()
+        if chunk.empty:
+            continue
+        hashes = row_hashes(chunk)
+        known = np.isin(hashes, cache.index.to_numpy()) if cache is not None and len(cache) else np.zeros(len(chunk), bool)
+
+        features = pd.DataFrame(index=chunk.index, columns=ENGINEERED_COLUMNS)
+        if known.any():
+            features.loc[known] = cache.loc[hashes[known], ENGINEERED_COLUMNS].to_numpy()
+        if (~known).any():
+            computed = engineer_features(chunk[~known])
+            features.loc[~known] = computed.to_numpy()
+            new_features.append(computed.set_index(pd.Index(hashes[~known], name='row_hash')))
+
+        chunk = chunk.assign(experience_num=features['experience_num'].astype(float),
+                             skill_count=features['skill_count'].astype(int),
+                             salary_group=features['salary_group'].astype(str),
+                             row_hash=hashes, split=split_of(hashes))
+        yield chunk, int((~known).sum())
+
+def _mean_brier(y_true, proba, classes):
+    """Sınıf başına (bire karşı hepsi) Brier skorlarının ortalaması"""
+    return sum(brier_score_loss(y_true == label, proba[:, index])
+               for index, label in enumerate(classes)) / len(classes)
+
+def _probability_metrics(model, X_eval, y_eval):
+    proba = model.predict_proba(X_eval)
+    return {'log_loss': round(float(log_loss(y_eval, proba, labels=model.classes_)), 4),
+            'brier': round(float(_mean_brier(y_eval, proba, model.classes_)), 4)}
+
+def calibrate_model(pipeline, X_cal, y_cal, X_eval, y_eval, method='isotonic'):
+    """Eğitilmiş Pipeline'ın olasılıklarını kalibrasyon satırlarında kalibre
+    eder, değerlendirme satırlarında önce/sonra karşılaştırmasını yazdırır"""
+    calibrated = CalibratedClassifierCV(FrozenEstimator(pipeline), method=method)
+    calibrated.fit(X_cal, y_cal)
     
+    metrics = {}
+    for key, name, model in (('uncalibrated', 'Kalibrasyonsuz', pipeline),
+                             ('calibrated', f'Kalibre ({method})', calibrated)):
+        metrics[key] = _probability_metrics(model, X_eval, y_eval)
+        print(f"{name}: log loss {metrics[key]['log_loss']:.4f}, Brier {metrics[key]['brier']:.4f}")
+    return calibrated, metrics
+
+def build_pipeline(params=None, memory=None):
+    """Varsayılan Pipeline; params (ör. tuning_report.json'daki 'chosen')
+    varsayılanların üzerine yazılır"""
     preprocessor = ColumnTransformer(
         transformers=[
             ('job_type', TfidfVectorizer(min_df=2, ngram_range=(1, 2)), 'job_type'),
@@ -88,23 +181,373 @@ def train_salary_model():
             class_weight='balanced',
             random_state=42
         ))
-    ])
+    ], memory=memory)
+    if params:
+        pipeline.set_params(**params)
+    return pipeline
+
+def fit_forest(estimator, X, y, n_jobs=-1):
+    """Ağaçları tüm çekirdeklerde eğitir; kaydedilen modelde n_jobs sıfırlanır
+    çünkü servis tek satır tahmin eder ve thread havuzu yalnızca gecikme ekler"""
+    forest = estimator.named_steps['classifier'] if isinstance(estimator, Pipeline) else estimator
+    forest.set_params(n_jobs=n_jobs)
+    try:
+        estimator.fit(X, y)
+    finally:
+        forest.set_params(n_jobs=None)
+    return estimator
+
+def load_training_rows(train_path=TRAIN_PATH, chunk_size=CHUNK_SIZE):
+    """Tüm satırları (özellik önbelleğiyle) okur; (DataFrame, yeni satır sayısı)"""
+    cache = load_feature_cache()
+    new_features = []
+    chunks = list(read_training_chunks(train_path, cache, new_features, chunk_size))
+    if not chunks:
+        raise ValueError("Train data boş")
+    save_feature_cache(cache, new_features)
+    return pd.concat([chunk for chunk, _ in chunks]), sum(count for _, count in chunks)
+
+def train_salary_model(calibration='isotonic', train_path=TRAIN_PATH, chunk_size=CHUNK_SIZE,
+                       params=None, n_jobs=-1):
+    """Sözlükleri ve ormanı sıfırdan eğitir"""
+    print("Model eğitimi başlatılıyor...")
+    
+    try:
+        train_df, new_rows = load_training_rows(train_path, chunk_size)
+    except Exception as e:
+        print(f"Train data yükleme hatası: {e}")
+        return None, None
+    print(f"Temizlenmiş data: {train_df.shape} ({new_rows} satırın özellikleri yeni hesaplandı)")
+    
+    print(f"Salary groups: {train_df['salary_group'].value_counts()}")
+    
+    salary_encoder = LabelEncoder()
+    train_df['salary_encoded'] = salary_encoder.fit_transform(train_df['salary_group'])
+    
+    X = train_df[FEATURE_COLUMNS]
+    y = train_df['salary_encoded']
+    
+    print(f"Features shape: {X.shape}")
+    print(f"Target shape: {y.shape}")
+    
+    is_train = (train_df['split'] == 'train').to_numpy()
+    pipeline = build_pipeline(params)
     
     print("Model eğitimi başlıyor...")
-    pipeline.fit(X_train, y_train)
+    fit_forest(pipeline, X[is_train], y[is_train], n_jobs)
     print("Model eğitimi tamamlandı!")
     
-    y_val_pred = pipeline.predict(X_val)
+    held_out = train_df[~is_train]
+    return _finish_training(pipeline, salary_encoder, held_out, calibration, {
+        'mode': 'full',
+        'params': params or {},
+        'rows': {'total': len(train_df), 'new': new_rows, 'train': int(is_train.sum())},
+        'trees_added': pipeline.named_steps['classifier'].n_estimators
+    })
+
+def _single_row_latency(model, rows, repeats=200):
+    """Servisteki gibi tek satırlık predict_proba gecikmesi (ms)"""
+    samples = []
+    for index in range(min(repeats, len(rows))):
+        row = rows[index:index + 1]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': round(float(np.percentile(samples, 50)), 3),
+            'p95_ms': round(float(np.percentile(samples, 95)), 3)}
+
+def _directory_size(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+def measure_candidate(params, salary_encoder, train_rows, eval_rows, n_jobs=-1):
+    """Ayarı eğitim satırlarında eğitir; değerlendirme doğruluğu, slim ve joblib
+    tek satır gecikmesi ve artifact boyutlarını ölçer"""
+    pipeline = build_pipeline(params)
+    start = time.perf_counter()
+    fit_forest(pipeline, train_rows[FEATURE_COLUMNS], train_rows['salary_encoded'], n_jobs)
+    fit_seconds = time.perf_counter() - start
+    X_eval = eval_rows[FEATURE_COLUMNS]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        joblib_path = os.path.join(tmp_dir, 'model.joblib')
+        joblib.dump(pipeline, joblib_path)
+        slim_dir = os.path.join(tmp_dir, 'slim')
+        export_slim_model(pipeline, salary_encoder, slim_dir)
+        slim_model = load_slim_model(slim_dir, mmap=False)
+        slim_rows = X_eval.to_dict('records')
+        return {
+            'params': params,
+            'eval_accuracy': round(float((pipeline.predict(X_eval) == eval_rows['salary_encoded'].to_numpy()).mean()), 4),
+            'fit_seconds': round(fit_seconds, 2),
+            'slim_latency': _single_row_latency(slim_model, slim_rows),
+            'joblib_latency': _single_row_latency(pipeline, X_eval),
+            'slim_size_mb': round(_directory_size(slim_dir) / (1024 * 1024), 2),
+            'joblib_size_mb': round(os.path.getsize(joblib_path) / (1024 * 1024), 2),
+            'nodes': int(sum(tree.tree_.node_count for tree in pipeline.named_steps['classifier'].estimators_))
+        }
+
+def choose_candidate(candidates, latency_budget_ms=None, size_budget_mb=None):
+    """Bütçelere (slim p95 gecikme, slim boyut) uyan en doğru aday; hiçbiri
+    uymuyorsa en hızlısı"""
+    fitting = [candidate for candidate in candidates
+               if (latency_budget_ms is None or candidate['slim_latency']['p95_ms'] <= latency_budget_ms)
+               and (size_budget_mb is None or candidate['slim_size_mb'] <= size_budget_mb)]
+    if fitting:
+        return max(fitting, key=lambda candidate: (candidate['cv_accuracy'], -candidate['slim_latency']['p50_ms']))
+    print("Uyarı: bütçeye uyan aday yok, en hızlı aday seçildi")
+    return min(candidates, key=lambda candidate: candidate['slim_latency']['p50_ms'])
+
+def tune_salary_model(train_path=TRAIN_PATH, chunk_size=CHUNK_SIZE, folds=3, n_jobs=-1, top=5,
+                      latency_budget_ms=None, size_budget_mb=None,
+                      report_path=TUNE_REPORT_PATH, cache_dir=TUNE_CACHE_DIR):
+    """Eğitim satırlarında çapraz doğrulamalı ızgara araması yapar, en iyi
+    adayları doğruluk/gecikme/boyut açısından karşılaştırır ve seçilen
+    parametreleri döndürür. ColumnTransformer çıktıları fold ve TF-IDF ayarı
+    başına cache_dir'de saklanır; orman ayarları değişirken yeniden hesaplanmaz."""
+    train_df, _ = load_training_rows(train_path, chunk_size)
+    salary_encoder = LabelEncoder()
+    train_df['salary_encoded'] = salary_encoder.fit_transform(train_df['salary_group'])
+    train_rows = train_df[train_df['split'] == 'train']
+    eval_rows = train_df[train_df['split'] == 'evaluation']
+    
+    # Paralellik fold/ayar düzeyinde; her ağaç grubu tek çekirdekte
+    pipeline = build_pipeline({'classifier__n_jobs': 1}, memory=joblib.Memory(cache_dir, verbose=0))
+    search = GridSearchCV(pipeline, TUNE_PARAM_GRID, scoring='accuracy', n_jobs=n_jobs, refit=False,
+                          cv=StratifiedKFold(n_splits=folds, shuffle=True, random_state=42))
+    settings = len(ParameterGrid(TUNE_PARAM_GRID))
+    print(f"Hiperparametre araması: {settings} ayar x {folds} fold, {len(train_rows)} eğitim satırı")
+    start = time.perf_counter()
+    search.fit(train_rows[FEATURE_COLUMNS], train_rows['salary_encoded'])
+    search_seconds = time.perf_counter() - start
+    print(f"Arama tamamlandı ({search_seconds:.1f} sn)")
+    
+    results = search.cv_results_
+    order = np.argsort(results['rank_test_score'], kind='stable')[:top]
+    candidates = []
+    for index in order:
+        params = {key: _json_value(value) for key, value in results['params'][index].items()}
+        candidate = measure_candidate(params, salary_encoder, train_rows, eval_rows, n_jobs)
+        candidate['cv_accuracy'] = round(float(results['mean_test_score'][index]), 4)
+        candidate['cv_std'] = round(float(results['std_test_score'][index]), 4)
+        candidates.append(candidate)
+    
+    baseline = measure_candidate({}, salary_encoder, train_rows, eval_rows, n_jobs)
+    chosen = choose_candidate(candidates, latency_budget_ms, size_budget_mb)
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'rows': {'train': len(train_rows), 'evaluation': len(eval_rows)},
+        'folds': folds,
+        'settings': settings,
+        'search_seconds': round(search_seconds, 1),
+        'budgets': {'slim_p95_ms': latency_budget_ms, 'slim_size_mb': size_budget_mb},
+        'baseline': baseline,
+        'candidates': candidates,
+        'chosen': chosen['params']
+    }
+    with open(report_path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=1)
+    print(format_tuning_report(report))
+    print(f"Rapor yazıldı: {report_path}")
+    return chosen['params']
+
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+def format_tuning_report(report):
+    lines = [f"{'CV DOĞR.':>9} {'DEĞ. DOĞR.':>10} {'SLIM p50/p95 ms':>16} {'JOBLIB p50 ms':>13} "
+             f"{'SLIM MB':>8} {'JOBLIB MB':>9}  PARAMETRELER"]
+    for name, candidate in [('varsayılan', report['baseline'])] + [(None, c) for c in report['candidates']]:
+        mark = '*' if name is None and candidate['params'] == report['chosen'] else ' '
+        cv_accuracy = f"{candidate['cv_accuracy']:.4f}" if 'cv_accuracy' in candidate else '-'
+        params = name or ', '.join(f"{key.split('__')[-1]}={value}" for key, value in candidate['params'].items())
+        lines.append(f"{cv_accuracy:>9} {candidate['eval_accuracy']:>10.4f} "
+                     f"{candidate['slim_latency']['p50_ms']:>7.3f}/{candidate['slim_latency']['p95_ms']:<8.3f} "
+                     f"{candidate['joblib_latency']['p50_ms']:>13.3f} {candidate['slim_size_mb']:>8.2f} "
+                     f"{candidate['joblib_size_mb']:>9.2f} {mark}{params}")
+    return '\n'.join(lines)
+
+def train_incremental(add_trees=20, calibration='isotonic', train_path=TRAIN_PATH, chunk_size=CHUNK_SIZE,
+                      n_jobs=-1):
+    """Mevcut modeli büyütür: TF-IDF sözlükleri ve ölçekleyiciler sabit kalır,
+    CSV parça parça dönüştürülür ve ormana warm_start ile add_trees yeni ağaç
+    eklenir (mevcut ağaçlar yeniden eğitilmez). Yeni kelimeler bir sonraki tam
+    eğitime kadar yok sayılır."""
+    try:
+        model = joblib.load(MODEL_PATH)
+        salary_encoder = joblib.load(ENCODER_PATH)
+    except FileNotFoundError:
+        print("Mevcut model bulunamadı, tam eğitim yapılıyor")
+        return train_salary_model(calibration, train_path, chunk_size, n_jobs=n_jobs)
+    
+    # Kalibre edilmiş model: CalibratedClassifierCV(FrozenEstimator(Pipeline))
+    if type(model).__name__ == 'CalibratedClassifierCV':
+        frozen = model.calibrated_classifiers_[0].estimator
+        model = getattr(frozen, 'estimator', frozen)
+    pipeline = model
+    preprocessor = pipeline.named_steps['preprocessor']
+    classifier = pipeline.named_steps['classifier']
+    print(f"Artımlı eğitim: mevcut {len(classifier.estimators_)} ağaca {add_trees} ağaç eklenecek")
+    
+    cache = load_feature_cache()
+    new_features = []
+    train_parts, train_labels, held_out_parts = [], [], []
+    total_rows = new_rows = skipped = 0
+    known_groups = set(salary_encoder.classes_)
+    for chunk, new_count in read_training_chunks(train_path, cache, new_features, chunk_size):
+        total_rows += len(chunk)
+        new_rows += new_count
+        usable = chunk['salary_group'].isin(known_groups).to_numpy()
+        skipped += int((~usable).sum())
+        chunk = chunk[usable]
+        is_train = (chunk['split'] == 'train').to_numpy()
+        held_out_parts.append(chunk[~is_train])
+        if is_train.any():
+            # Sabit sözlüklerle dönüştürülür; ham metin bellekte tutulmaz
+            train_parts.append(sp.csr_matrix(preprocessor.transform(chunk.loc[is_train, FEATURE_COLUMNS])))
+            train_labels.append(salary_encoder.transform(chunk.loc[is_train, 'salary_group']))
+        print(f"  {total_rows} satır okundu ({new_rows} yeni)")
+    save_feature_cache(cache, new_features)
+    if skipped:
+        print(f"Uyarı: modelde olmayan maaş grubuna sahip {skipped} satır atlandı")
+    if not train_parts:
+        print("Eğitim satırı bulunamadı")
+        return None, None
+    
+    X_train = sp.vstack(train_parts).tocsr()
+    y_train = np.concatenate(train_labels)
+    missing = set(range(len(salary_encoder.classes_))) - set(np.unique(y_train))
+    if missing:
+        print(f"Eğitim verisinde eksik maaş grupları var ({sorted(missing)}), tam eğitim gerekli")
+        return None, None
+    
+    classifier.set_params(warm_start=True, n_estimators=len(classifier.estimators_) + add_trees)
+    start = time.perf_counter()
+    fit_forest(classifier, X_train, y_train, n_jobs)
+    classifier.set_params(warm_start=False)
+    print(f"{add_trees} ağaç eklendi ({time.perf_counter() - start:.1f} sn, toplam {len(classifier.estimators_)})")
+    
+    return _finish_training(pipeline, salary_encoder, pd.concat(held_out_parts), calibration, {
+        'mode': 'incremental',
+        'rows': {'total': total_rows, 'new': new_rows, 'train': int(X_train.shape[0])},
+        'trees_added': add_trees
+    })
+
+def _finish_training(pipeline, salary_encoder, held_out, calibration, info):
+    """Kalibrasyon, değerlendirme ve artifact'ların atomik yazımı"""
+    held_out = held_out.assign(salary_encoded=salary_encoder.transform(held_out['salary_group']))
+    model = pipeline
+    eval_rows = held_out
+    metrics = {}
+    if calibration != 'none':
+        cal_rows = held_out[held_out['split'] == 'calibration']
+        eval_rows = held_out[held_out['split'] == 'evaluation']
+        print("\nOlasılık kalibrasyonu:")
+        model, metrics = calibrate_model(pipeline, cal_rows[FEATURE_COLUMNS], cal_rows['salary_encoded'],
+                                         eval_rows[FEATURE_COLUMNS], eval_rows['salary_encoded'],
+                                         method=calibration)
+    else:
+        metrics['uncalibrated'] = _probability_metrics(model, eval_rows[FEATURE_COLUMNS], eval_rows['salary_encoded'])
+    
+    X_eval, y_eval = eval_rows[FEATURE_COLUMNS], eval_rows['salary_encoded']
+    y_eval_pred = model.predict(X_eval)
+    metrics['accuracy'] = round(float((y_eval_pred == y_eval.to_numpy()).mean()), 4)
     print("\nValidation Sonuçları:")
-    print(classification_report(y_val, y_val_pred, target_names=salary_encoder.classes_))
+    print(classification_report(y_eval, y_eval_pred, labels=range(len(salary_encoder.classes_)),
+                                target_names=salary_encoder.classes_))
     
-    joblib.dump(pipeline, 'salary_prediction_model.joblib')
-    joblib.dump(salary_encoder, 'salary_label_encoder.joblib')
+    _atomic_dump(salary_encoder, ENCODER_PATH)
+    _atomic_dump(model, MODEL_PATH)
     print("\nModel ve LabelEncoder kaydedildi.")
     
-    return pipeline, salary_encoder
+    slim_manifest = export_slim(model, salary_encoder, check_rows=X_eval)
+    
+    info.update({
+        'calibration': calibration,
+        'n_estimators': len(pipeline.named_steps['classifier'].estimators_),
+        'rows': dict(info['rows'], calibration=len(held_out) - len(eval_rows), evaluation=len(eval_rows)),
+        'metrics': metrics,
+        'slim_version': slim_manifest['version']
+    })
+    manifest = write_model_manifest(info)
+    print(f"Model manifest'i yazıldı: {MODEL_MANIFEST_PATH} (sürüm: {manifest['version']})")
+    return model, salary_encoder
+
+def _atomic_dump(obj, path):
+    """Yarım yazılmış dosya okunmasın diye geçici dosyaya yazıp yerine taşır"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+def write_model_manifest(info, path=MODEL_MANIFEST_PATH):
+    """Eğitim sürümünü ve geçmişini yazar; servis tarafı bu dosyanın değişmesiyle
+    yeni modele geçer (bkz. model_registry)"""
+    digest = hashlib.sha1()
+    with open(MODEL_PATH, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    parent = None
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as file:
+            parent = json.load(file).get('version')
+    
+    manifest = dict(info, version=digest.hexdigest()[:12], parent_version=parent,
+                    created_at=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    files={'model': MODEL_PATH, 'encoder': ENCODER_PATH, 'slim': SLIM_MODEL_DIR})
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+    return manifest
+
+def export_slim(model, salary_encoder, check_rows=None):
+    """Servisin yüklediği sklearn'süz çıkarım biçimini yazar (bkz. slim_model)"""
+    manifest = export_slim_model(model, salary_encoder, SLIM_MODEL_DIR,
+                                 check_rows=check_rows, source=MODEL_PATH)
+    if check_rows is not None:
+        print(f"Slim model doğrulandı: {len(check_rows)} satırda olasılıklar asıl modelle aynı")
+    print(f"Slim model kaydedildi: {SLIM_MODEL_DIR}/ (sürüm: {manifest['version']})")
+    return manifest
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Maaş tahmin modelini eğitir')
+    parser.add_argument('--export-only', action='store_true',
+                        help='Eğitmeden mevcut joblib modelini slim biçime aktarır')
+    parser.add_argument('--calibration', choices=('isotonic', 'sigmoid', 'none'), default='isotonic',
+                        help='Doğrulama verisinde olasılık kalibrasyonu yöntemi (varsayılan: isotonic)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Mevcut modele yeni ağaçlar ekler (sözlükler yeniden eğitilmez)')
+    parser.add_argument('--add-trees', type=int, default=20,
+                        help='Artımlı eğitimde eklenecek ağaç sayısı (varsayılan: 20)')
+    parser.add_argument('--train-path', default=TRAIN_PATH, help='Eğitim CSV dosyası')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help='CSV okuma parça büyüklüğü (satır)')
+    parser.add_argument('--n-jobs', type=int, default=-1,
+                        help='Eğitim ve aramada kullanılacak çekirdek sayısı (varsayılan: -1, tümü)')
+    parser.add_argument('--tune', action='store_true',
+                        help='Çapraz doğrulamalı parametre araması yapar, rapor yazar ve seçilen ayarla eğitir')
+    parser.add_argument('--folds', type=int, default=3, help='Aramadaki fold sayısı (varsayılan: 3)')
+    parser.add_argument('--top', type=int, default=5,
+                        help='Gecikme/boyut ölçülecek en iyi aday sayısı (varsayılan: 5)')
+    parser.add_argument('--latency-budget-ms', type=float, default=None,
+                        help='Seçimde slim modelin tek satır p95 gecikme sınırı')
+    parser.add_argument('--size-budget-mb', type=float, default=None,
+                        help='Seçimde slim model klasörünün boyut sınırı')
+    parser.add_argument('--params', default=None,
+                        help="Tam eğitimde tuning_report.json'daki seçilen ayarları kullanır")
+    args = parser.parse_args()
+    
     print("Script başlatılıyor...")
-    train_salary_model()
+    if args.export_only:
+        export_slim(joblib.load(MODEL_PATH), joblib.load(ENCODER_PATH))
+    elif args.incremental:
+        train_incremental(args.add_trees, args.calibration, args.train_path, args.chunk_size, args.n_jobs)
+    else:
+        params = None
+        if args.tune:
+            params = tune_salary_model(args.train_path, args.chunk_size, args.folds, args.n_jobs, args.top,
+                                       args.latency_budget_ms, args.size_budget_mb)
+        elif args.params:
+            with open(args.params, encoding='utf-8') as file:
+                params = json.load(file)['chosen']
+        train_salary_model(args.calibration, args.train_path, args.chunk_size, params, args.n_jobs)
     print("Script tamamlandı!")
\ No newline at end of file
@@ -2,8 +2,67 @@
 # -*- coding: utf-8 -*-
 
 import re
+import bisect
+import threading
 from datetime import datetime
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+
+# '5 yıl', '6 ay', '3 months', '2 hafta' gibi doğrudan süre ifadeleri.
+# (?<!\d\d): sayı dizisinin ortasından yeniden denenmez (uzun rakam dizilerinde doğrusal)
+DURATION_PATTERN = re.compile(r'(\d(?<!\d\d)\d*)\s*(yıl|year|ay(?:lık)?\b|month|hafta|week)')
+DURATION_UNITS = {'y': 'year', 'a': 'month', 'm': 'month', 'h': 'week', 'w': 'week'}
+
+# Bölüm başlıkları ve bölüm sonu kelimeleri; metin tek geçişte taranır
+# (çakışan eşleşmeler için her arama bir önceki eşleşmenin bir sonrasından başlar)
+SECTION_TOKEN_PATTERN = re.compile(
+    # İlk harf ön kontrolü aramayı hızlandırır (IGNORECASE eşdeğerleri dahil)
+    r'(?=[wepcçisy])'
+    r'(?:(?P<work>work)(?P<work_experience>\s+experience)?'
+    r'|(?P<employment>employment)'
+    r'|(?P<professional_experience>professional\s+experience)'
+    r'|(?P<career>career)'
+    r'|(?P<is_deneyimi>iş\s+deneyimi)'
+    r'|(?P<calisma_gecmisi>çalışma\s+geçmişi)'
+    r'|(?P<education>education)'
+    r'|(?P<skills>skills)'
+    r'|(?P<egitim>eğitim)'
+    r'|(?P<yetenek>yetenek))',
+    re.IGNORECASE)
+
+# İş deneyimi başlıkları (öncelik sırasıyla) ve bölümü bitiren kelimeler
+WORK_SECTION_HEADINGS = (
+    ('work_experience', ('education', 'skills')),
+    ('employment', ('education', 'skills')),
+    ('professional_experience', ('education', 'skills')),
+    ('career', ('education', 'skills')),
+    ('is_deneyimi', ('egitim', 'yetenek')),
+    ('calisma_gecmisi', ('egitim', 'yetenek')),
+)
+
+# Tarih aralığı desenleri tek bir desende birleştirilir; her desen aynı konumda
+# bağımsız bir ileri bakışla denenir. Desen yalnızca DATE_CANDIDATE_PATTERN'in
+# bulduğu, bir tarihin başlayabileceği konumlarda çalıştırılır. Kelimeyle
+# başlayan desenler (?<!\w) ile kelime başına sabitlenir; kelime ortasından
+# yeniden denenmez (uzun kelimelerde doğrusal).
+DATE_CANDIDATE_PATTERN = re.compile(r'(?<!\w)\w+\s+\d{4}\s*-|\d{4}\s*(?:-|/|to)', re.IGNORECASE)
+DATE_PERIOD_PATTERN = re.compile(
+    r'(?:(?=(?P<range_words>(?P<range_words_start>(?<!\w)\w+\s+\d{4})\s*-\s*(?P<range_words_end>\w+\s+\d{4}))))?'
+    r'(?:(?=(?P<current_words>(?P<current_words_start>(?<!\w)\w+\s+\d{4})\s*-\s*(?P<current_words_end>current|present|şimdi|şu\s*an))))?'
+    r'(?:(?=(?P<range_dash>(?P<range_dash_start>\d{4})\s*-\s*(?P<range_dash_end>\d{4}))))?'
+    r'(?:(?=(?P<range_slash>(?P<range_slash_start>\d{4})\s*/\s*(?P<range_slash_end>\d{4}))))?'
+    r'(?:(?=(?P<range_to>(?P<range_to_start>\d{4})\s*to\s*(?P<range_to_end>\d{4}))))?'
+    r'(?:(?=(?P<current_simdi>(?P<current_simdi_start>\d{4})\s*-\s*şimdi)))?'
+    r'(?:(?=(?P<current_su_an>(?P<current_su_an_start>\d{4})\s*-\s*şu\s*an)))?'
+    r'(?:(?=(?P<current_present>(?P<current_present_start>\d{4})\s*-\s*present)))?'
+    r'(?:(?=(?P<current_current>(?P<current_current_start>\d{4})\s*-\s*current)))?',
+    re.IGNORECASE)
+# Aralıklar bu sırayla listelenir (eski desen sırası)
+DATE_RANGE_KINDS = ('range_words', 'current_words', 'range_dash', 'range_slash', 'range_to')
+CURRENT_JOB_KINDS = ('current_simdi', 'current_su_an', 'current_present', 'current_current')
+# Kelimeyle başlayan desenler (önceki eşleşme kelime ortasında bittiyse oradan devam eder)
+WORD_START_KINDS = ('range_words', 'current_words')
+YEAR_PATTERN = re.compile(r'(\d{4})')
+WORD_PATTERN = re.compile(r'\w+')
 
 class TextProcessor:
     """Ortak metin işleme fonksiyonları"""
@@ -14,23 +73,7 @@ class TextProcessor:
         text_lower = text.lower()
         
         # Direkt yıl belirtimi
-        year_patterns = [
-            r'(\d+)\s*yıl',
-            r'(\d+)\s*year',
-            r'(\d+)\s*ay',
-            r'(\d+)\s*month'
-        ]
-        
-        total_months = 0
-        
-        for pattern in year_patterns:
-            matches = re.findall(pattern, text_lower)
-            for match in matches:
-                value = int(match)
-                if 'yıl' in pattern or 'year' in pattern:
-                    total_months += value * 12
-                elif 'ay' in pattern or 'month' in pattern:
-                    total_months += value
+        total_months = TextProcessor.duration_months(TextProcessor.extract_duration_mentions(text_lower))
         
         if total_months > 0:
             return total_months / 12
@@ -38,129 +81,268 @@ class TextProcessor:
         # Tarih aralıklarından deneyim çıkarma
         return TextProcessor._extract_experience_from_dates(text_lower)
     
+    @staticmethod
+    def extract_duration_mentions(text: str) -> List[Tuple[int, str]]:
+        """'5 yıl', '6 months' gibi doğrudan süre ifadelerini (değer, birim) olarak döndürür.
+        Birim 'year', 'month' veya 'week' olur."""
+        return [(int(value), DURATION_UNITS[unit[0]]) for value, unit in DURATION_PATTERN.findall(text)]
+    
+    @staticmethod
+    def duration_months(mentions: List[Tuple[int, str]], include_weeks: bool = False) -> float:
+        """Süre ifadelerinin toplamını ay cinsinden hesaplar"""
+        total_months = 0
+        for value, unit in mentions:
+            if unit == 'year':
+                total_months += value * 12
+            elif unit == 'month':
+                total_months += value
+            elif unit == 'week' and include_weeks:
+                total_months += value / 4
+        return total_months
+    
     @staticmethod
     def _extract_experience_from_dates(text: str) -> float:
         """Tarih aralıklarından deneyim çıkarır"""
-        experience_periods = []
-        current_year = datetime.now().year
-        
-        work_section_patterns = [
-            r'work\s+experience.*?(?=education|skills|$)',
-            r'employment.*?(?=education|skills|$)',
-            r'professional\s+experience.*?(?=education|skills|$)',
-            r'career.*?(?=education|skills|$)',
-            r'iş\s+deneyimi.*?(?=eğitim|yetenek|$)',
-            r'çalışma\s+geçmişi.*?(?=eğitim|yetenek|$)',
-        ]
+        periods = TextProcessor.extract_date_periods(TextProcessor.extract_work_section(text))
+        return TextProcessor.years_from_periods(periods)
+    
+    @staticmethod
+    def extract_work_section(text: str) -> str:
+        """İş deneyimi bölümünü (eğitim kısımları çıkarılmış olarak) döndürür.
+        Başlık ve bölüm sonu kelimeleri tek geçişte bulunur; süre metin uzunluğuyla doğrusaldır."""
+        tokens = TextProcessor._section_tokens(text)
         
-        work_text = text
-        for pattern in work_section_patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-            if match:
-                work_text = match.group(0)
+        start, end = 0, len(text)
+        for heading, stop_kinds in WORK_SECTION_HEADINGS:
+            if heading in tokens:
+                start, heading_end = tokens[heading][0][0], tokens[heading][1][0]
+                end = TextProcessor._next_token(tokens, stop_kinds, heading_end, text, 0, len(text))
                 break
         
-        work_text = re.sub(r'education.*?(?=work|skills|$)', '', work_text, flags=re.IGNORECASE | re.DOTALL)
-        
-        date_patterns = [
-            r'(\w+\s+\d{4})\s*-\s*(\w+\s+\d{4})',
-            r'(\w+\s+\d{4})\s*-\s*(current|present|şimdi|şu\s*an)',
-            r'(\d{4})\s*-\s*(\d{4})',
-            r'(\d{4})\s*/\s*(\d{4})',
-            r'(\d{4})\s*to\s*(\d{4})',
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, work_text, re.IGNORECASE)
-            for start_date, end_date in matches:
-                try:
-                    start_year = re.search(r'(\d{4})', start_date)
-                    end_year = re.search(r'(\d{4})', end_date)
-                    
-                    if start_year and end_year:
-                        years = int(end_year.group(1)) - int(start_year.group(1))
-                        if 0 < years <= 50:  # Makul deneyim aralığı
-                            experience_periods.append(years)
-                    elif start_year and ('current' in end_date.lower() or 'present' in end_date.lower() or 'şimdi' in end_date.lower()):
-                        years = current_year - int(start_year.group(1))
-                        if 0 < years <= 50:
-                            experience_periods.append(years)
-                except (ValueError, AttributeError):
-                    continue
+        # Bölüm içindeki 'education ...' kısımları bir sonraki 'work'/'skills'e kadar çıkarılır
+        pieces, cursor = [], start
+        education_starts, education_ends = tokens.get('education', ((), ()))
+        for index in range(bisect.bisect_left(education_starts, start), len(education_starts)):
+            if education_ends[index] > end:
+                break
+            if education_starts[index] < cursor:
+                continue
+            pieces.append(text[cursor:education_starts[index]])
+            cursor = TextProcessor._next_token(tokens, ('work', 'skills'), education_ends[index],
+                                               text, start, end)
+        pieces.append(text[cursor:end])
+        return ''.join(pieces)
+    
+    @staticmethod
+    def _section_tokens(text: str) -> Dict[str, Tuple[List[int], List[int]]]:
+        """Tür -> (başlangıçlar, bitişler); konumlar artan sıradadır"""
+        tokens: Dict[str, Tuple[List[int], List[int]]] = {}
+        match = SECTION_TOKEN_PATTERN.search(text)
+        while match is not None:
+            for kind, value in match.groupdict().items():
+                if value is not None:
+                    # 'work experience' başlığı 'work' kelimesinin başından başlar
+                    starts, ends = tokens.setdefault(kind, ([], []))
+                    starts.append(match.start())
+                    ends.append(match.end(kind))
+            match = SECTION_TOKEN_PATTERN.search(text, match.start() + 1)
+        return tokens
+    
+    @staticmethod
+    def _next_token(tokens: Dict[str, Tuple[List[int], List[int]]], kinds: Tuple[str, ...],
+                    position: int, text: str, start: int, end: int) -> int:
+        """text[start:end] içinde position'dan itibaren ilk bitiş kelimesinin başı.
+        Yoksa `(?=...|$)` ile aynı şekilde bölüm sonu (sondaki satır sonu hariç)."""
+        found = end - 1 if end > start and text[end - 1] == '\n' and position <= end - 1 else end
+        for kind in kinds:
+            if kind not in tokens:
+                continue
+            starts, ends = tokens[kind]
+            index = bisect.bisect_left(starts, position)
+            if index < len(starts) and ends[index] <= end and starts[index] < found:
+                found = starts[index]
+        return found
+    
+    @staticmethod
+    def extract_date_periods(work_text: str) -> List[Tuple[int, Optional[int]]]:
+        """Tarih aralıklarını (başlangıç yılı, bitiş yılı) olarak döndürür.
+        Devam eden işlerde bitiş yılı None olur. Tüm desenler tek geçişte denenir."""
+        candidates: Dict[str, List[Tuple[int, int, str, Optional[str]]]] = {}
+        candidate = DATE_CANDIDATE_PATTERN.search(work_text)
+        while candidate is not None:
+            position = candidate.start()
+            groups = DATE_PERIOD_PATTERN.match(work_text, position).groupdict()
+            for kind in DATE_RANGE_KINDS + CURRENT_JOB_KINDS:
+                if groups[kind] is not None:
+                    candidates.setdefault(kind, []).append((
+                        position, position + len(groups[kind]), groups[kind + '_start'], groups.get(kind + '_end')))
+            candidate = DATE_CANDIDATE_PATTERN.search(work_text, position + 1)
         
-        # Mevcut iş için özel pattern'lar
-        current_job_patterns = [
-            r'(\d{4})\s*-\s*şimdi',
-            r'(\d{4})\s*-\s*şu\s*an',
-            r'(\d{4})\s*-\s*present',
-            r'(\d{4})\s*-\s*current',
-        ]
+        periods = []
+        for kind in DATE_RANGE_KINDS:
+            for start_date, end_date in TextProcessor._non_overlapping(candidates.get(kind, ()), kind, work_text):
+                start_year = YEAR_PATTERN.search(start_date)
+                end_year = YEAR_PATTERN.search(end_date)
+                
+                if start_year and end_year:
+                    periods.append((int(start_year.group(1)), int(end_year.group(1))))
+                elif start_year and ('current' in end_date.lower() or 'present' in end_date.lower() or 'şimdi' in end_date.lower()):
+                    periods.append((int(start_year.group(1)), None))
         
-        for pattern in current_job_patterns:
-            matches = re.findall(pattern, work_text, re.IGNORECASE)
-            for start_year in matches:
-                try:
-                    years = current_year - int(start_year)
-                    if 0 < years <= 50:
-                        experience_periods.append(years)
-                except (ValueError, AttributeError):
-                    continue
+        # Mevcut iş için özel desenler
+        for kind in CURRENT_JOB_KINDS:
+            for start_year, _ in TextProcessor._non_overlapping(candidates.get(kind, ()), kind, work_text):
+                periods.append((int(start_year), None))
         
-        return sum(experience_periods)
+        return periods
     
     @staticmethod
-    def clean_text(text: str) -> str:
-        """Metni temizler"""
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        text = text.strip()
-        text = re.sub(r'[^\w\s\.\,\;\:\!\?\-\(\)\[\]\/]', '', text)
-        return text
+    def _non_overlapping(candidates, kind: str, text: str) -> List[Tuple[str, Optional[str]]]:
+        """Her konumdaki eşleşme adaylarından re.findall'un seçeceklerini döndürür
+        (soldan sağa, çakışmayan)"""
+        selected, cursor = [], 0
+        for start, end, start_group, end_group in candidates:
+            if start >= cursor:
+                selected.append((start_group, end_group))
+                cursor = end
+            elif kind in WORD_START_KINDS and cursor < start + WORD_PATTERN.match(start_group).end():
+                # Önceki eşleşme bu kelimenin ortasında bitti; arama kalan kısımdan başlar
+                selected.append((text[cursor:start + len(start_group)], end_group))
+                cursor = end
+        return selected
     
     @staticmethod
-    def extract_skills_from_text(text: str, skills_list: List[str]) -> List[str]:
-        """Metinden yetenekleri çıkarır"""
-        text_lower = text.lower()
-        found_skills = []
+    def years_from_periods(periods: List[Tuple[int, Optional[int]]], max_years: int = 50,
+                           current_year: Optional[int] = None) -> float:
+        """Tarih aralıklarından toplam deneyim yılını hesaplar.
+        max_years üzerindeki aralıklar makul kabul edilmez ve atlanır."""
+        if current_year is None:
+            current_year = datetime.now().year
         
-        for skill in skills_list:
-            if skill in text_lower:
-                found_skills.append(skill)
-        
-        return list(set(found_skills))
+        total = 0
+        for start_year, end_year in periods:
+            years = (end_year if end_year is not None else current_year) - start_year
+            if 0 < years <= max_years:  # Makul deneyim aralığı
+                total += years
+        return total
+    
+    @staticmethod
+    def clean_text(text: str) -> str:
+        """Metni temizler; satır yapısı korunur (bölüm başlıkları satır bazında bulunur)"""
+        text = re.sub(r'[^\w\s\.\,\;\:\!\?\-\(\)\[\]\/]', '', text)
+        text = re.sub(r'[^\S\n]+', ' ', text)
+        text = re.sub(r' ?\n ?', '\n', text)
+        text = re.sub(r'\n{3,}', '\n\n', text)
+        return text.strip()
 
 class SingletonMeta(type):
     """Singleton pattern için metaclass"""
     _instances = {}
+    _lock = threading.Lock()
     
     def __call__(cls, *args, **kwargs):
         if cls not in cls._instances:
-            cls._instances[cls] = super().__call__(*args, **kwargs)
+            with cls._lock:
+                if cls not in cls._instances:
+                    cls._instances[cls] = super().__call__(*args, **kwargs)
         return cls._instances[cls]
 
-class ModelManager:
+class ModelManager(metaclass=SingletonMeta):
     """Model yönetimi için singleton sınıf"""
-    __metaclass__ = SingletonMeta
     
     def __init__(self):
         self._scoring_engine = None
         self._salary_predictor = None
         self._cv_processor = None
+        self._rulesets = None
+        self._result_cache = None
+        self._job_queue = None
+        self._candidate_index = None
+        self._candidate_store = None
+        self._candidate_store_loaded = False
+        self._near_duplicates = None
+        self._near_duplicates_loaded = False
+    
+    def preload(self):
+        """Tüm bileşenleri ve maaş modelini önceden yükler (gunicorn --preload
+        ile master süreçte çağrılırsa worker'lar copy-on-write ile paylaşır)"""
+        self.cv_processor
+        self.rulesets.get()
+        self.scoring_engine
+        self.result_cache
+        self.salary_predictor.registry.get()
+        return self
+    
+    @property
+    def rulesets(self):
+        """Derlenmiş puanlama kural setleri (CV_RULESET_PATH, CV_RULESET_DIR)"""
+        if self._rulesets is None:
+            from ruleset import get_ruleset_registry
+            self._rulesets = get_ruleset_registry()
+        return self._rulesets
+    
+    @property
+    def keyword_matcher(self):
+        """Temel kural setinin tek geçişli anahtar kelime eşleştiricisi"""
+        return self.rulesets.get().matcher
     
     @property
     def scoring_engine(self):
         if self._scoring_engine is None:
             from scoring_engine import ScoringEngine
-            self._scoring_engine = ScoringEngine()
+            self._scoring_engine = ScoringEngine(self.rulesets)
         return self._scoring_engine
     
     @property
     def salary_predictor(self):
         if self._salary_predictor is None:
             from salary_predictor import SalaryPredictor
-            self._salary_predictor = SalaryPredictor()
+            self._salary_predictor = SalaryPredictor(rulesets=self.rulesets)
         return self._salary_predictor
     
+    @property
+    def result_cache(self):
+        """Analiz sonuç önbelleği (CV_CACHE_SIZE, CV_CACHE_TTL, CV_CACHE_DB)"""
+        if self._result_cache is None:
+            from result_cache import cache_from_env
+            self._result_cache = cache_from_env()
+        return self._result_cache
+    
+    @property
+    def job_queue(self):
+        """Büyük/yavaş belgeler için asenkron iş kuyruğu (CV_JOB_DB, CV_JOB_WORKERS, CV_JOB_MAX_DEPTH)"""
+        if self._job_queue is None:
+            from job_queue import queue_from_env
+            from analysis import run_job
+            self._job_queue = queue_from_env(run_job)
+        return self._job_queue
+    
+    @property
+    def candidate_index(self):
+        """İş ilanına göre aday sıralama indeksi (CV_INDEX_MAX_TERMS)"""
+        if self._candidate_index is None:
+            from candidate_index import index_from_env
+            self._candidate_index = index_from_env()
+        return self._candidate_index
+    
+    @property
+    def candidate_store(self):
+        """Analiz edilen CV'lerin kalıcı deposu (CV_STORE_DB); CV_STORE_DB=memory ise None"""
+        if not self._candidate_store_loaded:
+            from candidate_store import store_from_env
+            self._candidate_store = store_from_env()
+            self._candidate_store_loaded = True
+        return self._candidate_store
+    
+    @property
+    def near_duplicates(self):
+        """Yakın kopya CV indeksi (CV_NEAR_DUPLICATES, CV_NEAR_DUPLICATE_THRESHOLD); kapalıysa None"""
+        if not self._near_duplicates_loaded:
+            from near_duplicates import index_from_env
+            self._near_duplicates = index_from_env()
+            self._near_duplicates_loaded = True
+        return self._near_duplicates
+    
     @property
     def cv_processor(self):
         if self._cv_processor is None: